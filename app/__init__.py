@@ -1,5 +1,5 @@
 from config import Config
-from flask import Flask
+from flask import Flask, current_app, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
@@ -8,7 +8,6 @@ from flask_jwt_extended import JWTManager
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from redis import Redis
-import rq
 import logging
 from logging.handlers import RotatingFileHandler
 import os
@@ -30,8 +29,39 @@ migrate = Migrate()
 ma = Marshmallow()
 jwt = JWTManager()
 cors = CORS()
+
+
+def rate_limit_cost() -> int:
+    """
+    Returns how much of the rate limit budget the current request uses, based
+    on the RATELIMIT_COSTS weight of its endpoint
+
+    Returns
+    -------
+    int
+        The cost of the request, 1 for endpoints without a weight
+    """
+    return current_app.config["RATELIMIT_COSTS"].get(request.endpoint, 1)
+
+
+def application_rate_limit() -> str:
+    """
+    Returns the rate limit shared by all endpoints of the app
+
+    Returns
+    -------
+    str
+        The RATELIMIT_APPLICATION limit of the current app
+    """
+    return current_app.config["RATELIMIT_APPLICATION"]
+
+
 limiter = Limiter(
-    key_func=get_remote_address, default_limits=["200 per day", "50 per hour"]
+    key_func=get_remote_address,
+    default_limits=["200 per day", "50 per hour"],
+    default_limits_cost=rate_limit_cost,
+    application_limits=[application_rate_limit],
+    application_limits_cost=rate_limit_cost,
 )
 
 
@@ -39,7 +69,6 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.redis = Redis.from_url(app.config["REDIS_URL"])
-    app.task_queue = rq.Queue("flask-api-queue", connection=app.redis)
 
     with app.app_context():
         db.init_app(app)
@@ -55,6 +84,31 @@ def create_app(config_class=Config):
         cors.init_app(app)
         limiter.init_app(app)
 
+        from app.helpers.school_stats import init_school_stats
+
+        init_school_stats(db.engine)
+
+    from app.helpers.artifact_store import init_artifact_store
+    from app.helpers.blocklist import init_blocklist
+    from app.helpers.identity_cache import IdentityCache
+    from app.helpers.password_hashing import PasswordHasher
+    from app.helpers.task_queues import init_task_queues
+
+    app.blocklist = init_blocklist(app.config)
+    app.report_store = init_artifact_store(app.config)
+    app.task_queues = init_task_queues(app.redis)
+    app.identity_cache = IdentityCache(
+        ttl=app.config["IDENTITY_CACHE_TTL"],
+        maxsize=app.config["IDENTITY_CACHE_SIZE"],
+        use_redis=app.config["IDENTITY_CACHE_REDIS"],
+    )
+    app.password_hasher = PasswordHasher(
+        method="pbkdf2:sha256:{}".format(app.config["PASSWORD_HASH_ITERATIONS"]),
+        pool_size=app.config["PASSWORD_HASH_POOL_SIZE"],
+        max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+        timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+    )
+
     from app.auth import bp as auth_bp
     from app.classes import bp as classes_bp
     from app.dashboard import bp as dashboard_bp
@@ -77,8 +131,8 @@ def create_app(config_class=Config):
     app.register_blueprint(tasks_bp, url_prefix="/api/tasks")
     app.register_blueprint(users_bp, url_prefix="/api/users")
 
-    # Set the rate limit for all routes in the auth_bp blueprint to 1 per second
-    limiter.limit("60 per minute")(auth_bp)
+    # Every route of the auth_bp blueprint gets 60 weighted requests per minute
+    limiter.limit("60 per minute", cost=rate_limit_cost)(auth_bp)
 
     # Set the debuging to rotating log files and the log format and settings
     if not app.debug:
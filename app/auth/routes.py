@@ -1,8 +1,8 @@
-from flask import Response, request, jsonify
+from flask import Response, current_app, request, jsonify
 
 from app import db, jwt
 from app.auth import bp
-from app.models import Users, RevokedTokenModel
+from app.models import Users
 from app.schemas import UsersDeserializingSchema
 from app.errors.handlers import bad_request, error_response
 
@@ -12,6 +12,7 @@ from flask_jwt_extended import (
     get_jwt_identity,
     jwt_required,
     get_jwt,
+    current_user,
 )
 
 from marshmallow import ValidationError
@@ -23,8 +24,8 @@ user_schema = UsersDeserializingSchema()
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blacklist(jwt_header, jwt_data) -> bool:
     """
-    Helper function for checking if a token is present in the database
-    revoked token table
+    Helper function for checking if a token is present in the configured
+    blocklist store
 
     Parameters
     ----------
@@ -39,7 +40,7 @@ def check_if_token_in_blacklist(jwt_header, jwt_data) -> bool:
         Returns True if the token is revoked, False otherwise
     """
     jti = jwt_data["jti"]
-    return RevokedTokenModel.is_jti_blacklisted(jti)
+    return current_app.blocklist.is_revoked(jti)
 
 
 @bp.post("/register")
@@ -99,9 +100,14 @@ def login() -> tuple[Response, int] | Response:
     if user is None or not user.check_password(result["password"]):
         return error_response(401, message="Invalid email or password")
 
+    claims = user.token_claims()
     tokens = {
-        "access_token": create_access_token(identity=user.id, fresh=True),
-        "refresh_token": create_refresh_token(identity=user.id),
+        "access_token": create_access_token(
+            identity=user.id, fresh=True, additional_claims=claims
+        ),
+        "refresh_token": create_refresh_token(
+            identity=user.id, additional_claims=claims
+        ),
     }
 
     return jsonify(tokens), 200
@@ -120,7 +126,9 @@ def refresh() -> tuple[Response, int]:
         A JSON object containing the new access token
     """
     user_id = get_jwt_identity()
-    new_token = create_access_token(identity=user_id, fresh=False)
+    new_token = create_access_token(
+        identity=user_id, fresh=False, additional_claims={"ver": get_jwt().get("ver", 0)}
+    )
     payload = {"access_token": new_token}
 
     return jsonify(payload), 200
@@ -147,7 +155,9 @@ def fresh_login() -> tuple[Response, int] | Response:
     if user is None or not user.check_password(result["password"]):
         return error_response(401, message="Invalid email or password")
 
-    new_token = create_access_token(identity=user.id, fresh=True)
+    new_token = create_access_token(
+        identity=user.id, fresh=True, additional_claims=user.token_claims()
+    )
     payload = {"access_token": new_token}
 
     return jsonify(payload), 200
@@ -164,9 +174,7 @@ def logout_access_token() -> tuple[Response, int]:
     str
         A JSON object containing the sucess message
     """
-    jti = get_jwt()["jti"]
-    revoked_token = RevokedTokenModel(jti=jti)
-    revoked_token.add()
+    current_app.blocklist.revoke(get_jwt())
 
     return jsonify({"msg": "Successfully logged out"}), 200
 
@@ -182,8 +190,24 @@ def logout_refresh_token() -> tuple[Response, int]:
     str
         A JSON object containing a success message
     """
-    jti = get_jwt()["jti"]
-    revoked_token = RevokedTokenModel(jti=jti)
-    revoked_token.add()
+    current_app.blocklist.revoke(get_jwt())
 
     return jsonify({"msg": "Successfully logged out"}), 200
+
+
+@bp.delete("/logout/all")
+@jwt_required()
+def logout_all_sessions() -> tuple[Response, int]:
+    """
+    Endpoint for revoking every access and refresh token of the current user
+
+    Returns
+    -------
+    str
+        A JSON object containing a success message
+    """
+    current_user.revoke_all_tokens()
+    db.session.commit()
+    current_app.identity_cache.invalidate(current_user.id)
+
+    return jsonify({"msg": "Successfully logged out of all sessions"}), 200
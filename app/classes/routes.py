@@ -6,6 +6,8 @@ from app.classes import bp
 from app.models import Classes, Subjects
 from app.schemas import ClassesSchema, ClassesDeserializingSchema
 from app.errors.handlers import bad_request
+from app.helpers.fieldsets import FieldsetError, fieldset_schema, load_only_fields
+from app.helpers.pagination import PaginationError, page_response, paginate
 
 from flask_jwt_extended import jwt_required, current_user
 
@@ -49,22 +51,25 @@ def create_class() -> tuple[Response, int] | Response:
 @jwt_required()
 def get_all_classes() -> Response:
     """
-    Endpoint for retrieving all classes
+    Endpoint for retrieving a page of classes
 
     Returns
     -------
     str
-        A JSON object containing the classes
+        A JSON object containing the classes and the cursor of the next page
     """
     try:
-        classes = Classes.query.all()
-    except Exception as e:
-        return bad_request(e.messages), 400
+        schema, fields = fieldset_schema(ClassesSchema, many=True)
+        classes, next_cursor = paginate(
+            load_only_fields(Classes.query, Classes, fields), Classes
+        )
+    except (FieldsetError, PaginationError) as e:
+        return bad_request(str(e))
     
     if not classes:
         return bad_request("No classes found")
     
-    return classes_schema.jsonify(classes)
+    return page_response(schema, classes, next_cursor)
 
 
 @bp.get("/<int:id>")
@@ -80,14 +85,16 @@ def get_class_by_id(id: int) -> Response:
         to be retrieved 
     """
     try:
-        result = Classes.query.filter_by(id=id).first()
-    except Exception as e:
-        return bad_request(e.messages), 400
+        schema, fields = fieldset_schema(ClassesSchema)
+    except FieldsetError as e:
+        return bad_request(str(e))
+
+    result = load_only_fields(Classes.query, Classes, fields).filter_by(id=id).first()
     
     if not result:
         return bad_request("Class not found"), 404
     
-    return class_schema.jsonify(result)
+    return schema.jsonify(result)
 
 
 @bp.put("/<int:id>")
@@ -1,58 +1,167 @@
-from app import db, ma
+from app import db
 from app.dashboard import bp
-from app.errors.handlers import bad_request
-from app.models import Users, Classes, Subjects, Scores, Schools, Reports
-from app.schemas import UsersSchema, ClassesSchema, SubjectsSchema, ScoresSchema, SchoolsSchema, ReportsSchema
+from app.errors.handlers import bad_request, error_response
+from app.helpers import dashboard_cache
+from app.helpers.pagination import PaginationError, paginate
+from app.helpers.school_stats import get_school_stats
+from app.models import (
+    Users,
+    Classes,
+    Subjects,
+    Schools,
+    school_students,
+    school_teachers,
+    school_classes,
+    schools_subjects,
+)
+from app.schemas import UsersSchema, ClassesSchema, SubjectsSchema, SchoolsSchema
 from flask import request, jsonify, Response
 from flask_jwt_extended import jwt_required, current_user
-from sqlalchemy.orm import joinedload
+from redis.exceptions import RedisError
+from sqlalchemy import select
 
 
 school_schema = SchoolsSchema()
 user_schema = UsersSchema(exclude=["password_hash", "created_at", "updated_at"])    
 users_schema = UsersSchema(many=True, exclude=["password_hash", "created_at", "updated_at"])
 subjects_schema = SubjectsSchema(many=True)
+classes_schema = ClassesSchema(many=True)
+
+# The lists which can be embedded in the dashboard: the model, the association
+# table linking it to the school, the association column and the schema
+DASHBOARD_LISTS = {
+    "students": (Users, school_students, school_students.c.student_id, users_schema),
+    "teachers": (Users, school_teachers, school_teachers.c.teacher_id, users_schema),
+    "classes": (Classes, school_classes, school_classes.c.class_id, classes_schema),
+    "subjects": (Subjects, schools_subjects, schools_subjects.c.subject_id, subjects_schema),
+}
+
+
+def school_list_page(school_id: int, name: str) -> dict:
+    """
+    Returns a page of one of the DASHBOARD_LISTS of a school
+
+    Parameters
+    ----------
+    school_id : int
+        ID of the school
+    name : str
+        Name of the list
+
+    Returns
+    -------
+    dict
+        The serialized rows under "data" and the "next_cursor"
+    """
+    model, table, column, schema = DASHBOARD_LISTS[name]
+    query = model.query.join(table, column == model.id).filter(
+        table.c.school_id == school_id
+    )
+    rows, next_cursor = paginate(query, model)
+
+    return {"data": schema.dump(rows), "next_cursor": next_cursor}
+
 
 @bp.get("")
 @jwt_required()
 def dashboard() -> Response:
     """
-    Returns all the data for the dashboard
+    Returns the dashboard of the school owned by the user. The lists of
+    students, teachers, subjects and classes are only embedded when asked
+    for with ?include=students,teachers,... and are paginated. Responses are
+    cached in redis until one of the models feeding them is written to
 
     Returns
     -------
     JSON
         A JSON object containing all the data for the dashboard
     """
+    include = [i for i in request.args.get("include", "").split(",") if i]
 
-    school_details = Schools.query.options(joinedload(Schools.owner)).filter_by(owner=current_user).outerjoin(Schools.students).first()
-    
-    try:
+    if any(name not in DASHBOARD_LISTS for name in include):
+        return bad_request("include must be one of {}".format(", ".join(DASHBOARD_LISTS)))
+
+    school_details = Schools.query.filter_by(owner_id=current_user.id).first()
+
+    if school_details is None:
+        return bad_request("School not found"), 404
+
+    def build() -> dict:
         school_detail = school_schema.dump(school_details)
-        school_detail["students"] = user_schema.dump(school_details.students, many=True)
-        school_detail["teachers"] = users_schema.dump(school_details.teachers)
-        school_detail["owner"] = user_schema.dump(school_details.owner)
-        school_detail["subjects"] = subjects_schema.dump(school_details.subjects)
-        school_detail["classes"] = subjects_schema.dump(school_details.classes)
-    except Exception as e:
-        return bad_request(e.messages), 400
-    
-    reports_count = 0
-    for student in school_details.students:
-        if student.reports:
-            reports_count += 1
-        
-    student_count = len(school_details.students)
-    teacher_count = len(school_details.teachers)
-    subject_count = len(school_details.subjects)
-    class_count = len(school_details.classes)
-    
-    school_detail["school_summary"] = {
-        "student_count": student_count,
-        "teacher_count": teacher_count,
-        "class_count": class_count,
-        "subject_count": subject_count,
-        "reports_count": reports_count
-    }
-    
-    return jsonify(school_detail), 200
\ No newline at end of file
+        school_detail["owner"] = user_schema.dump(current_user)
+
+        for name in include:
+            school_detail[name] = school_list_page(school_details.id, name)
+
+        school_detail["school_summary"] = get_school_stats(school_details.id)
+
+        return school_detail
+
+    variant = "{}:{}:{}".format(
+        ",".join(sorted(include)),
+        request.args.get("limit", ""),
+        request.args.get("after", ""),
+    )
+
+    try:
+        payload = dashboard_cache.get_or_build(school_details.id, variant, build)
+    except PaginationError as e:
+        return bad_request(str(e))
+
+    return Response(payload, status=200, mimetype="application/json")
+
+
+@bp.get("/cache-stats")
+@jwt_required()
+def dashboard_cache_stats() -> Response:
+    """
+    Returns the hit ratio and average rebuild time of the dashboard cache to
+    staff members
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the cache counters
+    """
+    if current_user.role in ("student", "parent"):
+        return error_response(403, "Only staff can see the cache stats")
+
+    try:
+        stats = dashboard_cache.stats()
+    except RedisError:
+        return error_response(503, "Cache stats unavailable")
+
+    return jsonify(stats), 200
+
+
+@bp.get("/<string:name>")
+@jwt_required()
+def dashboard_list(name: str) -> tuple[Response, int] | Response:
+    """
+    Returns a page of the students, teachers, subjects or classes of the school
+    owned by the user
+
+    Parameters
+    ----------
+    name : str
+        Name of the list
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the rows and the cursor of the next page
+    """
+    if name not in DASHBOARD_LISTS:
+        return bad_request("List not found"), 404
+
+    school_id = db.session.scalar(
+        select(Schools.id).where(Schools.owner_id == current_user.id)
+    )
+
+    if school_id is None:
+        return bad_request("School not found"), 404
+
+    try:
+        return jsonify(school_list_page(school_id, name)), 200
+    except PaginationError as e:
+        return bad_request(str(e))
@@ -1,6 +1,9 @@
 from flask import Response, jsonify
 from werkzeug.http import HTTP_STATUS_CODES
 
+from app.errors import bp
+from app.helpers.password_hashing import HashingPoolSaturated
+
 
 def error_response(status_code: int, message=None) -> Response:
     """
@@ -44,3 +47,20 @@ def bad_request(message: str) -> Response:
         A JSON object containing the error message and a 400 HTTP code
     """
     return error_response(400, message)
+
+
+@bp.app_errorhandler(HashingPoolSaturated)
+def hashing_pool_saturated(e: HashingPoolSaturated) -> Response:
+    """
+    Returns a 503 error code when the password hashing pool is too busy to
+    take the request
+
+    Returns
+    -------
+    str
+        A JSON object containing the error message and a 503 HTTP code
+    """
+    response = error_response(503, "Server busy, please try again")
+    response.headers["Retry-After"] = "1"
+
+    return response
@@ -0,0 +1,208 @@
+import os
+import uuid
+
+from flask import Response, send_file
+from werkzeug.security import safe_join
+
+
+class ArtifactStore(object):
+    """
+    Interface for the stores which keep the generated report files. Paths are
+    relative to the store and use "/" as separator
+
+    """
+
+    def write(self, path: str, content: str | bytes) -> None:
+        """
+        Stores a file, readers never see it partially written
+
+        Parameters
+        ----------
+        path : str
+            Path of the file in the store
+        content : str | bytes
+            The content of the file
+        """
+        raise NotImplementedError
+
+    def touch(self, path: str) -> bool:
+        """
+        Marks a file as recently used
+
+        Parameters
+        ----------
+        path : str
+            Path of the file in the store
+
+        Returns
+        -------
+        bool
+            Returns True if the file exists, False otherwise
+        """
+        raise NotImplementedError
+
+    def delete(self, path: str) -> bool:
+        """
+        Removes a file
+
+        Parameters
+        ----------
+        path : str
+            Path of the file in the store
+
+        Returns
+        -------
+        bool
+            Returns True if the file existed, False otherwise
+        """
+        raise NotImplementedError
+
+    def iter_files(self):
+        """
+        Lists every file of the store
+
+        Yields
+        ------
+        tuple
+            The path and the modification time of each file
+        """
+        raise NotImplementedError
+
+    def send(self, path: str, download_name: str, etag: str | bool = True) -> Response:
+        """
+        Builds the response streaming a file to the client. The response honors
+        the Range, If-Range and If-None-Match headers of the request
+
+        Parameters
+        ----------
+        path : str
+            Path of the file in the store
+        download_name : str
+            File name proposed to the client, its extension sets the mimetype
+        etag : str | bool, optional
+            The ETag of the file, by default computed by the store
+
+        Returns
+        -------
+        Response
+            The file response
+
+        Raises
+        ------
+        FileNotFoundError
+            If the file is not in the store
+        """
+        raise NotImplementedError
+
+
+class LocalArtifactStore(ArtifactStore):
+    """
+    Artifact store backed by a directory of the local filesystem. Files are
+    sent with send_file, which hands them to the WSGI server's file wrapper
+    (sendfile) or to the front server when USE_X_SENDFILE is set
+
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _full_path(self, path: str) -> str:
+        full_path = safe_join(self.root, path)
+
+        if full_path is None:
+            raise ValueError("Invalid artifact path: {}".format(path))
+
+        return full_path
+
+    def write(self, path: str, content: str | bytes) -> None:
+        full_path = self._full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        tmp_path = "{}.{}.tmp".format(full_path, uuid.uuid4().hex)
+        with open(tmp_path, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+
+        os.replace(tmp_path, full_path)
+
+    def touch(self, path: str) -> bool:
+        try:
+            os.utime(self._full_path(path))
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def delete(self, path: str) -> bool:
+        full_path = self._full_path(path)
+
+        try:
+            os.remove(full_path)
+        except FileNotFoundError:
+            return False
+
+        # Leave no empty directories behind
+        directory = os.path.dirname(full_path)
+        while directory != self.root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+
+            directory = os.path.dirname(directory)
+
+        return True
+
+    def iter_files(self):
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                full_path = os.path.join(root, name)
+
+                try:
+                    mtime = os.path.getmtime(full_path)
+                except FileNotFoundError:
+                    continue
+
+                yield os.path.relpath(full_path, self.root).replace(os.sep, "/"), mtime
+
+    def send(self, path: str, download_name: str, etag: str | bool = True) -> Response:
+        full_path = self._full_path(path)
+
+        if not os.path.isfile(full_path):
+            raise FileNotFoundError(path)
+
+        response = send_file(
+            full_path, download_name=download_name, conditional=True, etag=etag
+        )
+        # Advertise range support on full responses too
+        response.accept_ranges = "bytes"
+
+        return response
+
+
+ARTIFACT_STORES = {
+    "local": lambda config: LocalArtifactStore(config["REPORTS_FOLDER"]),
+}
+
+
+def init_artifact_store(config: dict) -> ArtifactStore:
+    """
+    Helper function to build the report artifact store configured for the app
+
+    Parameters
+    ----------
+    config : dictionary
+        The app config
+
+    Returns
+    -------
+    object
+        An ArtifactStore object
+    """
+    name = config["REPORTS_STORE"]
+
+    try:
+        factory = ARTIFACT_STORES[name]
+    except KeyError:
+        raise ValueError("Unknown report artifact store: {}".format(name))
+
+    return factory(config)
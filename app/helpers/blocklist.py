@@ -0,0 +1,317 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from redis.exceptions import RedisError
+
+from app import db
+from app.helpers.bloom_filter import BloomFilter
+from app.models import RevokedTokenModel
+
+
+class BlocklistStore(object):
+    """
+    Interface for the stores which keep track of revoked JWTs
+
+    """
+
+    def revoke(self, jwt_data: dict) -> None:
+        """
+        Marks a JWT as revoked
+
+        Parameters
+        ----------
+        jwt_data : dictionary
+            payload data of the JWT
+        """
+        raise NotImplementedError
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Checks if a JWT has been revoked
+
+        Parameters
+        ----------
+        jti : str
+            The JWT unique identifier
+
+        Returns
+        -------
+        bool
+            Returns True if the token is revoked, False otherwise
+        """
+        raise NotImplementedError
+
+
+class SQLBlocklistStore(BlocklistStore):
+    """
+    Blocklist store backed by the Revoked Token table
+
+    """
+
+    def revoke(self, jwt_data: dict) -> None:
+        revoked_token = RevokedTokenModel(jti=jwt_data["jti"])
+        revoked_token.add()
+
+    def is_revoked(self, jti: str) -> bool:
+        return RevokedTokenModel.is_jti_blacklisted(jti)
+
+
+class RedisBlocklistStore(BlocklistStore):
+    """
+    Blocklist store backed by the app Redis connection. Revoked JTIs expire
+    together with the token itself. Every check costs a Redis round-trip, the
+    BloomFilterBlocklistStore of JWT_BLOCKLIST_FILTER is what keeps most
+    checks off the network.
+
+    The Revoked Token table stays the source of truth. It is only checked
+    when Redis is unreachable. Redis is loaded from it again when loaded_key
+    is gone, after a flush or a restart without persistence, and when this
+    worker could not write to Redis, so tokens revoked during an outage stay
+    revoked
+
+    """
+
+    key_prefix = "revoked-jti:"
+    loaded_key = "revoked-jti-loaded"
+
+    def __init__(self, fallback: BlocklistStore | None = None):
+        self.fallback = fallback or SQLBlocklistStore()
+        self.stale = False
+
+    def _key(self, jti: str) -> str:
+        return self.key_prefix + jti
+
+    def load(self) -> None:
+        """
+        Copies the revoked tokens which can still be used from the Revoked
+        Token table into Redis
+        """
+        expires = current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            db.select(RevokedTokenModel.jti, RevokedTokenModel.date_revoked).where(
+                RevokedTokenModel.date_revoked >= now - expires
+            )
+        )
+
+        pipe = current_app.redis.pipeline(transaction=False)
+        for jti, date_revoked in rows:
+            ttl = int((date_revoked + expires - now).total_seconds())
+            pipe.set(self._key(jti), 1, ex=max(ttl, 1))
+
+        pipe.set(self.loaded_key, 1)
+        pipe.execute()
+        self.stale = False
+
+    def revoke(self, jwt_data: dict) -> None:
+        self.fallback.revoke(jwt_data)
+
+        ttl = None
+        if "exp" in jwt_data:
+            ttl = int(jwt_data["exp"] - datetime.now(timezone.utc).timestamp())
+
+            # The token has already expired, there is nothing left to block
+            if ttl <= 0:
+                return
+
+        try:
+            current_app.redis.set(self._key(jwt_data["jti"]), 1, ex=ttl)
+        except RedisError:
+            current_app.logger.warning(
+                "Could not add revoked token to Redis, relying on the database"
+            )
+            self.stale = True
+
+    def is_revoked(self, jti: str) -> bool:
+        try:
+            if self.stale:
+                self.load()
+
+            revoked, loaded = current_app.redis.mget(self._key(jti), self.loaded_key)
+
+            if loaded is None:
+                self.load()
+                return bool(current_app.redis.exists(self._key(jti)))
+        except RedisError:
+            current_app.logger.warning(
+                "Could not reach Redis, checking the revoked token table instead"
+            )
+            self.stale = True
+            return self.fallback.is_revoked(jti)
+
+        return revoked is not None
+
+
+class BloomFilterBlocklistStore(BlocklistStore):
+    """
+    Per worker Bloom filter in front of another blocklist store. Tokens which
+    are not in the filter are known not to be revoked and are accepted without
+    a round-trip, only possible hits are checked against the wrapped store.
+
+    The filter is loaded from the Revoked Token table on the first check and
+    afterwards refreshed incrementally using RevokedTokenModel.date_revoked,
+    so tokens revoked through another worker are picked up within
+    refresh_interval seconds
+
+    """
+
+    def __init__(
+        self,
+        store: BlocklistStore,
+        capacity: int = 100000,
+        error_rate: float = 0.001,
+        refresh_interval: float = 5,
+    ):
+        self.store = store
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.filter = None
+        self.last_revoked = None
+        self.last_refresh = 0.0
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """
+        Resets the filter counters
+        """
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the filter counters of this worker
+
+        Returns
+        -------
+        dict
+            The number of checks, filter hits and false positives and their rates
+        """
+        return {
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+            "hit_rate": self.filter_hits / self.checks if self.checks else 0.0,
+            "false_positive_rate": (
+                self.false_positives / self.filter_hits if self.filter_hits else 0.0
+            ),
+        }
+
+    def _load(self, since: datetime | None) -> None:
+        if since is None:
+            # Only tokens which can still be valid have to be in the filter
+            since = datetime.utcnow() - current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+        else:
+            # Overlap with the previous refresh to catch rows committed late
+            since -= timedelta(seconds=self.refresh_interval)
+
+        rows = db.session.execute(
+            db.select(RevokedTokenModel.jti, RevokedTokenModel.date_revoked).where(
+                RevokedTokenModel.date_revoked >= since
+            )
+        )
+
+        for jti, date_revoked in rows:
+            self.filter.add(jti)
+
+            if self.last_revoked is None or date_revoked > self.last_revoked:
+                self.last_revoked = date_revoked
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Brings the filter up to date with the Revoked Token table
+
+        Parameters
+        ----------
+        force : bool, optional
+            Refresh even if refresh_interval has not passed yet, by default False
+        """
+        now = time.monotonic()
+        if not force and self.filter is not None:
+            if now - self.last_refresh < self.refresh_interval:
+                return
+
+        with self.lock:
+            if self.filter is None or self.filter.is_full():
+                if self.filter is not None:
+                    self.capacity *= 2
+
+                self.filter = BloomFilter(self.capacity, self.error_rate)
+                self.last_revoked = None
+
+            self._load(self.last_revoked)
+            self.last_refresh = now
+
+    def revoke(self, jwt_data: dict) -> None:
+        self.store.revoke(jwt_data)
+        self.refresh()
+        self.filter.add(jwt_data["jti"])
+
+    def is_revoked(self, jti: str) -> bool:
+        self.refresh()
+        self.checks += 1
+
+        if jti not in self.filter:
+            return False
+
+        self.filter_hits += 1
+        revoked = self.store.is_revoked(jti)
+
+        if not revoked:
+            self.false_positives += 1
+
+        return revoked
+
+
+BLOCKLIST_STORES = {
+    "sql": SQLBlocklistStore,
+    "redis": RedisBlocklistStore,
+}
+
+
+def init_blocklist(config: dict) -> BlocklistStore:
+    """
+    Helper function to build the blocklist store configured for the app
+
+    Parameters
+    ----------
+    config : dictionary
+        The app config
+
+    Returns
+    -------
+    object
+        A BlocklistStore object
+
+    Raises
+    ------
+    ValueError
+        If the store is unknown or revoked tokens are removed from the Revoked
+        Token table while they can still be used
+    """
+    name = config["JWT_BLOCKLIST_STORE"]
+
+    # Stores and filters are rebuilt from the Revoked Token table, a revoked
+    # refresh token removed from it too early would be accepted again
+    retention = timedelta(days=config["JWT_BLOCKLIST_RETENTION_DAYS"])
+    if retention < config["JWT_REFRESH_TOKEN_EXPIRES"]:
+        raise ValueError("JWT_BLOCKLIST_RETENTION_DAYS is shorter than JWT_REFRESH_TOKEN_EXPIRES")
+
+    try:
+        store = BLOCKLIST_STORES[name]()
+    except KeyError:
+        raise ValueError("Unknown JWT blocklist store: {}".format(name))
+
+    if config["JWT_BLOCKLIST_FILTER"]:
+        store = BloomFilterBlocklistStore(
+            store,
+            capacity=config["JWT_BLOCKLIST_FILTER_CAPACITY"],
+            error_rate=config["JWT_BLOCKLIST_FILTER_ERROR_RATE"],
+            refresh_interval=config["JWT_BLOCKLIST_FILTER_REFRESH_SECONDS"],
+        )
+
+    return store
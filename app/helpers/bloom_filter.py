@@ -0,0 +1,54 @@
+import hashlib
+import math
+
+
+class BloomFilter(object):
+    """
+    A fixed size Bloom filter for strings. Membership checks can return false
+    positives at roughly the configured error rate, but never false negatives
+
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        )
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        # Kirsch-Mitzenmacher double hashing to derive the k bit positions
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        """
+        Adds an item to the filter
+
+        Parameters
+        ----------
+        item : str
+            The item to add
+        """
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def is_full(self) -> bool:
+        """
+        Returns True once more items have been added than the filter was sized for
+        """
+        return self.count >= self.capacity
@@ -0,0 +1,230 @@
+import json
+import time
+
+from flask import current_app
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Classes,
+    Reports,
+    Schools,
+    Subjects,
+    Users,
+    school_classes,
+    school_students,
+    school_teachers,
+    schools_subjects,
+)
+
+KEY_PREFIX = "dashboard:"
+STATS_KEY = KEY_PREFIX + "stats"
+GLOBAL_VERSION_KEY = KEY_PREFIX + "version"
+
+# Writes to a school only invalidate that school, writes to the other models
+# can touch any school so they invalidate every cached dashboard
+SCHOOL_MODELS = (Schools,)
+GLOBAL_MODELS = (Users, Classes, Subjects, Reports)
+
+# Tables whose bulk INSERT, UPDATE and DELETE statements bypass the mapper
+# events above
+WATCHED_TABLES = {
+    model.__table__.name for model in SCHOOL_MODELS + GLOBAL_MODELS
+} | {
+    table.name
+    for table in (
+        school_students,
+        school_teachers,
+        school_classes,
+        schools_subjects,
+    )
+}
+
+
+def _school_version_key(school_id: int) -> str:
+    return "{}version:{}".format(KEY_PREFIX, school_id)
+
+
+def _record_write(mapper, connection, target) -> None:
+    """
+    Remembers which dashboards a flushed row affects, they are invalidated
+    once the transaction commits
+    """
+    session = Session.object_session(target)
+    if session is None:
+        return
+
+    pending = session.info.setdefault("dashboard_invalidations", set())
+    pending.add(target.id if isinstance(target, Schools) else None)
+
+
+def _record_bulk_write(orm_execute_state) -> None:
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+
+    table = getattr(orm_execute_state.statement, "table", None)
+
+    if table is not None and table.name in WATCHED_TABLES:
+        session = orm_execute_state.session
+        session.info.setdefault("dashboard_invalidations", set()).add(None)
+
+
+def _invalidate_after_commit(session) -> None:
+    pending = session.info.pop("dashboard_invalidations", None)
+
+    if pending and current_app.config["DASHBOARD_CACHE_ENABLED"]:
+        invalidate(pending)
+
+
+def _discard_after_rollback(session) -> None:
+    session.info.pop("dashboard_invalidations", None)
+
+
+for model in SCHOOL_MODELS + GLOBAL_MODELS:
+    for name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, name, _record_write)
+
+event.listen(Session, "do_orm_execute", _record_bulk_write)
+event.listen(Session, "after_commit", _invalidate_after_commit)
+event.listen(Session, "after_rollback", _discard_after_rollback)
+
+
+def invalidate(school_ids: set) -> None:
+    """
+    Invalidates cached dashboards by bumping their version, stale entries are
+    never read again and expire through their TTL
+
+    Parameters
+    ----------
+    school_ids : set
+        IDs of the schools to invalidate, None invalidates every school
+    """
+    try:
+        pipe = current_app.redis.pipeline()
+
+        for school_id in school_ids:
+            if school_id is None:
+                pipe.incr(GLOBAL_VERSION_KEY)
+            else:
+                pipe.incr(_school_version_key(school_id))
+
+        pipe.execute()
+    except RedisError:
+        current_app.logger.warning("Could not invalidate the dashboard cache")
+
+
+def _record(field: str, amount: float = 1) -> None:
+    try:
+        if isinstance(amount, float):
+            current_app.redis.hincrbyfloat(STATS_KEY, field, amount)
+        else:
+            current_app.redis.hincrby(STATS_KEY, field, amount)
+    except RedisError:
+        pass
+
+
+def get_or_build(school_id: int, variant: str, build) -> str:
+    """
+    Returns the serialized dashboard of a school from the cache, building it
+    when needed. Only one worker rebuilds a missing entry, the others wait
+    for it for up to DASHBOARD_CACHE_LOCK_TIMEOUT seconds
+
+    Parameters
+    ----------
+    school_id : int
+        ID of the school
+    variant : str
+        Normalized query string of the request, each variant is cached apart
+    build : callable
+        Function returning the dashboard as a dictionary
+
+    Returns
+    -------
+    str
+        The dashboard serialized as JSON
+    """
+    config = current_app.config
+
+    if not config["DASHBOARD_CACHE_ENABLED"]:
+        return json.dumps(build())
+
+    redis = current_app.redis
+
+    try:
+        global_version, school_version = redis.mget(
+            GLOBAL_VERSION_KEY, _school_version_key(school_id)
+        )
+        key = "{}{}:{}:{}:{}".format(
+            KEY_PREFIX,
+            school_id,
+            int(global_version or 0),
+            int(school_version or 0),
+            variant,
+        )
+        lock_key = key + ":lock"
+
+        deadline = time.monotonic() + config["DASHBOARD_CACHE_LOCK_TIMEOUT"]
+        while True:
+            cached = redis.get(key)
+
+            if cached is not None:
+                _record("hits")
+                return cached.decode()
+
+            if redis.set(lock_key, 1, nx=True, ex=config["DASHBOARD_CACHE_LOCK_TIMEOUT"]):
+                break
+
+            # Another worker is rebuilding the entry
+            if time.monotonic() > deadline:
+                return json.dumps(build())
+
+            time.sleep(0.05)
+
+    except RedisError:
+        current_app.logger.warning("Dashboard cache unavailable, building directly")
+        return json.dumps(build())
+
+    _record("misses")
+
+    try:
+        start = time.perf_counter()
+        payload = json.dumps(build())
+        _record("rebuild_seconds", time.perf_counter() - start)
+
+        redis.set(key, payload, ex=config["DASHBOARD_CACHE_TTL"])
+    except RedisError:
+        current_app.logger.warning("Could not store the dashboard in the cache")
+    finally:
+        try:
+            redis.delete(lock_key)
+        except RedisError:
+            pass
+
+    return payload
+
+
+def stats() -> dict:
+    """
+    Returns the dashboard cache counters shared by all workers
+
+    Returns
+    -------
+    dict
+        The hits, misses, hit ratio and average rebuild time in milliseconds
+    """
+    raw = current_app.redis.hgetall(STATS_KEY)
+    hits = int(raw.get(b"hits", 0))
+    misses = int(raw.get(b"misses", 0))
+    rebuild_seconds = float(raw.get(b"rebuild_seconds", 0))
+
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        "avg_rebuild_ms": 1000 * rebuild_seconds / misses if misses else 0.0,
+    }
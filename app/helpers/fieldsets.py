@@ -0,0 +1,82 @@
+from functools import lru_cache
+
+from flask import request
+from sqlalchemy.orm import load_only
+
+
+class FieldsetError(ValueError):
+    """
+    Raised when the fields query parameter names unknown fields
+
+    """
+
+
+@lru_cache(maxsize=256)
+def _build_schema(schema_cls, only: tuple | None, many: bool, exclude: tuple):
+    return schema_cls(only=only, many=many, exclude=exclude)
+
+
+def fieldset_schema(schema_cls, many: bool = False, exclude: tuple = ()) -> tuple:
+    """
+    Returns the schema to serialize the current request with. When the request
+    has a comma separated fields query parameter the schema only dumps those
+    fields. Schema instances are cached per field set
+
+    Parameters
+    ----------
+    schema_cls : object
+        The marshmallow schema class
+    many : bool, optional
+        Whether a list of objects is serialized, by default False
+    exclude : tuple, optional
+        Fields which are never returned, by default ()
+
+    Returns
+    -------
+    tuple
+        The schema instance and the requested fields, or None when the fields
+        parameter was not passed
+    """
+    base = _build_schema(schema_cls, None, many, tuple(exclude))
+    requested = request.args.get("fields")
+
+    if not requested:
+        return base, None
+
+    fields = tuple(sorted({f.strip() for f in requested.split(",") if f.strip()}))
+    unknown = [f for f in fields if f not in base.fields]
+
+    if unknown:
+        raise FieldsetError("Unknown fields: {}".format(", ".join(unknown)))
+
+    return _build_schema(schema_cls, fields, many, tuple(exclude)), fields
+
+
+def load_only_fields(query, model, fields: tuple | None):
+    """
+    Restricts the columns loaded by a query to the requested fields. Primary
+    keys and created_at, which pagination sorts on, are always loaded
+
+    Parameters
+    ----------
+    query : object
+        The query to restrict
+    model : object
+        The model which is queried
+    fields : tuple | None
+        The requested fields, as returned by fieldset_schema
+
+    Returns
+    -------
+    object
+        The query with a load_only option, or the query itself when all
+        fields were requested
+    """
+    if fields is None:
+        return query
+
+    columns = model.__mapper__.column_attrs.keys()
+    keep = {key.key for key in model.__mapper__.primary_key} | {"created_at"}
+    keep.update(f for f in fields if f in columns)
+
+    return query.options(load_only(*(getattr(model, c) for c in sorted(keep))))
@@ -0,0 +1,150 @@
+from marshmallow import ValidationError
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app import db
+from app.helpers.score_stats import apply_score_changes, stats_key
+from app.models import Classes, Scores, Subjects, Users
+from app.schemas import ScoresDeserializingSchema
+
+# The unique key of a score, a student gets one score of each type per
+# subject, term and session
+GRADEBOOK_KEY = ("class_id", "subject_id", "student_id", "term", "session", "type")
+
+gradebook_schema = ScoresDeserializingSchema(many=True)
+
+
+def upsert_statement(dialect: str):
+    """
+    Builds an INSERT of scores which updates the score instead when a row with
+    the same GRADEBOOK_KEY exists
+
+    Parameters
+    ----------
+    dialect : str
+        Name of the database dialect
+
+    Returns
+    -------
+    Insert
+        The upsert statement, to execute with a list of score rows
+
+    Raises
+    ------
+    ValueError
+        If the dialect has no upsert statement
+    """
+    table = Scores.__table__
+
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(table)
+        return statement.on_duplicate_key_update(
+            score=statement.inserted.score, updated_at=statement.inserted.updated_at
+        )
+
+    insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(dialect)
+
+    if insert is None:
+        raise ValueError("Score upserts are not supported on " + dialect)
+
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=GRADEBOOK_KEY,
+        set_={
+            "score": statement.excluded.score,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+def _missing(model, ids: set) -> set:
+    return ids - set(db.session.scalars(select(model.id).where(model.id.in_(ids))))
+
+
+def submit_gradebook(entries: list) -> tuple[list, dict]:
+    """
+    Validates a list of scores in one pass and creates or updates them all
+    with a single batched upsert. Nothing is written when any entry is
+    invalid, the caller commits or rolls back the transaction
+
+    Parameters
+    ----------
+    entries : list
+        The scores to submit, as loaded by ScoresDeserializingSchema
+
+    Returns
+    -------
+    tuple[list, dict]
+        The GRADEBOOK_KEY and status ("created" or "updated") of every entry,
+        and the validation errors keyed by entry index
+    """
+    try:
+        rows = gradebook_schema.load(entries)
+    except ValidationError as e:
+        return [], e.messages
+
+    for row in rows:
+        row["term"] = row["term"].value
+        row["type"] = row["type"].value
+
+    errors = {}
+    missing_classes = _missing(Classes, {row["class_id"] for row in rows})
+    missing_subjects = _missing(Subjects, {row["subject_id"] for row in rows})
+    missing_students = _missing(Users, {row["student_id"] for row in rows})
+    seen = set()
+
+    for index, row in enumerate(rows):
+        key = tuple(row[column] for column in GRADEBOOK_KEY)
+
+        if row["class_id"] in missing_classes:
+            errors[index] = {"class_id": ["Class not found"]}
+        elif row["subject_id"] in missing_subjects:
+            errors[index] = {"subject_id": ["Subject not found"]}
+        elif row["student_id"] in missing_students:
+            errors[index] = {"student_id": ["Student not found"]}
+        elif key in seen:
+            errors[index] = {"type": ["Duplicate score for this student"]}
+
+        seen.add(key)
+
+    if errors:
+        return [], errors
+
+    existing = {
+        tuple(row[:-1]): row.score
+        for row in db.session.execute(
+            select(
+                *(Scores.__table__.c[column] for column in GRADEBOOK_KEY), Scores.score
+            ).where(
+                tuple_(Scores.class_id, Scores.subject_id, Scores.term, Scores.session).in_(
+                    {
+                        (row["class_id"], row["subject_id"], row["term"], row["session"])
+                        for row in rows
+                    }
+                )
+            )
+        )
+    }
+
+    db.session.execute(upsert_statement(db.session.get_bind().dialect.name), rows)
+
+    apply_score_changes(
+        added=[(stats_key(row), row["score"]) for row in rows],
+        removed=[
+            (stats_key(row), existing[tuple(row[column] for column in GRADEBOOK_KEY)])
+            for row in rows
+            if tuple(row[column] for column in GRADEBOOK_KEY) in existing
+        ],
+    )
+
+    results = [
+        {
+            **{column: row[column] for column in GRADEBOOK_KEY},
+            "status": "updated"
+            if tuple(row[column] for column in GRADEBOOK_KEY) in existing
+            else "created",
+        }
+        for row in rows
+    ]
+
+    return results, {}
@@ -0,0 +1,279 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+from redis.exceptions import RedisError
+
+from app import db
+from app.models import Users
+
+# Columns cached for the current user, password_hash is deliberately left out
+IDENTITY_COLUMNS = (
+    Users.id,
+    Users.first_name,
+    Users.last_name,
+    Users.email,
+    Users.phone,
+    Users.role,
+    Users.birthday,
+    Users.token_version,
+    Users.created_at,
+    Users.updated_at,
+)
+
+DATETIME_FIELDS = ("birthday", "created_at", "updated_at")
+
+# Users helper methods reachable from current_user, they run on the full
+# Users object
+INSTANCE_ATTRIBUTES = (
+    "launch_task",
+    "get_tasks_in_progress",
+    "get_task_in_progress",
+    "get_completed_tasks",
+    "revoke_all_tokens",
+)
+
+
+class CachedUser(object):
+    """
+    Slim projection of a Users row used as current_user. The helper methods
+    of INSTANCE_ATTRIBUTES are looked up on the full Users object, which is
+    only loaded when needed, any other attribute is missing
+
+    """
+
+    def __init__(self, data: dict):
+        self.__dict__.update(data)
+        self._instance = None
+
+    @property
+    def instance(self) -> Users:
+        """
+        The full Users object, loaded on first access
+        """
+        if self._instance is None:
+            self._instance = db.session.get(Users, self.id)
+
+        return self._instance
+
+    def __getattr__(self, name: str):
+        if name not in INSTANCE_ATTRIBUTES:
+            raise AttributeError(
+                "{} is not part of the cached user projection".format(name)
+            )
+
+        return getattr(self.instance, name)
+
+
+class IdentityCache(object):
+    """
+    Short lived cache of user projections keyed by user id. Entries are kept
+    in a process local LRU and, with use_redis, in the app Redis connection so
+    all workers share them.
+
+    With use_redis every entry carries the version of the user it was loaded
+    at. Versions are random tokens kept in Redis and replaced by invalidate,
+    each lookup reads the version, a Redis round-trip, so an entry invalidated
+    by any worker is never served again. When Redis cannot be reached users
+    are loaded from the database.
+
+    Without use_redis lookups never leave the process. invalidate only drops
+    the entry of the current worker, the other workers serve theirs, token
+    version included, until it expires after ttl seconds
+
+    """
+
+    key_prefix = "identity:"
+    version_prefix = "identity-version:"
+
+    def __init__(self, ttl: float = 30, maxsize: int = 10000, use_redis: bool = False):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.use_redis = use_redis
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """
+        Resets the cache counters
+        """
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters of this worker
+
+        Returns
+        -------
+        dict
+            The number of local hits, Redis hits and misses and the hit rate
+        """
+        lookups = self.hits + self.redis_hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+    def _key(self, user_id: int) -> str:
+        return self.key_prefix + str(user_id)
+
+    def _version_key(self, user_id: int) -> str:
+        return self.version_prefix + str(user_id)
+
+    def _get_local(self, user_id: int, version: str) -> dict | None:
+        with self.lock:
+            entry = self.entries.get(user_id)
+
+            if entry is None:
+                return None
+
+            expires, entry_version, data = entry
+            if expires < time.monotonic() or entry_version != version:
+                del self.entries[user_id]
+                return None
+
+            self.entries.move_to_end(user_id)
+            return data
+
+    def _set_local(self, user_id: int, version: str, data: dict) -> None:
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + self.ttl, version, data)
+            self.entries.move_to_end(user_id)
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def _get_redis(self, user_id: int, version: str) -> dict | None:
+        try:
+            cached = current_app.redis.get(self._key(user_id))
+        except RedisError:
+            return None
+
+        if cached is None:
+            return None
+
+        cached = json.loads(cached)
+        if cached["version"] != version:
+            return None
+
+        data = cached["user"]
+        for field in DATETIME_FIELDS:
+            if data[field] is not None:
+                data[field] = datetime.fromisoformat(data[field])
+
+        return data
+
+    def _set_redis(self, user_id: int, version: str, data: dict) -> None:
+        try:
+            current_app.redis.set(
+                self._key(user_id),
+                json.dumps({"version": version, "user": data}, default=datetime.isoformat),
+                ex=max(1, int(self.ttl)),
+            )
+        except RedisError:
+            pass
+
+    def _get_version(self, user_id: int) -> str | None:
+        if not self.use_redis:
+            return ""
+
+        try:
+            version = current_app.redis.get(self._version_key(user_id))
+        except RedisError:
+            return None
+
+        return version.decode() if version is not None else ""
+
+    def _load(self, user_id: int) -> dict | None:
+        row = db.session.execute(
+            db.select(*IDENTITY_COLUMNS).where(Users.id == user_id)
+        ).first()
+
+        return row._asdict() if row is not None else None
+
+    def get(self, user_id: int) -> CachedUser | None:
+        """
+        Returns the user with the given id, going to the database only when
+        neither cache tier has it at its current version
+
+        Parameters
+        ----------
+        user_id : int
+            The id of the user
+
+        Returns
+        -------
+        object
+            A CachedUser object, or None if the user does not exist
+        """
+        version = self._get_version(user_id)
+
+        if version is None:
+            # Without versions a cached entry might have been invalidated
+            self.misses += 1
+            data = self._load(user_id)
+
+            return CachedUser(data) if data is not None else None
+
+        data = self._get_local(user_id, version)
+
+        if data is not None:
+            self.hits += 1
+            return CachedUser(data)
+
+        data = self._get_redis(user_id, version) if self.use_redis else None
+
+        if data is not None:
+            self.redis_hits += 1
+        else:
+            self.misses += 1
+            data = self._load(user_id)
+
+            if data is None:
+                return None
+
+            if self.use_redis:
+                self._set_redis(user_id, version, data)
+
+        self._set_local(user_id, version, data)
+        return CachedUser(data)
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Replaces the version of a user so no worker serves its cached entries
+        anymore, or only drops the local entry without use_redis. Called once a
+        change of the row is committed
+
+        Parameters
+        ----------
+        user_id : int
+            The id of the user
+        """
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+        if not self.use_redis:
+            return
+
+        try:
+            with current_app.redis.pipeline() as pipe:
+                # Entries cached before the change expire before the version
+                # does, the token is random so it never matches an older entry
+                pipe.set(self._version_key(user_id), uuid.uuid4().hex, ex=int(self.ttl) + 1)
+                pipe.delete(self._key(user_id))
+                pipe.execute()
+        except RedisError:
+            current_app.logger.warning(
+                "Could not invalidate user {} in the identity cache".format(user_id)
+            )
@@ -0,0 +1,126 @@
+from flask import request
+from sqlalchemy.orm import selectinload
+
+
+class IncludeError(ValueError):
+    """
+    Raised when the include query parameter names unknown relationships
+
+    """
+
+
+def get_includes(relationships: dict) -> list:
+    """
+    Reads the comma separated include query parameter of the current request.
+    Every relationship is included when the parameter is missing and none
+    when it is empty
+
+    Parameters
+    ----------
+    relationships : dict
+        The relationships which can be included, by name
+
+    Returns
+    -------
+    list
+        The names of the relationships to include
+    """
+    requested = request.args.get("include")
+
+    if requested is None:
+        return list(relationships)
+
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in names if name not in relationships]
+
+    if unknown:
+        raise IncludeError("Unknown include: {}".format(", ".join(unknown)))
+
+    return names
+
+
+def include_options(model, relationships: dict, names: list) -> list:
+    """
+    Returns the loader options eager loading the included relationships with
+    one SELECT ... IN query each, whatever the number of rows
+
+    Parameters
+    ----------
+    model : object
+        The model which is queried
+    relationships : dict
+        The relationships which can be included, mapping their name to the
+        relationship attribute and the schema dumping the related rows
+    names : list
+        The names of the relationships to include
+
+    Returns
+    -------
+    list
+        The options to pass to query.options
+    """
+    return [
+        selectinload(getattr(model, relationships[name][0])) for name in names
+    ]
+
+
+def include_keys(model, relationships: dict, names: list) -> tuple:
+    """
+    Returns the foreign key columns the included relationships are loaded
+    from, so they can be kept when a fieldset restricts the loaded columns
+
+    Parameters
+    ----------
+    model : object
+        The model which is queried
+    relationships : dict
+        The relationships which can be included, as passed to include_options
+    names : list
+        The names of the relationships to include
+
+    Returns
+    -------
+    tuple
+        The names of the foreign key columns
+    """
+    return tuple(
+        column.key
+        for name in names
+        for column in model.__mapper__.relationships[relationships[name][0]].local_columns
+    )
+
+
+def included_resources(rows: list, relationships: dict, names: list) -> dict:
+    """
+    Collects the rows related to a page, each related row is dumped once
+    however many rows of the page reference it, the way JSON:API side loads
+    included resources
+
+    Parameters
+    ----------
+    rows : list
+        The rows of the page, loaded with include_options
+    relationships : dict
+        The relationships which can be included, as passed to include_options
+    names : list
+        The names of the relationships to include
+
+    Returns
+    -------
+    dict
+        The dumped related rows, by relationship name
+    """
+    included = {}
+
+    for name in names:
+        attribute, schema = relationships[name]
+        related = {}
+
+        for row in rows:
+            target = getattr(row, attribute)
+            if target is not None:
+                related.setdefault(target.id, target)
+
+        included[name] = schema.dump(related.values())
+
+    return included
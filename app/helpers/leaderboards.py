@@ -0,0 +1,231 @@
+from flask import current_app
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, tuple_
+
+from app import db
+from app.helpers.term_results import score_weight
+from app.models import Scores
+
+KEY_PREFIX = "leaderboard:"
+REBUILD_PREFIX = "leaderboard-rebuild:"
+
+# A leaderboard ranks the students of a class in a subject for a term, the
+# columns identifying one and its members
+BOARD_COLUMNS = (Scores.class_id, Scores.subject_id, Scores.term, Scores.session)
+ENTRY_COLUMNS = BOARD_COLUMNS + (Scores.student_id,)
+
+# Number of entries refreshed per query
+CHUNK_SIZE = 500
+
+
+def leaderboard_key(
+    class_id: int, subject_id: int, term: str, session: str, prefix: str = KEY_PREFIX
+) -> str:
+    return "{}{}:{}:{}:{}".format(prefix, class_id, subject_id, term, session)
+
+
+def score_entry(score: Scores) -> tuple:
+    """
+    Returns the leaderboard entry a score counts towards
+
+    Parameters
+    ----------
+    score : Scores
+        The score
+
+    Returns
+    -------
+    tuple
+        The class_id, subject_id, term, session and student_id of the score
+    """
+    return tuple(getattr(score, column.key) for column in ENTRY_COLUMNS)
+
+
+def totals_query():
+    """
+    Builds the query of the weighted total of every leaderboard entry
+
+    Returns
+    -------
+    Select
+        A query returning the ENTRY_COLUMNS and the total of each entry
+    """
+    weight = score_weight(current_app.config["SCORE_TYPE_WEIGHTS"])
+
+    return select(
+        *ENTRY_COLUMNS, func.sum(Scores.score * weight).label("total")
+    ).group_by(*ENTRY_COLUMNS)
+
+
+def refresh_leaderboards(entries: set) -> None:
+    """
+    Sets the leaderboard score of the given entries to their committed total,
+    entries without any score left are removed. Called after every score
+    write, a failure only logs a warning as rebuild_leaderboards restores
+    the boards from the database
+
+    Parameters
+    ----------
+    entries : set
+        Entries as returned by score_entry
+    """
+    entries = list(entries)
+    totals = {}
+
+    for i in range(0, len(entries), CHUNK_SIZE):
+        chunk = entries[i : i + CHUNK_SIZE]
+        for row in db.session.execute(
+            totals_query().where(tuple_(*ENTRY_COLUMNS).in_(chunk))
+        ):
+            totals[tuple(row[:-1])] = float(row.total)
+
+    try:
+        pipe = current_app.redis.pipeline()
+
+        for entry in entries:
+            key = leaderboard_key(*entry[:-1])
+
+            if entry in totals:
+                pipe.zadd(key, {entry[-1]: totals[entry]})
+            else:
+                pipe.zrem(key, entry[-1])
+
+        pipe.execute()
+    except RedisError:
+        current_app.logger.warning("Could not update the leaderboards")
+
+
+def rebuild_leaderboards(batch_size: int = 1000) -> int:
+    """
+    Rebuilds every leaderboard from the Scores table. Boards are built under
+    temporary keys and renamed over the current ones, so they stay readable
+    during the rebuild
+
+    Parameters
+    ----------
+    batch_size : int, optional
+        Number of rows read and written per batch, by default 1000
+
+    Returns
+    -------
+    int
+        The number of leaderboards
+    """
+    redis = current_app.redis
+    built = set()
+
+    # Leftovers of an interrupted rebuild
+    for key in redis.scan_iter(REBUILD_PREFIX + "*"):
+        redis.delete(key)
+
+    result = db.session.execute(totals_query().execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        pipe = redis.pipeline(transaction=False)
+
+        for row in partition:
+            board = tuple(row[:4])
+            pipe.zadd(
+                leaderboard_key(*board, prefix=REBUILD_PREFIX),
+                {row.student_id: float(row.total)},
+            )
+            built.add(leaderboard_key(*board))
+
+        pipe.execute()
+
+    pipe = redis.pipeline(transaction=False)
+
+    for key in redis.scan_iter(KEY_PREFIX + "*"):
+        if key.decode() not in built:
+            pipe.delete(key)
+
+    for key in built:
+        pipe.rename(REBUILD_PREFIX + key[len(KEY_PREFIX) :], key)
+
+    pipe.execute()
+
+    return len(built)
+
+
+def student_rank(
+    class_id: int, subject_id: int, term: str, session: str, student_id: int
+) -> dict | None:
+    """
+    Returns the position of a student on a leaderboard, students with the
+    same total share a position
+
+    Parameters
+    ----------
+    class_id : int
+        ID of the class
+    subject_id : int
+        ID of the subject
+    term : str
+        The term
+    session : str
+        The session
+    student_id : int
+        ID of the student
+
+    Returns
+    -------
+    dict | None
+        The total, position and number of students on the board, or None
+        when the student has no score on it
+    """
+    redis = current_app.redis
+    key = leaderboard_key(class_id, subject_id, term, session)
+    total = redis.zscore(key, student_id)
+
+    if total is None:
+        return None
+
+    pipe = redis.pipeline(transaction=False)
+    pipe.zcount(key, "({!r}".format(total), "+inf")
+    pipe.zcard(key)
+    higher, size = pipe.execute()
+
+    return {
+        "student_id": student_id,
+        "total": total,
+        "position": higher + 1,
+        "out_of": size,
+    }
+
+
+def top_students(
+    class_id: int, subject_id: int, term: str, session: str, limit: int
+) -> list:
+    """
+    Returns the best students of a leaderboard
+
+    Parameters
+    ----------
+    class_id : int
+        ID of the class
+    subject_id : int
+        ID of the subject
+    term : str
+        The term
+    session : str
+        The session
+    limit : int
+        Number of students to return
+
+    Returns
+    -------
+    list
+        The student_id, total and position of the students, best first
+    """
+    key = leaderboard_key(class_id, subject_id, term, session)
+    entries = current_app.redis.zrevrange(key, 0, limit - 1, withscores=True)
+    top = []
+
+    for i, (member, total) in enumerate(entries):
+        if top and total == top[-1]["total"]:
+            position = top[-1]["position"]
+        else:
+            position = i + 1
+
+        top.append({"student_id": int(member), "total": total, "position": position})
+
+    return top
@@ -0,0 +1,145 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import Response, current_app, jsonify, request
+from sqlalchemy import and_, or_
+
+
+class PaginationError(ValueError):
+    """
+    Raised when the limit or after query parameters are invalid
+
+    """
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Encodes the sort key of the last row of a page into an opaque cursor
+
+    Parameters
+    ----------
+    created_at : datetime
+        Creation date of the row
+    id : int
+        ID of the row
+
+    Returns
+    -------
+    str
+        The URL safe cursor
+    """
+    payload = json.dumps([created_at.isoformat(), id]).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decodes a cursor created by encode_cursor
+
+    Parameters
+    ----------
+    cursor : str
+        The cursor passed in the after query parameter
+
+    Returns
+    -------
+    tuple
+        The creation date and ID of the last row of the previous page
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+
+def get_page_args() -> tuple[int, str | None]:
+    """
+    Reads the limit and after query parameters of the current request
+
+    Returns
+    -------
+    tuple
+        The page size and the cursor, or None for the first page
+    """
+    limit = request.args.get("limit", current_app.config["PAGE_SIZE_DEFAULT"])
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+
+    return min(limit, current_app.config["PAGE_SIZE_MAX"]), request.args.get("after")
+
+
+def paginate(query, model) -> tuple[list, str | None]:
+    """
+    Returns one page of a query using keyset pagination on (created_at, id),
+    so every page is an index range scan no matter how deep it is
+
+    Parameters
+    ----------
+    query : object
+        The query to paginate, without ordering or limit
+    model : object
+        The model which is queried, it needs created_at and id columns
+
+    Returns
+    -------
+    tuple
+        The rows of the page and the cursor of the next page, which is None
+        on the last page
+    """
+    limit, after = get_page_args()
+
+    if after is not None:
+        created_at, id = decode_cursor(after)
+        query = query.filter(
+            or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > id),
+            )
+        )
+
+    rows = query.order_by(model.created_at, model.id).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def page_response(
+    schema, rows: list, next_cursor: str | None, included: dict | None = None
+) -> Response:
+    """
+    Serializes a page of rows together with the cursor of the next page
+
+    Parameters
+    ----------
+    schema : object
+        A marshmallow schema with many=True
+    rows : list
+        The rows of the page
+    next_cursor : str | None
+        The cursor of the next page
+    included : dict | None, optional
+        Related rows returned under "included", by default None
+
+    Returns
+    -------
+    str
+        A JSON object with the serialized rows under "data" and the "next_cursor"
+    """
+    payload = {"data": schema.dump(rows), "next_cursor": next_cursor}
+
+    if included is not None:
+        payload["included"] = included
+
+    return jsonify(payload)
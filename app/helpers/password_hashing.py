@@ -0,0 +1,144 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from itertools import repeat
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingPoolSaturated(Exception):
+    """
+    Raised when the password hashing pool cannot take more work
+
+    """
+
+
+class PasswordHasher(object):
+    """
+    Runs password hashing and verification on a bounded process pool so the
+    CPU heavy key derivation does not block the request threads. At most
+    max_pending calls can be queued or running at once, including calls which
+    timed out but are still running, additional calls fail
+    straight away with HashingPoolSaturated instead of waiting. A pool size
+    of 0 hashes on the calling thread
+
+    """
+
+    def __init__(
+        self,
+        method: str = "pbkdf2:sha256:600000",
+        pool_size: int = 2,
+        max_pending: int = 16,
+        timeout: float = 10,
+    ):
+        self.method = method
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.executor = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Every (forked) web worker process needs a pool of its own
+        with self.lock:
+            if self.executor is None or self.pid != os.getpid():
+                self.executor = ProcessPoolExecutor(max_workers=self.pool_size)
+                self.pid = os.getpid()
+
+            return self.executor
+
+    def _run(self, fn, *args):
+        if self.pool_size <= 0:
+            return fn(*args)
+
+        if not self.slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        # A hash which timed out keeps running, its slot is only free once
+        # the pool is done with it
+        future.add_done_callback(lambda _: self.slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashingPoolSaturated()
+
+    def generate(self, password: str) -> str:
+        """
+        Generates the hash of a password
+
+        Parameters
+        ----------
+        password : str
+            The plain text password
+
+        Returns
+        -------
+        str
+            The salted password hash
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def generate_many(self, passwords: list) -> list:
+        """
+        Generates the hashes of a batch of passwords in parallel across the
+        pool. Meant for background jobs, so the pending limit does not apply
+
+        Parameters
+        ----------
+        passwords : list
+            The plain text passwords
+
+        Returns
+        -------
+        list
+            The salted password hashes, in the same order as the passwords
+        """
+        if self.pool_size <= 0:
+            return [generate_password_hash(p, self.method) for p in passwords]
+
+        chunksize = max(1, len(passwords) // (self.pool_size * 4))
+
+        return list(
+            self._get_executor().map(
+                generate_password_hash,
+                passwords,
+                repeat(self.method),
+                chunksize=chunksize,
+            )
+        )
+
+    def check(self, password_hash: str, password: str) -> bool:
+        """
+        Verifies a password against a stored hash
+
+        Parameters
+        ----------
+        password_hash : str
+            The stored password hash
+        password : str
+            The plain text password
+
+        Returns
+        -------
+        bool
+            Returns True if the password is a match
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes of the pool
+        """
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+                self.executor = None
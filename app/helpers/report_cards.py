@@ -0,0 +1,443 @@
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+
+from flask import current_app, render_template
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app import db
+from app.helpers.task_helpers import _set_task_progress
+from app.helpers.term_results import compute_term_results
+from app.models import Classes, Reports, Schools, Tasks, school_classes
+
+# PDF report cards are optional, they need weasyprint to be installed
+try:
+    from weasyprint import HTML
+except ImportError:
+    HTML = None
+
+REPORT_BATCH_KEY = "report_batch:{}"
+CACHE_STATS_KEY = "report_cards:stats"
+TEMPLATE = "reports/report_card.html"
+
+
+def pdf_available() -> bool:
+    """
+    Returns whether report cards can be rendered as PDF
+    """
+    return HTML is not None
+
+
+def report_session(session: str) -> int:
+    """
+    Returns the session stored on Reports rows, the first year of a
+    "2024/2025" scores session
+    """
+    return int(session.split("/")[0])
+
+
+def artifact_path(digest: str, extension: str) -> str:
+    """
+    Returns the path of a report card in the report store. Cards are stored
+    under the digest of their inputs, see render_digest
+    """
+    return "{}/{}.{}".format(digest[:2], digest, extension)
+
+
+def artifact_etag(path: str) -> str | bool:
+    """
+    Returns the ETag of a report card, the digest in its path. Cards stored
+    under another path get an ETag computed from the file
+    """
+    name, _ = os.path.splitext(os.path.basename(path))
+
+    return name if re.fullmatch(r"[0-9a-f]{64}", name) else True
+
+
+def render_digest(template_digest: str, context: dict) -> str:
+    """
+    Hashes everything a report card is rendered from: the template, the totals
+    of the student computed from their own scores, the comment of the report
+    and the branding of the school
+
+    Parameters
+    ----------
+    template_digest : str
+        Digest of the source of the template
+    context : dict
+        The variables the template is rendered with
+
+    Returns
+    -------
+    str
+        The hex SHA-256 digest
+    """
+    payload = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+
+    return hashlib.sha256((template_digest + payload).encode()).hexdigest()
+
+
+def _template_digest() -> str:
+    source, _, _ = current_app.jinja_env.loader.get_source(current_app.jinja_env, TEMPLATE)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def _record(hits: int, misses: int, render_seconds: float) -> None:
+    try:
+        pipe = current_app.redis.pipeline()
+        pipe.hincrby(CACHE_STATS_KEY, "hits", hits)
+        pipe.hincrby(CACHE_STATS_KEY, "misses", misses)
+        pipe.hincrbyfloat(CACHE_STATS_KEY, "render_seconds", render_seconds)
+        pipe.execute()
+    except RedisError:
+        current_app.logger.warning("Could not record the report card cache stats")
+
+
+def cache_stats() -> dict:
+    """
+    Returns the report card cache counters shared by all workers
+
+    Returns
+    -------
+    dict
+        The hits, misses, hit ratio and average render time in milliseconds
+    """
+    raw = current_app.redis.hgetall(CACHE_STATS_KEY)
+    hits = int(raw.get(b"hits", 0))
+    misses = int(raw.get(b"misses", 0))
+    render_seconds = float(raw.get(b"render_seconds", 0))
+
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        "avg_render_ms": 1000 * render_seconds / misses if misses else 0.0,
+    }
+
+
+def class_header(class_id: int) -> tuple | None:
+    """
+    Loads the name of a class and the school details printed on its report cards
+
+    Parameters
+    ----------
+    class_id : int
+        ID of the class
+
+    Returns
+    -------
+    tuple | None
+        The class name and a dict of the school name, logo, color and motto,
+        None if the class does not exist
+    """
+    row = db.session.execute(
+        select(Classes.name, Schools.name, Schools.logo, Schools.color, Schools.motto)
+        .outerjoin(school_classes, school_classes.c.class_id == Classes.id)
+        .outerjoin(Schools, Schools.id == school_classes.c.school_id)
+        .where(Classes.id == class_id)
+        .limit(1)
+    ).first()
+
+    if row is None:
+        return None
+
+    class_name, *school = row
+    return class_name, dict(zip(("name", "logo", "color", "motto"), school))
+
+
+def card_student(student: dict) -> dict:
+    """
+    Keeps the part of the term results of a student which only depends on
+    their own scores. Class positions and subject statistics change with any
+    mark of the class, they are served by the term results endpoint and left
+    off the cards so a corrected mark only renders the card of its student
+
+    Parameters
+    ----------
+    student : dict
+        The results of the student, see compute_term_results
+
+    Returns
+    -------
+    dict
+        The id, names, totals and average of the student
+    """
+    return {
+        "student_id": student["student_id"],
+        "first_name": student["first_name"],
+        "last_name": student["last_name"],
+        "subjects": {
+            subject_id: {"total": result["total"]}
+            for subject_id, result in student["subjects"].items()
+        },
+        "total": student["total"],
+        "average": student["average"],
+    }
+
+
+def generate_class_reports(
+    class_id: int, term: str, session: str, generator_id: int, pdf: bool = False
+) -> dict:
+    """
+    Generates the report cards of every student of a class with scores in a
+    term. The results come from a single query over the scores of the class,
+    the cards are stored in the report store by the digest of their inputs
+    and the Reports rows are written in bulk. Cards whose inputs did not change
+    are not rendered again, existing reports of the students for the term are
+    updated in place and keep their comment
+
+    Parameters
+    ----------
+    class_id : int
+        ID of the class
+    term : str
+        The term
+    session : str
+        The session of the scores, e.g. "2024/2025"
+    generator_id : int
+        ID of the user generating the reports
+    pdf : bool, optional
+        Whether to render the cards as PDF, by default False
+
+    Returns
+    -------
+    dict
+        The number of generated, rendered, created and updated reports
+    """
+    if pdf and not pdf_available():
+        raise RuntimeError("PDF report cards need weasyprint to be installed")
+
+    header = class_header(class_id)
+    if header is None:
+        raise LookupError("Class {} not found".format(class_id))
+
+    class_name, school = header
+    results = compute_term_results(class_id, term, session)
+    students = results["students"]
+    year = report_session(session)
+    template_digest = _template_digest()
+    store = current_app.report_store
+    extension = "pdf" if pdf else "html"
+
+    existing = {}
+    if students:
+        for report_id, student_id, url, comment in db.session.execute(
+            select(Reports.id, Reports.student_id, Reports.url, Reports.comment)
+            .where(
+                Reports.student_id.in_([s["student_id"] for s in students]),
+                Reports.term == term,
+                Reports.session == year,
+            )
+            .order_by(Reports.id)
+        ):
+            existing.setdefault(student_id, (report_id, url, comment))
+
+    urls = {}
+    rendered = 0
+    render_seconds = 0.0
+    progress = -1
+
+    for done, student in enumerate(students):
+        _, _, comment = existing.get(student["student_id"], (None, None, None))
+        context = {
+            "school": school,
+            "class_name": class_name,
+            "term": term,
+            "session": session,
+            "student": card_student(student),
+            "subjects": [
+                {"subject_id": s["subject_id"], "name": s["name"]}
+                for s in results["subjects"]
+                if s["subject_id"] in student["subjects"]
+            ],
+            "comment": comment,
+        }
+        url = artifact_path(render_digest(template_digest, context), extension)
+
+        if not store.touch(url):
+            start = time.perf_counter()
+            html = render_template(TEMPLATE, **context)
+            store.write(url, HTML(string=html).write_pdf() if pdf else html)
+            render_seconds += time.perf_counter() - start
+            rendered += 1
+
+        urls[student["student_id"]] = url
+
+        # Progress is saved in steps of 10%, the last step is left for the
+        # database writes
+        if 10 * (10 * done // len(students)) != progress:
+            progress = 10 * (10 * done // len(students))
+            _set_task_progress(progress)
+
+    updates = [
+        {"id": existing[student_id][0], "url": url, "generator_id": generator_id}
+        for student_id, url in urls.items()
+        if student_id in existing and url != existing[student_id][1]
+    ]
+    inserts = [
+        {
+            "url": url,
+            "term": term,
+            "session": year,
+            "student_id": student_id,
+            "generator_id": generator_id,
+        }
+        for student_id, url in urls.items()
+        if student_id not in existing
+    ]
+
+    if updates:
+        db.session.execute(db.update(Reports), updates)
+
+    if inserts:
+        db.session.execute(db.insert(Reports), inserts)
+
+    db.session.commit()
+    _record(len(urls) - rendered, rendered, render_seconds)
+
+    return {
+        "class_id": class_id,
+        "generated": len(urls),
+        "rendered": rendered,
+        "created": len(inserts),
+        "updated": len(updates),
+    }
+
+
+def collect_garbage(grace_seconds: int, dry_run: bool = False) -> list:
+    """
+    Removes the files of the report store which no report points to anymore.
+    Files changed within the grace period are kept, they may belong to a
+    generation task which did not commit its reports yet
+
+    Parameters
+    ----------
+    grace_seconds : int
+        Age in seconds a file needs before it can be removed
+    dry_run : bool, optional
+        Only list the files, by default False
+
+    Returns
+    -------
+    list
+        The paths of the removed files
+    """
+    store = current_app.report_store
+    referenced = set(
+        db.session.scalars(
+            select(Reports.url).execution_options(yield_per=1000)
+        )
+    )
+    cutoff = time.time() - grace_seconds
+    removed = []
+
+    for path, mtime in list(store.iter_files()):
+        if path in referenced or mtime > cutoff:
+            continue
+
+        if dry_run or store.delete(path):
+            removed.append(path)
+
+    return sorted(removed)
+
+
+def launch_report_batch(user, class_ids: list, term: str, session: str, pdf: bool) -> str:
+    """
+    Fans the report cards of classes out to one background task per class.
+    The caller commits the session
+
+    Parameters
+    ----------
+    user : Users
+        The user launching the tasks
+    class_ids : list
+        IDs of the classes
+    term : str
+        The term
+    session : str
+        The session of the scores
+    pdf : bool
+        Whether to also render the cards as PDF
+
+    Returns
+    -------
+    str
+        The id of the batch, see report_batch_status
+    """
+    batch_id = uuid.uuid4().hex
+    tasks = {}
+
+    for class_id in class_ids:
+        task = user.launch_task(
+            "generate_reports",
+            "Generating the report cards of class {}...".format(class_id),
+            class_id=class_id,
+            term=term,
+            session=session,
+            generator_id=user.id,
+            pdf=pdf,
+            job_timeout=current_app.config["REPORT_CARDS_JOB_TIMEOUT"],
+        )
+        tasks[task.task_id] = class_id
+
+    current_app.redis.set(
+        REPORT_BATCH_KEY.format(batch_id),
+        json.dumps(tasks),
+        ex=current_app.config["REPORT_CARDS_BATCH_TTL"],
+    )
+
+    return batch_id
+
+
+def report_batch_status(batch_id: str, user) -> dict | None:
+    """
+    Aggregates the progress of the tasks of a report card batch
+
+    Parameters
+    ----------
+    batch_id : str
+        The id returned by launch_report_batch
+    user : Users
+        The user who launched the batch
+
+    Returns
+    -------
+    dict | None
+        The overall progress and the progress, summary and error of every
+        class, None if the batch does not exist or belongs to another user
+    """
+    batch = current_app.redis.get(REPORT_BATCH_KEY.format(batch_id))
+    if batch is None:
+        return None
+
+    class_ids = json.loads(batch)
+    tasks = Tasks.query.filter(
+        Tasks.task_id.in_(list(class_ids)), Tasks.user_id == user.id
+    ).all()
+
+    if not tasks:
+        return None
+
+    classes = []
+    for task in tasks:
+        job = task.get_rq_job()
+        classes.append(
+            {
+                "class_id": class_ids[task.task_id],
+                "progress": job.meta.get("progress", 0) if job is not None else 100,
+                "report": job.meta.get("report") if job is not None else None,
+                "error": job.meta.get("error") if job is not None else None,
+            }
+        )
+
+    classes.sort(key=lambda c: c["class_id"])
+
+    return {
+        "progress": sum(c["progress"] for c in classes) // len(classes),
+        "complete": all(task.complete for task in tasks),
+        "classes": classes,
+    }
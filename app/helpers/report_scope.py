@@ -0,0 +1,119 @@
+from sqlalchemy import CompoundSelect, or_, select, true, union
+
+from app.models import (
+    Reports,
+    Schools,
+    school_classes,
+    school_students,
+    school_teachers,
+    students_classes,
+)
+
+
+def _staff_conditions(user) -> list:
+    # Reports of the students of the schools the user teaches at or owns
+    conditions = []
+
+    if user.role == "teacher":
+        conditions.append(
+            Reports.student_id.in_(
+                select(students_classes.c.student_id)
+                .join(
+                    school_classes,
+                    school_classes.c.class_id == students_classes.c.class_id,
+                )
+                .join(
+                    school_teachers,
+                    school_teachers.c.school_id == school_classes.c.school_id,
+                )
+                .where(school_teachers.c.teacher_id == user.id)
+            )
+        )
+
+    conditions.append(
+        Reports.student_id.in_(
+            select(school_students.c.student_id)
+            .join(Schools, Schools.id == school_students.c.school_id)
+            .where(Schools.owner_id == user.id)
+        )
+    )
+
+    return conditions
+
+
+def report_scope(user):
+    """
+    Builds the condition selecting the reports a user can see: students see
+    their own reports, teachers the reports they generated and those of the
+    students in the classes of the schools they teach at, school owners the
+    reports of the students of their schools. Super admins see every report
+
+    Parameters
+    ----------
+    user : Users
+        The user making the request
+
+    Returns
+    -------
+    ColumnElement
+        A condition on the Reports table
+    """
+    if user.role == "super_admin":
+        return true()
+
+    # A single equality keeps student listings on ix_reports_student_term_session
+    if user.role == "student":
+        return Reports.student_id == user.id
+
+    return or_(
+        Reports.student_id == user.id,
+        Reports.generator_id == user.id,
+        *_staff_conditions(user),
+    )
+
+
+def report_write_scope(user):
+    """
+    Builds the condition selecting the reports a staff member can change or
+    delete: the reports they generated, those of the students in the classes
+    of the schools they teach at and those of the students of the schools
+    they own. Super admins can change every report
+
+    Parameters
+    ----------
+    user : Users
+        The user making the request, not a student or a parent
+
+    Returns
+    -------
+    ColumnElement
+        A condition on the Reports table
+    """
+    if user.role == "super_admin":
+        return true()
+
+    return or_(Reports.generator_id == user.id, *_staff_conditions(user))
+
+
+def staff_schools(user) -> CompoundSelect | None:
+    """
+    Builds the query of the ids of the schools a user owns or teaches at,
+    the schools whose report cards they can generate
+
+    Parameters
+    ----------
+    user : Users
+        The user making the request
+
+    Returns
+    -------
+    CompoundSelect | None
+        A query of school ids, None for super admins who can reach every school
+    """
+    if user.role == "super_admin":
+        return None
+
+    return union(
+        select(Schools.id).where(Schools.owner_id == user.id),
+        select(school_teachers.c.school_id).where(school_teachers.c.teacher_id == user.id),
+    )
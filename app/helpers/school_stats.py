@@ -0,0 +1,393 @@
+from collections import Counter, defaultdict
+
+from flask import current_app
+from sqlalchemy import Delete, Insert, Update, delete, event, exists, func, insert, select, update
+
+from app import db
+from app.models import (
+    Reports,
+    Schools,
+    SchoolStats,
+    school_classes,
+    school_students,
+    school_teachers,
+    schools_subjects,
+)
+
+# The association tables counted per school: the member column and the
+# SchoolStats counter it feeds
+COUNTED_TABLES = {
+    school_students.name: ("student_id", "student_count"),
+    school_teachers.name: ("teacher_id", "teacher_count"),
+    school_classes.name: ("class_id", "class_count"),
+    schools_subjects.name: ("subject_id", "subject_count"),
+}
+STAT_COLUMNS = (
+    "student_count",
+    "teacher_count",
+    "class_count",
+    "subject_count",
+    "reports_count",
+)
+
+# Size of the IN lists used to look up the schools and reports of students
+CHUNK_SIZE = 500
+
+stats_table = SchoolStats.__table__
+reports_table = Reports.__table__
+
+
+def stats_query(school_ids=None):
+    """
+    Builds the query computing the SchoolStats rows from the base tables
+
+    Parameters
+    ----------
+    school_ids : list, optional
+        Only compute these schools, by default all of them
+
+    Returns
+    -------
+    Select
+        A query returning a school_id column and one column per counter
+    """
+
+    def count(table):
+        return (
+            select(func.count())
+            .select_from(table)
+            .where(table.c.school_id == Schools.id)
+            .correlate(Schools)
+            .scalar_subquery()
+        )
+
+    # Number of students with at least one report
+    reports_count = (
+        select(func.count())
+        .select_from(school_students)
+        .where(
+            school_students.c.school_id == Schools.id,
+            exists().where(reports_table.c.student_id == school_students.c.student_id),
+        )
+        .correlate(Schools)
+        .scalar_subquery()
+    )
+
+    query = select(
+        Schools.id.label("school_id"),
+        count(school_students).label("student_count"),
+        count(school_teachers).label("teacher_count"),
+        count(school_classes).label("class_count"),
+        count(schools_subjects).label("subject_count"),
+        reports_count.label("reports_count"),
+    )
+
+    if school_ids is not None:
+        query = query.where(Schools.id.in_(school_ids))
+
+    return query
+
+
+def _chunks(values) -> list:
+    values = list(values)
+    return [values[i : i + CHUNK_SIZE] for i in range(0, len(values), CHUNK_SIZE)]
+
+
+def _students_with_reports(connection, student_ids) -> set:
+    found = set()
+
+    for chunk in _chunks(student_ids):
+        found.update(
+            connection.scalars(
+                select(reports_table.c.student_id)
+                .where(reports_table.c.student_id.in_(chunk))
+                .distinct()
+            )
+        )
+
+    return found
+
+
+def _affected_rows(connection, statement, multiparams, params, keys):
+    """
+    Returns the values of keys for each row an INSERT or DELETE writes, or
+    None when they cannot be told from the statement
+    """
+    rows = multiparams or [params]
+
+    if isinstance(statement, Insert) and not multiparams and not params:
+        rows = [statement.compile().params]
+
+    if all(all(row.get(key) is not None for key in keys) for row in rows):
+        return [{key: row[key] for key in keys} for row in rows]
+
+    if isinstance(statement, Insert):
+        return None
+
+    # Deletes on other columns are resolved by selecting the matching rows
+    found = []
+    columns = [statement.table.c[key] for key in keys]
+
+    for row in rows:
+        query = select(*columns)
+        if statement.whereclause is not None:
+            query = query.where(statement.whereclause)
+        found.extend(r._asdict() for r in connection.execute(query, row))
+
+    return found
+
+
+def _report_students(connection, statement, multiparams, params) -> set:
+    """
+    Returns the students whose reports a write to the reports table adds,
+    removes or moves
+    """
+    rows = multiparams or [params]
+
+    if not multiparams and not params:
+        rows = [statement.compile().params]
+
+    students = set()
+
+    if isinstance(statement, (Insert, Update)):
+        students.update(row.get("student_id") for row in rows)
+
+    # The current student of the rows which are deleted or moved
+    if isinstance(statement, (Delete, Update)):
+        for row in rows:
+            query = select(reports_table.c.student_id)
+            if statement.whereclause is not None:
+                query = query.where(statement.whereclause)
+            students.update(connection.scalars(query, row))
+
+    students.discard(None)
+
+    return students
+
+
+def _sets_student(statement, rows: list) -> bool:
+    values = statement._values or {}
+
+    return any(getattr(key, "key", key) == "student_id" for key in values) or any(
+        "student_id" in row for row in rows
+    )
+
+
+def _before_execute(connection, statement, multiparams, params, execution_options):
+    if not isinstance(statement, (Insert, Update, Delete)):
+        return
+
+    table = statement.table.name
+
+    if table in COUNTED_TABLES and not isinstance(statement, Update):
+        sign = 1 if isinstance(statement, Insert) else -1
+        member, column = COUNTED_TABLES[table]
+        rows = _affected_rows(
+            connection, statement, multiparams, params, ("school_id", member)
+        )
+
+        if rows is None:
+            pending = None
+        else:
+            pending = defaultdict(Counter)
+            for row in rows:
+                pending[row["school_id"]][column] += sign
+
+            # Students joining or leaving a school carry their reports with them
+            if table == school_students.name:
+                reporting = _students_with_reports(
+                    connection, {row["student_id"] for row in rows}
+                )
+                for row in rows:
+                    if row["student_id"] in reporting:
+                        pending[row["school_id"]]["reports_count"] += sign
+
+    elif table == reports_table.name:
+        # Only updates which move reports to another student count
+        if isinstance(statement, Update) and not _sets_student(
+            statement, multiparams or [params]
+        ):
+            return
+
+        students = _report_students(connection, statement, multiparams, params)
+        pending = (students, _students_with_reports(connection, students))
+
+    else:
+        return
+
+    connection.info.setdefault("school_stats_pending", {})[id(statement)] = pending
+
+
+def _after_execute(connection, statement, multiparams, params, execution_options, result):
+    pending_statements = connection.info.get("school_stats_pending")
+
+    if not pending_statements or id(statement) not in pending_statements:
+        return
+
+    pending = pending_statements.pop(id(statement))
+
+    if pending is None:
+        current_app.logger.warning(
+            "Could not count the rows written to %s, rebuilding all school stats",
+            statement.table.name,
+        )
+        _recompute(connection)
+        return
+
+    if isinstance(pending, tuple):
+        students, had_reports = pending
+
+        # Only students whose first report was added or last one removed count
+        has_reports = _students_with_reports(connection, students)
+
+        pending = defaultdict(Counter)
+        for sign, changed in ((1, has_reports - had_reports), (-1, had_reports - has_reports)):
+            for chunk in _chunks(changed):
+                for school_id in connection.scalars(
+                    select(school_students.c.school_id).where(
+                        school_students.c.student_id.in_(chunk)
+                    )
+                ):
+                    pending[school_id]["reports_count"] += sign
+
+    _apply(connection, pending)
+
+
+def _apply(connection, deltas: dict) -> None:
+    missing = []
+
+    for school_id, counts in deltas.items():
+        values = {
+            column: stats_table.c[column] + delta
+            for column, delta in counts.items()
+            if delta
+        }
+
+        if not values:
+            continue
+
+        result = connection.execute(
+            update(stats_table)
+            .where(stats_table.c.school_id == school_id)
+            .values(values)
+        )
+
+        if result.rowcount == 0:
+            missing.append(school_id)
+
+    # Schools without a stats row yet get one computed from the base tables
+    if missing:
+        _recompute(connection, missing)
+
+
+def _recompute(connection, school_ids=None) -> None:
+    query = delete(stats_table)
+    if school_ids is not None:
+        query = query.where(stats_table.c.school_id.in_(school_ids))
+    connection.execute(query)
+
+    connection.execute(
+        insert(stats_table).from_select(
+            ("school_id",) + STAT_COLUMNS, stats_query(school_ids)
+        )
+    )
+
+
+def _discard_pending(context) -> None:
+    if context.connection is not None:
+        context.connection.info.pop("school_stats_pending", None)
+
+
+@event.listens_for(Schools, "after_insert")
+def _create_school_stats(mapper, connection, target) -> None:
+    connection.execute(insert(stats_table).values(school_id=target.id))
+
+
+@event.listens_for(Schools, "before_delete")
+def _delete_school_stats(mapper, connection, target) -> None:
+    connection.execute(delete(stats_table).where(stats_table.c.school_id == target.id))
+
+
+def init_school_stats(engine) -> None:
+    """
+    Keeps the School Stats table up to date on every INSERT and DELETE on the
+    school association tables, and every write to the reports table, run
+    through engine. The counters are updated in the same transaction as the
+    write
+
+    Parameters
+    ----------
+    engine : Engine
+        Engine of the application
+    """
+    event.listen(engine, "before_execute", _before_execute)
+    event.listen(engine, "after_execute", _after_execute)
+    event.listen(engine, "handle_error", _discard_pending)
+
+
+def get_school_stats(school_id: int) -> dict:
+    """
+    Returns the dashboard counts of a school with a primary key lookup, they
+    are only computed from the base tables when the school has no stats row
+
+    Parameters
+    ----------
+    school_id : int
+        ID of the school
+
+    Returns
+    -------
+    dict
+        The student, teacher, class, subject and reports counts
+    """
+    row = db.session.execute(
+        select(*(stats_table.c[column] for column in STAT_COLUMNS)).where(
+            stats_table.c.school_id == school_id
+        )
+    ).one_or_none()
+
+    if row is None:
+        row = db.session.execute(stats_query([school_id])).one()
+
+    return {column: getattr(row, column) for column in STAT_COLUMNS}
+
+
+def rebuild_school_stats(verify_only: bool = False) -> list:
+    """
+    Compares the School Stats table with a full recompute from the base
+    tables and rewrites the rows which differ
+
+    Parameters
+    ----------
+    verify_only : bool, optional
+        Only report the differences, by default False
+
+    Returns
+    -------
+    list
+        The school_id, expected and actual counts of every row which differed,
+        actual is None for missing rows and expected for orphaned ones
+    """
+    expected = {
+        row.school_id: row._asdict() for row in db.session.execute(stats_query())
+    }
+    actual = {
+        row.school_id: row._asdict() for row in db.session.execute(select(stats_table))
+    }
+
+    mismatches = [
+        {
+            "school_id": school_id,
+            "expected": expected.get(school_id),
+            "actual": actual.get(school_id),
+        }
+        for school_id in sorted(expected.keys() | actual.keys())
+        if expected.get(school_id) != actual.get(school_id)
+    ]
+
+    if mismatches and not verify_only:
+        school_ids = [mismatch["school_id"] for mismatch in mismatches]
+        _recompute(db.session.connection(), school_ids)
+        db.session.commit()
+
+    return mismatches
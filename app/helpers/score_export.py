@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from app import db
+from app.models import Classes, Scores, Subjects, Users, school_classes
+
+# Columns of an exported score, in CSV column order
+EXPORT_COLUMNS = (
+    Scores.id,
+    Scores.score,
+    Scores.term,
+    Scores.session,
+    Scores.type,
+    Scores.class_id,
+    Classes.name.label("class_name"),
+    Scores.subject_id,
+    Subjects.name.label("subject_name"),
+    Scores.student_id,
+    Users.first_name.label("student_first_name"),
+    Users.last_name.label("student_last_name"),
+    Scores.created_at,
+    Scores.updated_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_query(filters: dict):
+    """
+    Builds the query of a score export, joined with the class, subject and
+    student names
+
+    Parameters
+    ----------
+    filters : dict
+        Values of the school_id, class_id, subject_id, student_id, term,
+        session and type filters to apply
+
+    Returns
+    -------
+    Select
+        The query returning EXPORT_COLUMNS
+    """
+    filters = dict(filters)
+    school_id = filters.pop("school_id", None)
+
+    query = (
+        select(*EXPORT_COLUMNS)
+        .join(Classes, Classes.id == Scores.class_id)
+        .join(Subjects, Subjects.id == Scores.subject_id)
+        .join(Users, Users.id == Scores.student_id)
+        .where(*(getattr(Scores, key) == value for key, value in filters.items()))
+        .order_by(Scores.id)
+    )
+
+    if school_id is not None:
+        query = query.where(
+            Scores.class_id.in_(
+                select(school_classes.c.class_id).where(
+                    school_classes.c.school_id == school_id
+                )
+            )
+        )
+
+    return query
+
+
+def _serialize(row) -> dict:
+    values = row._asdict()
+
+    for key in ("created_at", "updated_at"):
+        if values[key] is not None:
+            values[key] = values[key].isoformat()
+
+    return values
+
+
+def export_scores(filters: dict, file_format: str, batch_size: int = 1000):
+    """
+    Generates a score export chunk by chunk. Rows are read from a server side
+    cursor batch_size rows at a time, so memory use does not grow with the
+    size of the export
+
+    Parameters
+    ----------
+    filters : dict
+        Filters of the export, see export_query
+    file_format : str
+        "ndjson" or "csv"
+    batch_size : int, optional
+        Number of rows fetched and written per chunk, by default 1000
+
+    Yields
+    ------
+    str
+        The next chunk of the export
+    """
+    result = db.session.execute(
+        export_query(filters).execution_options(yield_per=batch_size)
+    )
+    buffer = io.StringIO()
+
+    if file_format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+
+    try:
+        for partition in result.partitions():
+            for row in partition:
+                if file_format == "csv":
+                    writer.writerow(_serialize(row))
+                else:
+                    buffer.write(json.dumps(_serialize(row)) + "\n")
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        result.close()
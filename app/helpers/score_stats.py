@@ -0,0 +1,302 @@
+import math
+
+from sqlalchemy import delete, func, insert, select, tuple_
+
+from app import db
+from app.models import Scores, ScoreStats
+
+# Scores are summarized per class, subject, term, session and type
+STATS_KEY = ("class_id", "subject_id", "term", "session", "type")
+
+# Number of keys looked up per query
+CHUNK_SIZE = 500
+
+# Relative difference tolerated between the running statistics and a recompute
+TOLERANCE = 1e-6
+
+
+def stats_key(score) -> tuple:
+    """
+    Returns the key of the statistics a score counts towards
+
+    Parameters
+    ----------
+    score : Scores | dict
+        The score, as a model instance or a dictionary of its columns
+
+    Returns
+    -------
+    tuple
+        The STATS_KEY values of the score
+    """
+    if isinstance(score, dict):
+        return tuple(score[column] for column in STATS_KEY)
+
+    return tuple(getattr(score, column) for column in STATS_KEY)
+
+
+def welford_add(count: int, mean: float, m2: float, x: float) -> tuple:
+    """
+    Adds a value to running statistics with Welford's algorithm
+
+    Parameters
+    ----------
+    count : int
+        Number of values
+    mean : float
+        Mean of the values
+    m2 : float
+        Sum of the squared differences to the mean
+    x : float
+        The value to add
+
+    Returns
+    -------
+    tuple
+        The new count, mean and m2
+    """
+    count += 1
+    delta = x - mean
+    mean += delta / count
+
+    return count, mean, m2 + delta * (x - mean)
+
+
+def welford_remove(count: int, mean: float, m2: float, x: float) -> tuple:
+    """
+    Removes a value from running statistics, reversing welford_add
+
+    Parameters
+    ----------
+    count : int
+        Number of values
+    mean : float
+        Mean of the values
+    m2 : float
+        Sum of the squared differences to the mean
+    x : float
+        The value to remove, it has to be one of the values
+
+    Returns
+    -------
+    tuple
+        The new count, mean and m2
+    """
+    if count <= 1:
+        return 0, 0.0, 0.0
+
+    count -= 1
+    delta = x - mean
+    mean -= delta / count
+
+    return count, mean, max(m2 - delta * (x - mean), 0.0)
+
+
+def _key_columns(model) -> tuple:
+    return tuple(getattr(model, column) for column in STATS_KEY)
+
+
+def _chunks(values) -> list:
+    values = list(values)
+    return [values[i : i + CHUNK_SIZE] for i in range(0, len(values), CHUNK_SIZE)]
+
+
+def recompute_query(keys=None):
+    """
+    Builds the query computing the statistics of the Scores table from
+    scratch
+
+    Parameters
+    ----------
+    keys : list, optional
+        Only compute these keys, by default all of them
+
+    Returns
+    -------
+    Select
+        A query returning the STATS_KEY columns, count, mean, m2, min and max
+    """
+    count = func.count(Scores.score)
+    mean = func.avg(Scores.score)
+    query = select(
+        *_key_columns(Scores),
+        count.label("count"),
+        mean.label("mean"),
+        (func.sum(Scores.score * Scores.score) - count * mean * mean).label("m2"),
+        func.min(Scores.score).label("min"),
+        func.max(Scores.score).label("max"),
+    ).group_by(*_key_columns(Scores))
+
+    if keys is not None:
+        query = query.where(tuple_(*_key_columns(Scores)).in_(keys))
+
+    return query
+
+
+def _replace(keys: list) -> None:
+    """
+    Replaces the statistics of keys with a recompute from the Scores table
+    """
+    for chunk in _chunks(keys):
+        db.session.execute(
+            delete(ScoreStats).where(tuple_(*_key_columns(ScoreStats)).in_(chunk))
+        )
+        rows = [row._asdict() for row in db.session.execute(recompute_query(chunk))]
+
+        if rows:
+            for row in rows:
+                row["m2"] = max(float(row["m2"]), 0.0)
+            db.session.execute(insert(ScoreStats), rows)
+
+
+def apply_score_changes(added: list, removed: list) -> None:
+    """
+    Updates the running statistics after scores were written, in the same
+    transaction. Call it once the writes are flushed, before committing
+
+    Parameters
+    ----------
+    added : list
+        (stats key, score) pairs of the scores created, or updated to a new value
+    removed : list
+        (stats key, score) pairs of the scores deleted, or updated from an old value
+    """
+    keys = {key for key, _ in added + removed}
+
+    if not keys:
+        return
+
+    stats = {}
+    for chunk in _chunks(keys):
+        for row in ScoreStats.query.filter(
+            tuple_(*_key_columns(ScoreStats)).in_(chunk)
+        ).with_for_update():
+            stats[stats_key(row)] = row
+
+    # Rows out of sync with the scores and extremes which were removed are
+    # recomputed from the Scores table
+    recompute = {key for key, _ in removed if key not in stats}
+    extremes = set()
+
+    for key, x in removed:
+        if key in recompute:
+            continue
+
+        row = stats[key]
+        row.count, row.mean, row.m2 = welford_remove(row.count, row.mean, row.m2, x)
+
+        if x <= row.min or x >= row.max:
+            extremes.add(key)
+
+    for key, x in added:
+        if key in recompute:
+            continue
+
+        if key not in stats:
+            stats[key] = ScoreStats(
+                **dict(zip(STATS_KEY, key)), count=0, mean=0.0, m2=0.0, min=x, max=x
+            )
+            db.session.add(stats[key])
+
+        row = stats[key]
+        row.count, row.mean, row.m2 = welford_add(row.count, row.mean, row.m2, x)
+        row.min = x if row.min is None else min(row.min, x)
+        row.max = x if row.max is None else max(row.max, x)
+
+    for chunk in _chunks(extremes - recompute):
+        for row in db.session.execute(
+            select(
+                *_key_columns(Scores),
+                func.min(Scores.score).label("min"),
+                func.max(Scores.score).label("max"),
+            )
+            .where(tuple_(*_key_columns(Scores)).in_(chunk))
+            .group_by(*_key_columns(Scores))
+        ):
+            stats[tuple(row[: len(STATS_KEY)])].min = row.min
+            stats[tuple(row[: len(STATS_KEY)])].max = row.max
+
+    for row in stats.values():
+        if row.count == 0:
+            db.session.delete(row)
+
+    if recompute:
+        db.session.flush()
+        _replace(list(recompute))
+
+
+def stats_summary(row: ScoreStats) -> dict:
+    """
+    Returns the statistics of a Score Stats row
+
+    Parameters
+    ----------
+    row : ScoreStats
+        The row
+
+    Returns
+    -------
+    dict
+        The type, count, mean, population standard deviation, min and max
+    """
+    return {
+        "type": row.type,
+        "count": row.count,
+        "mean": row.mean,
+        "std": math.sqrt(row.m2 / row.count) if row.count else 0.0,
+        "min": row.min,
+        "max": row.max,
+    }
+
+
+def check_score_stats(fix: bool = False) -> list:
+    """
+    Compares the Score Stats table with a full recompute from the Scores table
+
+    Parameters
+    ----------
+    fix : bool, optional
+        Replace the rows which differ with the recomputed ones, by default False
+
+    Returns
+    -------
+    list
+        The key, expected and actual statistics of every row which differed,
+        None standing for a missing row
+    """
+    columns = ("count", "mean", "m2", "min", "max")
+    expected = {
+        tuple(row[: len(STATS_KEY)]): row._asdict()
+        for row in db.session.execute(recompute_query())
+    }
+    actual = {stats_key(row): row for row in ScoreStats.query}
+
+    def matches(key) -> bool:
+        if key not in expected or key not in actual:
+            return False
+
+        return all(
+            math.isclose(
+                float(expected[key][column]),
+                float(getattr(actual[key], column)),
+                rel_tol=TOLERANCE,
+                abs_tol=TOLERANCE,
+            )
+            for column in columns
+        )
+
+    mismatches = [
+        {
+            "key": dict(zip(STATS_KEY, key)),
+            "expected": {c: expected[key][c] for c in columns} if key in expected else None,
+            "actual": {c: getattr(actual[key], c) for c in columns} if key in actual else None,
+        }
+        for key in sorted(expected.keys() | actual.keys())
+        if not matches(key)
+    ]
+
+    if mismatches and fix:
+        _replace([stats_key(mismatch["key"]) for mismatch in mismatches])
+        db.session.commit()
+
+    return mismatches
@@ -19,7 +19,7 @@ def _set_task_progress(progress: int) -> None:
         job.save_meta()
 
         if progress >= 100:
-            task = Tasks.query.filter(task_id=job.get_id()).first()
+            task = Tasks.query.filter_by(task_id=job.get_id()).first()
             task.complete = True
 
         db.session.commit()
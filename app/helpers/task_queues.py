@@ -0,0 +1,180 @@
+import random
+from datetime import timedelta
+
+import rq
+from flask import current_app
+from redis import Redis
+from rq.job import Job
+
+# Queues from the most to the least urgent
+QUEUES = ("high", "default", "bulk")
+
+# Every background task of app.tasks.long_running_jobs with the queue it runs
+# on, its timeout in seconds and how often it is retried when it fails. Only
+# idempotent tasks are retried
+TASKS = {
+    "remove_old_jwts": {"queue": "high", "timeout": 300, "retry": None},
+    "count_seconds": {"queue": "default", "timeout": 600, "retry": None},
+    "import_users": {"queue": "default", "timeout": 3600, "retry": None},
+    "generate_reports": {
+        "queue": "bulk",
+        "timeout": 1800,
+        "retry": {"max": 2, "interval": [30, 120]},
+    },
+}
+
+
+def init_task_queues(connection: Redis) -> dict:
+    """
+    Helper function to build the task queues of the app
+
+    Parameters
+    ----------
+    connection : Redis
+        The redis connection the queues use
+
+    Returns
+    -------
+    dict
+        The rq Queue objects by name
+    """
+    return {name: rq.Queue(name, connection=connection) for name in QUEUES}
+
+
+def enqueue_task(name: str, delay: timedelta | None = None, **kwargs) -> Job:
+    """
+    Enqueues a registered task on its queue with its timeout and retry policy.
+    Keyword arguments such as job_timeout override the registered values
+
+    Parameters
+    ----------
+    name : str
+        Name of the task in TASKS
+    delay : timedelta | None, optional
+        Delay before the task runs, which needs a worker with a scheduler, by
+        default the task runs as soon as a worker is free
+
+    Returns
+    -------
+    Job
+        The enqueued rq job
+
+    Raises
+    ------
+    ValueError
+        If the task is not registered
+    """
+    try:
+        task = TASKS[name]
+    except KeyError:
+        raise ValueError("Unknown background task: {}".format(name))
+
+    kwargs.setdefault("job_timeout", task["timeout"])
+
+    if task["retry"] is not None:
+        kwargs.setdefault("retry", rq.Retry(**task["retry"]))
+
+    queue = current_app.task_queues[task["queue"]]
+    func = "app.tasks.long_running_jobs.{}".format(name)
+
+    if delay is not None:
+        return queue.enqueue_in(delay, func, **kwargs)
+
+    return queue.enqueue(func, **kwargs)
+
+
+def is_task_scheduled(name: str) -> bool:
+    """
+    Checks if a registered task is waiting in the scheduled registry of its
+    queue, recurring tasks use it so they never run as two chains
+
+    Parameters
+    ----------
+    name : str
+        Name of the task in TASKS
+
+    Returns
+    -------
+    bool
+        Returns True if a run of the task is scheduled
+    """
+    queue = current_app.task_queues[TASKS[name]["queue"]]
+    func = "app.tasks.long_running_jobs.{}".format(name)
+    jobs = Job.fetch_many(
+        queue.scheduled_job_registry.get_job_ids(), connection=queue.connection
+    )
+
+    return any(job is not None and job.func_name == func for job in jobs)
+
+
+def parse_queue_weights(value: str) -> dict:
+    """
+    Parses queue weights written as "high=6,default=3,bulk=1". A queue listed
+    without a weight gets a weight of 1
+
+    Parameters
+    ----------
+    value : str
+        The queue weights
+
+    Returns
+    -------
+    dict
+        The weight of each queue by name, in the order they were given
+
+    Raises
+    ------
+    ValueError
+        If a queue is unknown or a weight is not a positive integer
+    """
+    weights = {}
+
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+
+        if name not in QUEUES:
+            raise ValueError("Unknown task queue: {}".format(name))
+
+        try:
+            weights[name] = int(weight or 1)
+        except ValueError:
+            raise ValueError("Invalid weight for the {} queue: {}".format(name, weight))
+
+        if weights[name] < 1:
+            raise ValueError("Invalid weight for the {} queue: {}".format(name, weight))
+
+    return weights
+
+
+class WeightedWorker(rq.Worker):
+    """
+    Worker which, after each job, orders its queues at random with each queue
+    coming first in proportion to its weight. Busy high queues get most of the
+    worker while bulk jobs still make progress instead of starving
+
+    """
+
+    def __init__(self, queues, *args, weights: dict | None = None, **kwargs):
+        super().__init__(queues, *args, **kwargs)
+        self.weights = weights or {}
+        self._ordered_queues = self.weighted_order()
+
+    def weighted_order(self) -> list:
+        """
+        Draws an order of the queues of the worker, a queue with twice the
+        weight of another comes first twice as often
+
+        Returns
+        -------
+        list
+            The rq Queue objects of the worker
+        """
+        # Sorting on u ** (1 / weight) is a weighted draw without replacement
+        return sorted(
+            self.queues,
+            key=lambda queue: random.random() ** (1 / self.weights.get(queue.name, 1)),
+            reverse=True,
+        )
+
+    def reorder_queues(self, reference_queue):
+        self._ordered_queues = self.weighted_order()
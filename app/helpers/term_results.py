@@ -0,0 +1,197 @@
+import statistics
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from app import db
+from app.models import Scores, Subjects, Users
+
+
+def rank(values: list) -> list:
+    """
+    Ranks values from the highest, equal values share the same position and
+    the next position is skipped ("1224" ranking)
+
+    Parameters
+    ----------
+    values : list
+        The values to rank
+
+    Returns
+    -------
+    list
+        The position of each value, in the order of values
+    """
+    order = sorted(range(len(values)), key=lambda i: values[i], reverse=True)
+    positions = [0] * len(values)
+
+    for place, i in enumerate(order):
+        if place and values[i] == values[order[place - 1]]:
+            positions[i] = positions[order[place - 1]]
+        else:
+            positions[i] = place + 1
+
+    return positions
+
+
+def score_weight(weights: dict):
+    """
+    Builds the SQL expression of the weight of a score from its type
+
+    Parameters
+    ----------
+    weights : dict
+        Weight of each score type, types without a weight count 0
+
+    Returns
+    -------
+    Case
+        The weight expression
+    """
+    return case(
+        *((Scores.type == score_type, w) for score_type, w in weights.items()),
+        else_=0,
+    )
+
+
+def weighted_totals_query(class_id: int, term: str, session: str, weights: dict):
+    """
+    Builds the query summing the weighted scores of every student in every
+    subject of a class for a term
+
+    Parameters
+    ----------
+    class_id : int
+        ID of the class
+    term : str
+        The term
+    session : str
+        The session
+    weights : dict
+        Weight of each score type, types without a weight count 0
+
+    Returns
+    -------
+    Select
+        A query returning one row per student and subject
+    """
+    weight = score_weight(weights)
+
+    # Scores are summed before the names are joined, grouping in the order of
+    # the gradebook unique index so no temporary sort is needed
+    totals = (
+        select(
+            Scores.subject_id,
+            Scores.student_id,
+            func.sum(Scores.score * weight).label("total"),
+        )
+        .where(
+            Scores.class_id == class_id,
+            Scores.term == term,
+            Scores.session == session,
+        )
+        .group_by(Scores.subject_id, Scores.student_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            totals.c.student_id,
+            Users.first_name,
+            Users.last_name,
+            totals.c.subject_id,
+            Subjects.name.label("subject_name"),
+            totals.c.total,
+        )
+        .join(Users, Users.id == totals.c.student_id)
+        .join(Subjects, Subjects.id == totals.c.subject_id)
+    )
+
+
+def compute_term_results(class_id: int, term: str, session: str) -> dict:
+    """
+    Computes the results of a class for a term from a single query: the
+    weighted total of every student in every subject, their overall total,
+    average and class position, and the statistics of every subject
+
+    Parameters
+    ----------
+    class_id : int
+        ID of the class
+    term : str
+        The term
+    session : str
+        The session
+
+    Returns
+    -------
+    dict
+        The "students" ordered by position and the "subjects" statistics
+    """
+    weights = current_app.config["SCORE_TYPE_WEIGHTS"]
+    precision = current_app.config["TERM_RESULTS_PRECISION"]
+    rows = db.session.execute(
+        weighted_totals_query(class_id, term, session, weights)
+    ).all()
+
+    students = {}
+    subjects = {}
+
+    for student_id, first_name, last_name, subject_id, subject_name, total in rows:
+        total = round(float(total), precision)
+
+        if student_id not in students:
+            students[student_id] = {
+                "student_id": student_id,
+                "first_name": first_name,
+                "last_name": last_name,
+                "subjects": {},
+            }
+
+        if subject_id not in subjects:
+            subjects[subject_id] = {
+                "subject_id": subject_id,
+                "name": subject_name,
+                "totals": {},
+            }
+
+        students[student_id]["subjects"][subject_id] = {"total": total}
+        subjects[subject_id]["totals"][student_id] = total
+
+    # Positions and statistics per subject
+    for subject in subjects.values():
+        student_ids = list(subject["totals"])
+        totals = [subject["totals"][i] for i in student_ids]
+
+        for student_id, position in zip(student_ids, rank(totals)):
+            students[student_id]["subjects"][subject["subject_id"]]["position"] = position
+
+        subject.update(
+            count=len(totals),
+            mean=round(statistics.fmean(totals), precision),
+            std=round(statistics.pstdev(totals), precision),
+            min=min(totals),
+            max=max(totals),
+        )
+        del subject["totals"]
+
+    # Overall totals, averages and class positions
+    results = list(students.values())
+
+    for student in results:
+        totals = [s["total"] for s in student["subjects"].values()]
+        student["total"] = round(sum(totals), precision)
+        student["average"] = round(student["total"] / len(totals), precision)
+
+    for student, position in zip(results, rank([s["average"] for s in results])):
+        student["position"] = position
+
+    results.sort(key=lambda s: (s["position"], s["student_id"]))
+
+    return {
+        "class_id": class_id,
+        "term": term,
+        "session": session,
+        "students": results,
+        "subjects": sorted(subjects.values(), key=lambda s: s["subject_id"]),
+    }
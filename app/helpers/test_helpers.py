@@ -31,3 +31,46 @@ def register_and_login_test_user(c) -> str:
     setup_access_token = setup_resp_json["access_token"]
 
     return setup_access_token
+
+
+def register_and_login_user(
+    c, email: str = "tim@test.com", role: str = "admin", phone: str = "0800000000"
+) -> dict:
+    """
+    Helper function that registers a user with the current user fields and
+    logs them in
+
+    Parameters
+    ----------
+    c : object
+        Test client object
+    email : str, optional
+        Email of the user, by default "tim@test.com"
+    role : str, optional
+        Role of the user, by default "admin"
+    phone : str, optional
+        Phone number of the user, by default "0800000000"
+
+    Returns
+    -------
+    dict
+        The access and refresh JWTs returned by the login endpoint
+    """
+    c.post(
+        "/api/auth/register",
+        json={
+            "password": "secret",
+            "first_name": "tim",
+            "last_name": "apple",
+            "email": email,
+            "phone": phone,
+            "role": role,
+            "birthday": "1990-01-01",
+        },
+    )
+
+    setup_resp = c.post(
+        "/api/auth/login", json={"email": email, "password": "secret"}
+    )
+
+    return setup_resp.get_json()
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from dateutil.relativedelta import relativedelta
+from flask import current_app
+
+from app import db
+from app.models import RevokedTokenModel
+
+
+def remove_revoked_tokens(
+    retention_days: int, batch_size: int = 1000, dry_run: bool = False
+) -> int:
+    """
+    Deletes the Revoked Token rows older than the retention period in chunks
+    of batch_size rows, committing after every chunk so no long transaction
+    is held and no rows are loaded as ORM objects
+
+    Parameters
+    ----------
+    retention_days : int
+        Number of days revoked tokens are kept
+    batch_size : int, optional
+        Number of rows deleted per statement, by default 1000
+    dry_run : bool, optional
+        Only count the rows which would be deleted, by default False
+
+    Returns
+    -------
+    int
+        The number of rows deleted, or that would be deleted on a dry run
+
+    Raises
+    ------
+    ValueError
+        If the retention period is shorter than the lifetime of refresh tokens
+    """
+    if timedelta(days=retention_days) < current_app.config["JWT_REFRESH_TOKEN_EXPIRES"]:
+        raise ValueError(
+            "Revoked tokens have to be kept as long as refresh tokens are valid"
+        )
+
+    cutoff = datetime.utcnow() - relativedelta(days=retention_days)
+    expired = RevokedTokenModel.date_revoked < cutoff
+
+    if dry_run:
+        return db.session.scalar(
+            db.select(db.func.count(RevokedTokenModel.id)).where(expired)
+        )
+
+    removed = 0
+
+    while True:
+        ids = db.session.scalars(
+            db.select(RevokedTokenModel.id)
+            .where(expired)
+            .order_by(RevokedTokenModel.id)
+            .limit(batch_size)
+        ).all()
+
+        if not ids:
+            break
+
+        db.session.execute(
+            db.delete(RevokedTokenModel)
+            .where(RevokedTokenModel.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        removed += len(ids)
+
+    return removed
@@ -0,0 +1,195 @@
+import csv
+import json
+from itertools import islice
+
+from flask import current_app
+from marshmallow import ValidationError
+from rq import get_current_job
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.helpers.task_helpers import _set_task_progress
+from app.models import Users
+from app.schemas import UsersImportSchema
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Roles which can import users, they can not create users above their own role
+IMPORTER_ROLES = ("super_admin", "admin")
+ROLE_RANKS = {"super_admin": 2, "admin": 1}
+
+import_schema = UsersImportSchema()
+
+
+def _read_rows(f, file_format: str):
+    """
+    Lazily yields the rows of an upload as (row number, dict or error) tuples
+    """
+    if file_format == "csv":
+        for number, row in enumerate(csv.DictReader(f), start=1):
+            # Empty CSV cells count as missing fields
+            yield number, {k: v for k, v in row.items() if k and v not in ("", None)}
+
+    else:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, ValidationError("Not valid JSON")
+                continue
+
+            if not isinstance(row, dict):
+                yield number, ValidationError("Not a JSON object")
+                continue
+
+            yield number, row
+
+
+def _count_rows(path: str, file_format: str) -> int:
+    with open(path, newline="") as f:
+        count = sum(1 for line in f if line.strip())
+
+    # Leave out the CSV header
+    return max(0, count - 1) if file_format == "csv" else count
+
+
+def _import_chunk(chunk: list, seen: set, report: dict, importer_role: str) -> None:
+    """
+    Validates a chunk of rows and inserts the valid ones in one transaction
+    """
+    errors = {}
+    valid = []
+    max_rank = ROLE_RANKS.get(importer_role, 0)
+
+    for number, row in chunk:
+        if isinstance(row, ValidationError):
+            errors[number] = row.messages
+            continue
+
+        try:
+            result = import_schema.load(row)
+        except ValidationError as e:
+            errors[number] = e.messages
+            continue
+
+        role = result["role"].value
+        if ROLE_RANKS.get(role, 0) > max_rank:
+            errors[number] = {"role": ["Not allowed to create {} users".format(role)]}
+        else:
+            valid.append((number, result))
+
+    # Look up the emails and phones of the whole chunk in a single query each
+    emails = {result["email"] for _, result in valid}
+    phones = {result["phone"] for _, result in valid}
+    taken = set(
+        db.session.scalars(db.select(Users.email).where(Users.email.in_(emails)))
+    ) | set(db.session.scalars(db.select(Users.phone).where(Users.phone.in_(phones))))
+
+    rows = []
+    for number, result in valid:
+        if result["email"] in taken or ("email", result["email"]) in seen:
+            errors[number] = {"email": ["Email already in use"]}
+        elif result["phone"] in taken or ("phone", result["phone"]) in seen:
+            errors[number] = {"phone": ["Phone already in use"]}
+        else:
+            seen.add(("email", result["email"]))
+            seen.add(("phone", result["phone"]))
+            rows.append((number, result))
+
+    if rows:
+        hashes = current_app.password_hasher.generate_many(
+            [result["password"] for _, result in rows]
+        )
+
+        try:
+            db.session.execute(
+                db.insert(Users),
+                [
+                    {
+                        "first_name": result["first_name"],
+                        "last_name": result["last_name"],
+                        "email": result["email"],
+                        "phone": result["phone"],
+                        "birthday": result["birthday"],
+                        "role": result["role"].value,
+                        "password_hash": password_hash,
+                    }
+                    for (_, result), password_hash in zip(rows, hashes)
+                ],
+            )
+            db.session.commit()
+
+        # A user registered since the lookup took one of the emails or phones,
+        # the whole chunk is left out
+        except IntegrityError:
+            db.session.rollback()
+
+            for number, _ in rows:
+                errors[number] = {"_schema": ["Email or phone already in use"]}
+
+            rows = []
+
+    report["imported"] += len(rows)
+    report["failed"] += len(errors)
+
+    for number in sorted(errors):
+        if len(report["errors"]) < current_app.config["USER_IMPORT_MAX_ERRORS"]:
+            report["errors"].append({"row": number, "errors": errors[number]})
+
+
+def import_users_from_file(path: str, file_format: str, importer_role: str) -> dict:
+    """
+    Imports the users of a CSV or NDJSON file. The file is streamed and
+    processed in chunks of USER_IMPORT_CHUNK_SIZE rows, every chunk is
+    validated in one pass, its passwords are hashed in parallel and the
+    valid rows are inserted with a single executemany.
+
+    Every chunk is committed on its own, so an import which stops half way
+    keeps the chunks before. The running report is kept in the job meta
+    under "report" so it shows what was imported
+
+    Parameters
+    ----------
+    path : str
+        Path of the uploaded file
+    file_format : str
+        Either "csv" or "ndjson"
+    importer_role : str
+        Role of the user importing, rows with a higher role are rejected
+
+    Returns
+    -------
+    dict
+        A report with the number of imported and failed rows and the errors
+        per row number
+    """
+    chunk_size = current_app.config["USER_IMPORT_CHUNK_SIZE"]
+    total = _count_rows(path, file_format)
+    report = {"total": total, "imported": 0, "failed": 0, "errors": []}
+    seen = set()
+    job = get_current_job()
+
+    _set_task_progress(0)
+
+    with open(path, newline="") as f:
+        rows = _read_rows(f, file_format)
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            _import_chunk(chunk, seen, report, importer_role)
+
+            if job:
+                job.meta["report"] = report
+                job.save_meta()
+
+            done = report["imported"] + report["failed"]
+            if done < total:
+                _set_task_progress(100 * done // total)
+
+    return report
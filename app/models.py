@@ -1,7 +1,7 @@
 from app import db, jwt
+from app.helpers.task_queues import enqueue_task
 from flask import current_app
 from sqlalchemy.orm import relationship
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import redis
 import rq
@@ -10,7 +10,8 @@ import rq
 def user_loader_callback(jwt_header: dict, jwt_data: dict) -> object:
     """
     HUser loader function which uses the JWT identity to retrieve a user object.
-    Method is called on protected routes
+    Method is called on protected routes, the user is served from the identity
+    cache when possible
 
     Parameters
     ----------
@@ -22,16 +23,16 @@ def user_loader_callback(jwt_header: dict, jwt_data: dict) -> object:
     Returns
     -------
     object
-        Returns a users object containing the user information
+        Returns a users object containing the user information, or None when
+        the token was issued before the user's token version was bumped
     """
-    return Users.query.filter_by(id=jwt_data["sub"]).first()
+    user = current_app.identity_cache.get(jwt_data["sub"])
 
+    if user is None or jwt_data.get("ver", 0) != user.token_version:
+        return None
+
+    return user
 
-student_reports = db.Table(
-    "student_reports",
-    db.Column("user_id", db.Integer, db.ForeignKey("users.id")),
-    db.Column("report_id", db.Integer, db.ForeignKey("reports.id")),
-)
 
 users_subjects = db.Table(
     "users_subjects",
@@ -78,6 +79,11 @@ students_classes = db.Table(
 
 # defines the Users database table
 class Users(db.Model):
+    __table_args__ = (
+        db.Index("ix_users_created_at_id", "created_at", "id"),
+        db.Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
@@ -86,11 +92,12 @@ class Users(db.Model):
     password_hash = db.Column(db.String(128), unique=False, nullable=False)
     role = db.Column(db.Enum('super_admin', 'admin', 'student', 'teacher', 'parent', 'others'), nullable=False, default="others")
     birthday = db.Column(db.DateTime, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     schools = relationship("Schools", back_populates="owner", lazy=True, cascade="all, delete")
-    reports = relationship("Reports", back_populates="students", secondary=student_reports, cascade="all, delete")
+    reports = relationship("Reports", back_populates="student", foreign_keys="Reports.student_id", cascade="all, delete")
     subjects = relationship("Subjects", back_populates="students", secondary=users_subjects, cascade="all, delete")
     scores = relationship("Scores", back_populates="students", lazy=True)
     school = relationship("Schools", back_populates="students", secondary=school_students, lazy=True, cascade="all, delete")
@@ -100,14 +107,15 @@ class Users(db.Model):
 
     def set_password(self, password: str):
         """
-        Helper function to generate the password hash of a user
+        Helper function to generate the password hash of a user. The hash is
+        computed on the app password hashing pool
 
         Parameters
         ----------
         password : str
             The password provided by the user when registering
         """
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = current_app.password_hasher.generate(password)
 
     def check_password(self, password: str) -> bool:
         """
@@ -124,11 +132,30 @@ class Users(db.Model):
         bool
             Returns True if the password is a match. If not False is returned
         """
-        return check_password_hash(self.password_hash, password)
+        return current_app.password_hasher.check(self.password_hash, password)
+
+    def token_claims(self) -> dict:
+        """
+        Helper function returning the additional claims embedded in the user's JWTs
+
+        Returns
+        -------
+        dict
+            A dictionary containing the current token version of the user
+        """
+        return {"ver": self.token_version}
+
+    def revoke_all_tokens(self):
+        """
+        Helper function to invalidate every JWT issued to the user so far by
+        bumping the token version
+        """
+        self.token_version = Users.token_version + 1
     
     def launch_task(self, name: str, description: str, **kwargs) -> object:
         """
-        Helper function to launch a background task
+        Helper function to launch a background task on the queue it is
+        registered with, see app.helpers.task_queues.TASKS
 
         Parameters
         ----------
@@ -142,9 +169,7 @@ class Users(db.Model):
         object
             A Tasks object containing the task information
         """
-        rq_job = current_app.task_queue.enqueue(
-            "app.tasks.long_running_jobs" + name, **kwargs
-        )
+        rq_job = enqueue_task(name, **kwargs)
         task = Tasks(
             task_id=rq_job.get_id(), 
             name=name, 
@@ -196,6 +221,8 @@ class Users(db.Model):
 
 # defines the Schools database table
 class Schools(db.Model):
+    __table_args__ = (db.Index("ix_schools_created_at_id", "created_at", "id"),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(100), nullable=False)
@@ -207,7 +234,7 @@ class Schools(db.Model):
     city = db.Column(db.String(100), nullable=False, default="Lagos")
     state = db.Column(db.String(100), nullable=False, default="Lagos")
     country = db.Column(db.String(100), default="Nigeria")
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     owner_id = db.Column(db.Integer, db.ForeignKey("users.id"))
@@ -218,13 +245,28 @@ class Schools(db.Model):
     subjects = relationship("Subjects", back_populates="schools", secondary=schools_subjects, lazy=True, cascade="all, delete")
     classes = relationship("Classes", back_populates="schools", secondary=school_classes, lazy=True, cascade="all, delete")
 
+
+# defines the School Stats database table, the dashboard counts of each school
+# kept up to date on every write to the school association tables
+class SchoolStats(db.Model):
+    __tablename__ = "school_stats"
+
+    school_id = db.Column(db.Integer, db.ForeignKey("schools.id", ondelete="CASCADE"), primary_key=True)
+    student_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    teacher_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    class_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    subject_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    reports_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     
 # defines the Students database table
 class Classes(db.Model):
+    __table_args__ = (db.Index("ix_classes_created_at_id", "created_at", "id"),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.String(250), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     subjects = relationship("Subjects", back_populates="classes", secondary=class_subjects, lazy=True, cascade="all, delete")
@@ -235,10 +277,12 @@ class Classes(db.Model):
 
 # defines the Subjects database table
 class Subjects(db.Model):
+    __table_args__ = (db.Index("ix_subjects_created_at_id", "created_at", "id"),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.String(250), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
         
     classes = relationship("Classes", back_populates="subjects", secondary=class_subjects, lazy=True, cascade="all, delete")
@@ -249,43 +293,91 @@ class Subjects(db.Model):
 
 # defines the Scores database table
 class Scores(db.Model):
+    __table_args__ = (
+        db.Index("ix_scores_created_at_id", "created_at", "id"),
+        # Filtered score listings, ending with the keyset pagination columns
+        # so pages are read in index order
+        db.Index(
+            "ix_scores_class_subject_term_session",
+            "class_id", "subject_id", "term", "session", "created_at", "id",
+        ),
+        db.Index("ix_scores_student_session", "student_id", "session", "created_at", "id"),
+        # A student gets one score of each type per subject, term and session
+        db.UniqueConstraint(
+            "class_id", "subject_id", "student_id", "term", "session", "type",
+            name="uq_scores_gradebook",
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     score = db.Column(db.Integer, nullable=False)
     term = db.Column(db.Enum('first', 'second', 'third'), nullable=False)
     session = db.Column(db.String(100), nullable=False)
     type = db.Column(db.Enum('CA', 'exam', 'test', 'assignment', 'project', 'others'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    class_id = db.Column(db.Integer, db.ForeignKey("classes.id"), primary_key=True)
-    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    class_id = db.Column(db.Integer, db.ForeignKey("classes.id"), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     
     classes = relationship("Classes", back_populates="scores", lazy=True)
     subjects = relationship("Subjects", back_populates="scores", lazy=True)
     students = relationship("Users", back_populates="scores", lazy=True)
     
     
+# defines the Score Stats database table, running statistics of the scores of
+# each type per class, subject, term and session
+class ScoreStats(db.Model):
+    __tablename__ = "score_stats"
+
+    class_id = db.Column(db.Integer, db.ForeignKey("classes.id"), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), primary_key=True)
+    term = db.Column(db.Enum('first', 'second', 'third'), primary_key=True)
+    session = db.Column(db.String(100), primary_key=True)
+    type = db.Column(db.Enum('CA', 'exam', 'test', 'assignment', 'project', 'others'), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=False, default=0)
+    m2 = db.Column(db.Float, nullable=False, default=0)
+    min = db.Column(db.Integer)
+    max = db.Column(db.Integer)
+
+
 class Reports(db.Model):
+    __table_args__ = (
+        db.Index("ix_reports_created_at_id", "created_at", "id"),
+        # Listings scoped to a student or to the generating user, see
+        # app.helpers.report_scope
+        db.Index(
+            "ix_reports_student_term_session",
+            "student_id", "term", "session", "created_at", "id",
+        ),
+        db.Index(
+            "ix_reports_generator_term_session",
+            "generator_id", "term", "session", "created_at", "id",
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    url = db.Column(db.String(150), nullable=False)
+    # Path of the report card in the report store, set by the generator
+    url = db.Column(db.String(150), nullable=True)
     term = db.Column(db.Enum('first', 'second', 'third'), nullable=False)
     session = db.Column(db.Integer, nullable=False)
     comment = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     student_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     generator_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     
-    students = relationship("Users", back_populates="reports", lazy=True, secondary=student_reports, cascade="all, delete")
+    student = relationship("Users", back_populates="reports", foreign_keys=[student_id], lazy=True)
     # generator = relationship("Users", lazy=True, cascade="all, delete")
     
 
 class RevokedTokenModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    jti = db.Column(db.String(120))
-    date_revoked = db.Column(db.DateTime, default=datetime.utcnow)
+    jti = db.Column(db.String(120), index=True)
+    date_revoked = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     def add(self):
         """
@@ -321,6 +413,8 @@ class Tasks(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     complete = db.Column(db.Boolean, default=False)
 
+    user = relationship("Users", lazy=True)
+
     def get_rq_job(self):
         try:
             rq_job = rq.job.Job.fetch(self.task_id, connection=current_app.redis)
@@ -1,20 +1,42 @@
+import os
+
 from app import db
 from app.reports import bp
-from app.errors.handlers import bad_request
-from app.models import Reports
-from app.schemas  import ReportsSchema
-from flask import Response, jsonify, request
-from flask_jwt_extended import jwt_required
+from app.errors.handlers import bad_request, error_response
+from app.helpers.fieldsets import FieldsetError, fieldset_schema, load_only_fields
+from app.helpers.pagination import PaginationError, page_response, paginate
+from app.helpers.report_scope import report_scope, report_write_scope, staff_schools
+from app.helpers.report_cards import (
+    artifact_etag,
+    cache_stats,
+    launch_report_batch,
+    pdf_available,
+    report_batch_status,
+)
+from app.models import Classes, Reports, Schools, school_classes
+from app.schemas  import (
+    ReportsFilterSchema,
+    ReportsGenerateSchema,
+    ReportsSchema,
+    ReportsUpdateSchema,
+)
+from flask import Response, current_app, jsonify, request
+from flask_jwt_extended import current_user, jwt_required
 from marshmallow import ValidationError
+from redis.exceptions import RedisError
 
 report_schema = ReportsSchema()
 reports_schema = ReportsSchema(many=True)
+report_update_schema = ReportsUpdateSchema()
+reports_generate_schema = ReportsGenerateSchema()
+reports_filter_schema = ReportsFilterSchema()
 
 @bp.post('/')
 @jwt_required()
 def create_report() -> tuple[Response, int] :
     """
-    Lets users submit a report
+    Lets users submit a report, its report card file is attached when the
+    report cards of the class are generated
     
     Returns
     -------
@@ -28,10 +50,11 @@ def create_report() -> tuple[Response, int] :
         return bad_request(e.messages)
     
     report = Reports(
-        url=result['url'],
         term=result['term'],
         session=result['session'],
-        comment=result['comment']
+        comment=result.get('comment'),
+        student_id=result.get('student_id'),
+        generator_id=current_user.id
     )
     
     db.session.add(report)
@@ -40,20 +63,155 @@ def create_report() -> tuple[Response, int] :
     return jsonify({'msg': 'Report created successfully'}), 201
 
 
+@bp.post("/generate")
+@jwt_required()
+def generate_reports() -> tuple[Response, int]:
+    """
+    Launches the generation of the report cards of a class or of every class
+    of a school for a term, one background task per class. Only the owner and
+    the teachers of the school can launch it
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the id of the batch and of its tasks
+    """
+    if current_user.role in ("student", "parent"):
+        return error_response(403, "Only staff can generate report cards")
+
+    try:
+        result = reports_generate_schema.load(request.json)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    if result["pdf"] and not pdf_available():
+        return bad_request("PDF report cards are not available")
+
+    allowed = staff_schools(current_user)
+    allowed_ids = set(db.session.scalars(allowed)) if allowed is not None else None
+
+    if "school_id" in result:
+        if db.session.get(Schools, result["school_id"]) is None:
+            return bad_request("School not found"), 404
+
+        if allowed_ids is not None and result["school_id"] not in allowed_ids:
+            return error_response(403, "Not a staff member of this school")
+
+        class_ids = db.session.scalars(
+            db.select(school_classes.c.class_id)
+            .where(school_classes.c.school_id == result["school_id"])
+            .order_by(school_classes.c.class_id)
+        ).all()
+
+        if not class_ids:
+            return bad_request("No classes found"), 404
+
+    else:
+        if db.session.get(Classes, result["class_id"]) is None:
+            return bad_request("Class not found"), 404
+
+        class_schools = set(
+            db.session.scalars(
+                db.select(school_classes.c.school_id).where(
+                    school_classes.c.class_id == result["class_id"]
+                )
+            )
+        )
+
+        if allowed_ids is not None and not class_schools & allowed_ids:
+            return error_response(403, "Not a staff member of the school of this class")
+
+        class_ids = [result["class_id"]]
+
+    if current_user.get_task_in_progress("generate_reports"):
+        return bad_request("Task already in progress")
+
+    batch_id = launch_report_batch(
+        current_user, class_ids, result["term"].value, result["session"], result["pdf"]
+    )
+    db.session.commit()
+
+    return jsonify({"msg": "Launched report card generation", "batch_id": batch_id}), 202
+
+
+@bp.get("/generate/<string:batch_id>")
+@jwt_required()
+def get_report_batch(batch_id: str) -> tuple[Response, int]:
+    """
+    Returns the progress of a report card generation batch
+
+    Parameters
+    ----------
+    batch_id : str
+        The id of the batch
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the overall progress and the progress and
+        summary of every class
+    """
+    status = report_batch_status(batch_id, current_user)
+
+    if status is None:
+        return bad_request("Batch not found"), 404
+
+    return jsonify(status), 200
+
+
+@bp.get("/cache-stats")
+@jwt_required()
+def report_cache_stats() -> tuple[Response, int]:
+    """
+    Returns the hit ratio and average render time of the report card cache to
+    staff members
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the cache counters
+    """
+    if current_user.role in ("student", "parent"):
+        return error_response(403, "Only staff can see the cache stats")
+
+    try:
+        stats = cache_stats()
+    except RedisError:
+        return error_response(503, "Cache stats unavailable")
+
+    return jsonify(stats), 200
+
+
 @bp.get("/")
 @jwt_required()
 def get_reports() -> tuple[Response, int]:
     """
-    Returns all reports submitted by the user making the request
+    Returns a page of the reports the user can see, see report_scope, filtered
+    on the term and session query parameters
 
     Returns
     -------
     JSON
-        A JSON object containing all report data
+        A JSON object containing the report data and the cursor of the next page
     """
-    reports = Reports.query.all()
+    try:
+        filters = reports_filter_schema.load(request.args)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    query = Reports.query.filter(report_scope(current_user)).filter_by(
+        **{k: getattr(v, "value", v) for k, v in filters.items()}
+    )
+
+    try:
+        schema, fields = fieldset_schema(ReportsSchema, many=True)
+        reports, next_cursor = paginate(
+            load_only_fields(query, Reports, fields), Reports
+        )
+    except (FieldsetError, PaginationError) as e:
+        return bad_request(str(e))
 
-    return reports_schema.jsonify(reports), 200
+    return page_response(schema, reports, next_cursor), 200
 
 
 @bp.get("/<int:id>")
@@ -68,19 +226,63 @@ def get_report_by_id(id) -> tuple[Response, int]:
     -------
         JSON: The JSON formatted report if found or error object otherwise
     """
-    report = Reports.query.filter_by(id=id).first()
+    try:
+        schema, fields = fieldset_schema(ReportsSchema)
+    except FieldsetError as e:
+        return bad_request(str(e))
+
+    report = (
+        load_only_fields(Reports.query, Reports, fields)
+        .filter(Reports.id == id, report_scope(current_user))
+        .first()
+    )
     
     if not report:
         return bad_request("No report found"), 404
     
-    return report_schema.jsonify(report)
+    return schema.jsonify(report)
+
+
+@bp.get("/<int:id>/file")
+@jwt_required()
+def download_report(id) -> Response | tuple[Response, int]:
+    """
+    Streams the report card file of a report. Range requests are answered with
+    206 partial content and a matching If-None-Match with 304 not modified
+
+    Args:
+        id (int): The ID of the report
+
+    Returns:
+    -------
+        The report card file if found or error object otherwise
+    """
+    report = Reports.query.filter(Reports.id == id, report_scope(current_user)).first()
+
+    if not report:
+        return bad_request("Report not found"), 404
+
+    if not report.url:
+        return bad_request("Report file not found"), 404
+
+    _, extension = os.path.splitext(report.url)
+
+    try:
+        return current_app.report_store.send(
+            report.url,
+            download_name="report-{}{}".format(report.id, extension),
+            etag=artifact_etag(report.url),
+        )
+    except (FileNotFoundError, ValueError):
+        return bad_request("Report file not found"), 404
 
 
 @bp.put("/<int:id>")
 @jwt_required()
 def update_report(id):
     """
-    Updates a report based on the ID in the URL
+    Lets staff members update a report based on the ID in the URL, see
+    report_write_scope
     
     Args:
         id (int): The ID of the report
@@ -89,14 +291,16 @@ def update_report(id):
     -------
         JSON: The JSON formatted report if found or error object otherwise
     """
+    if current_user.role in ("student", "parent"):
+        return error_response(403, "Only staff can change reports")
 
-    report = Reports.query.filter_by(id=id).first()
+    report = Reports.query.filter(Reports.id == id, report_write_scope(current_user)).first()
     
     if not report:
         return bad_request("Report not found"), 404
     
     try:
-        result = report_schema.load(request.json, partial=True)
+        result = report_update_schema.load(request.json, partial=True)
     except ValidationError as e:
         return bad_request(e.messages)
     
@@ -112,7 +316,8 @@ def update_report(id):
 @jwt_required()
 def delete_report(id):
     """
-    Deletes a report based on the ID in the URL
+    Lets staff members delete a report based on the ID in the URL, see
+    report_write_scope
     
     Args:
         id (int): The ID of the report
@@ -121,7 +326,10 @@ def delete_report(id):
     -------
         JSON: A JSON object containing the success message
     """
-    report = Reports.query.filter_by(id=id).first()
+    if current_user.role in ("student", "parent"):
+        return error_response(403, "Only staff can delete reports")
+
+    report = Reports.query.filter(Reports.id == id, report_write_scope(current_user)).first()
     
     if not report:
         return bad_request("Report not found"), 404
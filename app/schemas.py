@@ -2,7 +2,7 @@ from app import ma
 from app.models import Users, Tasks, Schools, Classes, Subjects, Scores, Reports
 from enum import Enum
 
-from marshmallow import Schema, fields
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate, validates_schema
 
 class UsersEnum(Enum):
     super_admin = "super_admin"
@@ -28,6 +28,7 @@ class TypeEnum(Enum):
 class UsersSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Users
+        exclude = ("token_version",)
 
 class UsersDeserializingSchema(Schema):
     first_name = fields.String()
@@ -38,6 +39,15 @@ class UsersDeserializingSchema(Schema):
     birthday = fields.Date()
     role = fields.Enum(UsersEnum)
 
+class UsersImportSchema(UsersDeserializingSchema):
+    first_name = fields.String(required=True)
+    last_name = fields.String(required=True)
+    email = fields.Email(required=True)
+    phone = fields.String(required=True)
+    password = fields.String(required=True)
+    birthday = fields.Date(required=True)
+    role = fields.Enum(UsersEnum, load_default=UsersEnum.student)
+
 class SchoolsSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Schools
@@ -80,15 +90,86 @@ class ScoresSchema(ma.SQLAlchemyAutoSchema):
     subject_id = fields.Nested(SubjectsSchema)
     student_id = fields.Nested(UsersSchema)
         
+class ScoresCompactSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Scores
+        include_fk = True
+
 class ScoresDeserializingSchema(Schema):
-    score = fields.Integer()
+    score = fields.Integer(required=True)
+    term = fields.Enum(TermEnum, required=True)
+    session = fields.String(required=True)
+    type = fields.Enum(TypeEnum, required=True)
+    class_id = fields.Integer(required=True)
+    subject_id = fields.Integer(required=True)
+    student_id = fields.Integer(required=True)
+    
+class ScoresFilterSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    class_id = fields.Integer()
+    subject_id = fields.Integer()
+    student_id = fields.Integer()
     term = fields.Enum(TermEnum)
     session = fields.String()
     type = fields.Enum(TypeEnum)
-    
+
+class ScoresExportSchema(ScoresFilterSchema):
+    school_id = fields.Integer()
+    format = fields.String(
+        load_default="ndjson", validate=validate.OneOf(["ndjson", "csv"])
+    )
+
+class TermResultsQuerySchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    class_id = fields.Integer(required=True)
+    term = fields.Enum(TermEnum, required=True)
+    session = fields.String(required=True)
+
+class LeaderboardQuerySchema(TermResultsQuerySchema):
+    subject_id = fields.Integer(required=True)
+    limit = fields.Integer(load_default=10, validate=validate.Range(min=1, max=100))
+
+class ScoreStatsQuerySchema(TermResultsQuerySchema):
+    subject_id = fields.Integer(required=True)
+    type = fields.Enum(TypeEnum)
+
 class ReportsSchema(ma.SQLAlchemyAutoSchema):
     class Meta(Schema):
         model = Reports
+        include_fk = True
+        # Report card paths are only set by the generator
+        dump_only = ("url",)
+
+class ReportsUpdateSchema(ReportsSchema):
+    class Meta(ReportsSchema.Meta):
+        # A report cannot be moved to another student or generator
+        dump_only = ("url", "student_id", "generator_id")
+
+class ReportsFilterSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    term = fields.Enum(TermEnum)
+    session = fields.Integer()
+
+class ReportsGenerateSchema(Schema):
+    class_id = fields.Integer()
+    school_id = fields.Integer()
+    term = fields.Enum(TermEnum, required=True)
+    # Reports store the first year of the session
+    session = fields.String(
+        required=True, validate=validate.Regexp(r"^\d{4}(/\d{4})?$")
+    )
+    pdf = fields.Boolean(load_default=False)
+
+    @validates_schema
+    def validate_target(self, data, **kwargs):
+        if ("class_id" in data) == ("school_id" in data):
+            raise ValidationError("Provide either a class_id or a school_id")
 
 class TasksSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
@@ -1,11 +1,12 @@
 from app import db
 from app.errors.handlers import bad_request, error_response
+from app.helpers.fieldsets import FieldsetError, fieldset_schema, load_only_fields
+from app.helpers.pagination import PaginationError, page_response, paginate
 from app.models import Schools, Users
 from app.schemas import SchoolsDeserializingSchema, SchoolsSchema
 from app.schools import bp
 from flask import request, jsonify, Response
 from flask_jwt_extended import jwt_required, current_user
-from sqlalchemy.orm import joinedload
 
 school_schema = SchoolsSchema()
 schools_schema = SchoolsSchema(many=True)
@@ -40,7 +41,7 @@ def create_school() -> tuple[Response, int] | Response:
         country = result["country"]
     )
     
-    school.owner = current_user
+    school.owner_id = current_user.id
     
     db.session.add(school)
     db.session.commit()
@@ -51,21 +52,22 @@ def create_school() -> tuple[Response, int] | Response:
 @jwt_required()
 def get_all_schools() -> Response:
     """
-    Endpoint for retrieving all schools
+    Endpoint for retrieving a page of schools
 
     Returns
     -------
     str
-        A JSON object containing the schools
+        A JSON object containing the schools and the cursor of the next page
     """
     try:
-        schools = Schools.query.options(joinedload(Schools.owner)).all()
-        for school in schools:
-            print(school.owner)
-    except Exception as e:
-        return bad_request(e.messages)
+        schema, fields = fieldset_schema(SchoolsSchema, many=True)
+        schools, next_cursor = paginate(
+            load_only_fields(Schools.query, Schools, fields), Schools
+        )
+    except (FieldsetError, PaginationError) as e:
+        return bad_request(str(e))
     
-    return schools_schema.jsonify(schools)
+    return page_response(schema, schools, next_cursor)
 
 
 @bp.get("/<int:id>")
@@ -85,18 +87,16 @@ def get_school_by_id(id: int) -> Response:
         A JSON object containing the school
     """
     try:
-        school = Schools.query.options(joinedload(Schools.owner)).get(id)
-    except Exception as e:
-        return bad_request(e.messages)
+        schema, fields = fieldset_schema(SchoolsSchema)
+    except FieldsetError as e:
+        return bad_request(str(e))
+
+    school = load_only_fields(Schools.query, Schools, fields).get(id)
 
     if not school:
         return bad_request("School not found"), 404
 
-    print(school_schema.dump(school))
-    # school_detes["owner"] = school_schema.dump(school.owner)
-    # school_detes["school"] = school_schema.dump(school)
-
-    return school_schema.jsonify(school)
+    return schema.jsonify(school)
 
 
 @bp.put("/<int:id>")
@@ -1,14 +1,47 @@
-from flask import request, jsonify, Response
+from flask import current_app, request, jsonify, Response, stream_with_context
 
 from app import db
 from app.scores import bp
-from app.models import Scores
-from app.schemas import ScoresSchema, ScoresDeserializingSchema
-from app.errors.handlers import bad_request
+from app.models import Scores, ScoreStats
+from app.schemas import (
+    ClassesSchema,
+    LeaderboardQuerySchema,
+    ScoresCompactSchema,
+    ScoresDeserializingSchema,
+    ScoresExportSchema,
+    ScoresFilterSchema,
+    ScoresSchema,
+    ScoreStatsQuerySchema,
+    SubjectsSchema,
+    TermResultsQuerySchema,
+    UsersSchema,
+)
+from app.errors.handlers import bad_request, error_response
+from app.helpers.gradebook import submit_gradebook
+from app.helpers.leaderboards import (
+    refresh_leaderboards,
+    score_entry,
+    student_rank,
+    top_students,
+)
+from app.helpers.score_export import EXPORT_MIMETYPES, export_scores
+from app.helpers.score_stats import apply_score_changes, stats_key, stats_summary
+from app.helpers.term_results import compute_term_results
+from app.helpers.included import (
+    IncludeError,
+    get_includes,
+    include_keys,
+    include_options,
+    included_resources,
+)
+from app.helpers.fieldsets import FieldsetError, fieldset_schema, load_only_fields
+from app.helpers.pagination import PaginationError, page_response, paginate
 
 from flask_jwt_extended import jwt_required, current_user
 
 from marshmallow import ValidationError
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
 
 import asyncio
 from aiohttp import ClientSession
@@ -16,6 +49,20 @@ from aiohttp import ClientSession
 # Declare database schemas so they can be returned as JSON objects
 score_schema = ScoresSchema()
 scores_schema = ScoresSchema(many=True)
+score_deserializing_schema = ScoresDeserializingSchema()
+score_filter_schema = ScoresFilterSchema()
+score_export_schema = ScoresExportSchema()
+term_results_query_schema = TermResultsQuerySchema()
+leaderboard_query_schema = LeaderboardQuerySchema()
+score_stats_query_schema = ScoreStatsQuerySchema()
+
+# Relationships which score listings side load under "included": the
+# relationship attribute and the schema dumping the related rows
+SCORE_INCLUDES = {
+    "classes": ("classes", ClassesSchema(many=True)),
+    "subjects": ("subjects", SubjectsSchema(many=True)),
+    "students": ("students", UsersSchema(many=True, only=("id", "first_name", "last_name"))),
+}
 
 
 @bp.post("/")
@@ -30,37 +77,297 @@ def submit_score() -> tuple[Response, int] | Response:
         A JSON object containing a success message
     """
     try:
-        result = score_schema.load(request.json)
+        result = score_deserializing_schema.load(request.json)
     except ValidationError as e:
         return bad_request(e.messages)
 
     score = Scores(
         score=result["score"],
-        term = result["term"],
+        term = result["term"].value,
         session = result["session"],
-        type = result["type"]
+        type = result["type"].value,
+        class_id = result["class_id"],
+        subject_id = result["subject_id"],
+        student_id = result["student_id"],
     )
 
     db.session.add(score)
+
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return error_response(409, "Score already submitted")
+
+    entry = score_entry(score)
+    apply_score_changes(added=[(stats_key(score), score.score)], removed=[])
     db.session.commit()
 
+    refresh_leaderboards({entry})
+
     return jsonify({"msg": "Score succesfully submitted"}), 201
 
 
+@bp.post("/bulk")
+@jwt_required()
+def submit_scores() -> tuple[Response, int] | Response:
+    """
+    Lets users submit a whole gradebook at once. Fields given next to "scores"
+    (e.g. class_id, subject_id, term, session) apply to every entry, scores
+    which already exist are updated. All entries are written in a single
+    transaction, or none when one of them is invalid
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the status of every entry, or the errors
+        keyed by entry index
+    """
+    payload = request.json
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("scores"), list):
+        return bad_request("scores must be a list")
+
+    if not payload["scores"]:
+        return bad_request("scores must not be empty")
+
+    if len(payload["scores"]) > current_app.config["SCORES_BULK_MAX_ROWS"]:
+        return bad_request(
+            "At most {} scores can be submitted at once".format(
+                current_app.config["SCORES_BULK_MAX_ROWS"]
+            )
+        )
+
+    defaults = {k: v for k, v in payload.items() if k != "scores"}
+    entries = [
+        {**defaults, **entry} if isinstance(entry, dict) else entry
+        for entry in payload["scores"]
+    ]
+
+    results, errors = submit_gradebook(entries)
+
+    if errors:
+        db.session.rollback()
+        return bad_request(errors)
+
+    db.session.commit()
+
+    refresh_leaderboards(
+        {
+            (r["class_id"], r["subject_id"], r["term"], r["session"], r["student_id"])
+            for r in results
+        }
+    )
+
+    return jsonify(
+        {
+            "results": results,
+            "created": sum(r["status"] == "created" for r in results),
+            "updated": sum(r["status"] == "updated" for r in results),
+        }
+    ), 200
+
+
 @bp.get("/")
 @jwt_required()
 def get_scores() -> tuple[Response, int]:
     """
-    Returns all scores submitted by the user making the request
+    Returns a page of the scores, filtered on any of the class_id, subject_id,
+    student_id, term, session and type query parameters. Scores reference
+    their class, subject and student by id, each of them is returned once
+    under "included", ?include=classes,... picks which ones
 
     Returns
     -------
     JSON
-        A JSON object containing all score data
+        A JSON object containing the score data, the related rows and the
+        cursor of the next page
     """
-    scores = Scores.query.all()
+    try:
+        filters = score_filter_schema.load(request.args)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    query = Scores.query.filter_by(
+        **{k: getattr(v, "value", v) for k, v in filters.items()}
+    )
+
+    try:
+        includes = get_includes(SCORE_INCLUDES)
+        schema, fields = fieldset_schema(ScoresCompactSchema, many=True)
 
-    return scores_schema.jsonify(scores), 200
+        # The foreign keys are needed to load the included rows
+        if fields is not None:
+            fields = fields + include_keys(Scores, SCORE_INCLUDES, includes)
+
+        query = load_only_fields(query, Scores, fields).options(
+            *include_options(Scores, SCORE_INCLUDES, includes)
+        )
+        scores, next_cursor = paginate(query, Scores)
+    except (FieldsetError, IncludeError, PaginationError) as e:
+        return bad_request(str(e))
+
+    included = included_resources(scores, SCORE_INCLUDES, includes)
+
+    return page_response(schema, scores, next_cursor, included), 200
+
+
+@bp.get("/export")
+@jwt_required()
+def export_scores_file() -> tuple[Response, int] | Response:
+    """
+    Streams the scores as NDJSON or CSV (?format=csv), filtered on any of the
+    school_id, class_id, subject_id, student_id, term, session and type query
+    parameters. Rows are written as they are read from the database
+
+    Returns
+    -------
+    str
+        The export as a streamed attachment
+    """
+    try:
+        filters = score_export_schema.load(request.args)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    file_format = filters.pop("format")
+    filters = {k: getattr(v, "value", v) for k, v in filters.items()}
+    chunks = export_scores(
+        filters, file_format, current_app.config["SCORES_EXPORT_BATCH_SIZE"]
+    )
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=EXPORT_MIMETYPES[file_format],
+        headers={
+            "Content-Disposition": "attachment; filename=scores.{}".format(file_format)
+        },
+    )
+
+
+@bp.get("/results")
+@jwt_required()
+def get_term_results() -> tuple[Response, int] | Response:
+    """
+    Returns the term results of a class given by the class_id, term and
+    session query parameters: the weighted total of every student per subject,
+    their average and class position, and statistics per subject
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the results of the students ordered by
+        position and the subject statistics
+    """
+    try:
+        args = term_results_query_schema.load(request.args)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    results = compute_term_results(args["class_id"], args["term"].value, args["session"])
+
+    return jsonify(results), 200
+
+
+@bp.get("/leaderboard")
+@jwt_required()
+def get_leaderboard() -> tuple[Response, int] | Response:
+    """
+    Returns the best students of a class in a subject for a term, given by
+    the class_id, subject_id, term, session and limit query parameters
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the students with their total and position
+    """
+    try:
+        args = leaderboard_query_schema.load(request.args)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    try:
+        top = top_students(
+            args["class_id"],
+            args["subject_id"],
+            args["term"].value,
+            args["session"],
+            args["limit"],
+        )
+    except RedisError:
+        return error_response(503, "Leaderboards unavailable")
+
+    return jsonify({"data": top}), 200
+
+
+@bp.get("/leaderboard/<int:student_id>")
+@jwt_required()
+def get_leaderboard_position(student_id: int) -> tuple[Response, int] | Response:
+    """
+    Returns the position of a student in a class and subject for a term, given
+    by the class_id, subject_id, term and session query parameters
+
+    Parameters
+    ----------
+    student_id : int
+        The ID of the student
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the total, position and class size
+    """
+    try:
+        args = leaderboard_query_schema.load(request.args)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    try:
+        rank = student_rank(
+            args["class_id"],
+            args["subject_id"],
+            args["term"].value,
+            args["session"],
+            student_id,
+        )
+    except RedisError:
+        return error_response(503, "Leaderboards unavailable")
+
+    if rank is None:
+        return bad_request("Student not found on this leaderboard"), 404
+
+    return jsonify(rank), 200
+
+
+@bp.get("/stats")
+@jwt_required()
+def get_score_stats() -> tuple[Response, int] | Response:
+    """
+    Returns the count, mean, standard deviation, min and max of the scores of
+    a class in a subject for a term, per score type. They are kept up to date
+    on every score write so reading them costs a primary key lookup
+
+    Returns
+    -------
+    JSON
+        A JSON object containing the statistics of each score type
+    """
+    try:
+        args = score_stats_query_schema.load(request.args)
+    except ValidationError as e:
+        return bad_request(e.messages)
+
+    query = ScoreStats.query.filter_by(
+        class_id=args["class_id"],
+        subject_id=args["subject_id"],
+        term=args["term"].value,
+        session=args["session"],
+    )
+
+    if "type" in args:
+        query = query.filter_by(type=args["type"].value)
+
+    return jsonify({"data": [stats_summary(row) for row in query]}), 200
 
 
 @bp.get("/<int:id>")
@@ -79,12 +386,17 @@ def get_score_by_id(id: int) -> tuple[Response, int] | Response:
     JSON
         A JSON object containing all score data
     """
-    score = Scores.query.filter_by(id=id).first()
+    try:
+        schema, fields = fieldset_schema(ScoresSchema)
+    except FieldsetError as e:
+        return bad_request(str(e))
+
+    score = load_only_fields(Scores.query, Scores, fields).filter_by(id=id).first()
 
     if not score:
         return bad_request("No score found"), 404
 
-    return score_schema.jsonify(score), 200
+    return schema.jsonify(score), 200
 
 
 @bp.put("/<int:id>")
@@ -109,15 +421,30 @@ def update_score(id: int) -> tuple[Response, int] | Response:
         return bad_request("Score not found")
     
     try:
-        result = score_schema.load(request.json, partial=True)
+        result = score_deserializing_schema.load(request.json, partial=True)
     except ValidationError as e:
         return bad_request(e.messages)
 
+    # The score may move to another leaderboard
+    entries = {score_entry(score)}
+    removed = [(stats_key(score), score.score)]
+
     for k, v in result.items():
-        setattr(score, k, v)
+        setattr(score, k, getattr(v, "value", v))
 
+    entries.add(score_entry(score))
+
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return error_response(409, "Score already submitted")
+
+    apply_score_changes(added=[(stats_key(score), score.score)], removed=removed)
     db.session.commit()
 
+    refresh_leaderboards(entries)
+
     return jsonify({"msg": "Score succesfully updated"}), 201
 
 
@@ -142,7 +469,15 @@ def delete_score(id: int) -> tuple[Response, int] | Response:
     if not score:
         return bad_request("Score not found")
 
+    entry = score_entry(score)
+    removed = [(stats_key(score), score.score)]
+
     db.session.delete(score)
+    db.session.flush()
+
+    apply_score_changes(added=[], removed=removed)
     db.session.commit()
 
+    refresh_leaderboards({entry})
+
     return jsonify({"msg": "Score succesfully deleted"}), 201
\ No newline at end of file
@@ -5,6 +5,8 @@ from app.subjects import bp
 from app.models import Subjects
 from app.schemas import SubjectsSchema
 from app.errors.handlers import bad_request
+from app.helpers.fieldsets import FieldsetError, fieldset_schema, load_only_fields
+from app.helpers.pagination import PaginationError, page_response, paginate
 
 from flask_jwt_extended import jwt_required, current_user
 
@@ -49,16 +51,22 @@ def submit_subject() -> tuple[Response, int] | Response:
 @jwt_required()
 def get_subjects() -> tuple[Response, int]:
     """
-    Returns all subjects submitted by the user making the request
+    Returns a page of the subjects
 
     Returns
     -------
     JSON
-        A JSON object containing all subject data
+        A JSON object containing the subject data and the cursor of the next page
     """
-    subjects = Subjects.query.all()
+    try:
+        schema, fields = fieldset_schema(SubjectsSchema, many=True)
+        subjects, next_cursor = paginate(
+            load_only_fields(Subjects.query, Subjects, fields), Subjects
+        )
+    except (FieldsetError, PaginationError) as e:
+        return bad_request(str(e))
 
-    return subjects_schema.jsonify(subjects), 200
+    return page_response(schema, subjects, next_cursor), 200
 
 
 @bp.get("/<int:id>")
@@ -77,12 +85,17 @@ def get_subject_by_id(id: int) -> tuple[Response, int] | Response:
     JSON
         A JSON object containing all subject data
     """
-    subject = Subjects.query.filter_by(id=id).first()
+    try:
+        schema, fields = fieldset_schema(SubjectsSchema)
+    except FieldsetError as e:
+        return bad_request(str(e))
+
+    subject = load_only_fields(Subjects.query, Subjects, fields).filter_by(id=id).first()
 
     if not subject:
         return bad_request("No subject found")
 
-    return subject_schema.jsonify(subject), 200
+    return schema.jsonify(subject), 200
 
 
 @bp.put("/<int:id>")
@@ -1,8 +1,15 @@
+import os
 import sys
-from datetime import time
+from datetime import time, timedelta
 
-from app import create_app
+from rq import get_current_job
+
+from app import create_app, db
+from app.helpers.report_cards import generate_class_reports
 from app.helpers.task_helpers import _set_task_progress
+from app.helpers.task_queues import enqueue_task, is_task_scheduled
+from app.helpers.token_cleanup import remove_revoked_tokens
+from app.helpers.user_import import import_users_from_file
 
 # Create the app in order to operate within the context of the app
 app = create_app()
@@ -32,3 +39,117 @@ def count_seconds(**kwargs: int) -> None:
 
         finally:
             _set_task_progress(100)
+
+
+def import_users(**kwargs: str) -> dict | None:
+    """
+    A background task which imports the users of an uploaded CSV or NDJSON file.
+    The per row report is stored in the job meta under "report", when the
+    import stops early the reason is stored under "error"
+    """
+    with app.app_context():
+        report = None
+        path = kwargs["path"]
+        job = get_current_job()
+
+        try:
+            report = import_users_from_file(
+                path, kwargs["file_format"], kwargs["importer_role"]
+            )
+
+            if job:
+                job.meta["report"] = report
+                job.save_meta()
+
+        except Exception:
+            db.session.rollback()
+            app.logger.error("Unhandled exception", exc_info=sys.exc_info())
+
+            if job:
+                job.meta["error"] = (
+                    "The import stopped early, the rows of the report were imported"
+                )
+                job.save_meta()
+
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+            _set_task_progress(100)
+
+        return report
+
+
+def generate_reports(**kwargs) -> dict | None:
+    """
+    A background task which generates the report cards of a class for a term.
+    The summary is stored in the job meta under "report" and a failure under
+    "error". Failures are raised again so the queue retries the task
+    """
+    with app.app_context():
+        report = None
+        job = get_current_job()
+
+        try:
+            report = generate_class_reports(
+                kwargs["class_id"],
+                kwargs["term"],
+                kwargs["session"],
+                kwargs["generator_id"],
+                pdf=kwargs.get("pdf", False),
+            )
+
+            if job:
+                job.meta["report"] = report
+                job.meta.pop("error", None)
+                job.save_meta()
+
+        except Exception:
+            db.session.rollback()
+            app.logger.error("Unhandled exception", exc_info=sys.exc_info())
+
+            if job:
+                job.meta["error"] = "The report cards of the class could not be generated"
+                job.save_meta()
+
+            # The task stays in progress while the queue will retry it
+            if not job or not job.retries_left:
+                _set_task_progress(100)
+
+            raise
+
+        _set_task_progress(100)
+
+        return report
+
+
+def remove_old_jwts(**kwargs: int) -> int:
+    """
+    A recurring background task which removes the expired rows of the Revoked
+    Token table. When an interval is passed the task schedules its next run,
+    unless another run is already scheduled
+    """
+    with app.app_context():
+        removed = 0
+
+        try:
+            removed = remove_revoked_tokens(
+                app.config["JWT_BLOCKLIST_RETENTION_DAYS"],
+                app.config["JWT_BLOCKLIST_CLEANUP_BATCH_SIZE"],
+            )
+            app.logger.info("{} old tokens have been removed".format(removed))
+
+        except Exception:
+            app.logger.error("Unhandled exception", exc_info=sys.exc_info())
+
+        finally:
+            interval = kwargs.get("interval")
+
+            if interval and not is_task_scheduled("remove_old_jwts"):
+                enqueue_task(
+                    "remove_old_jwts",
+                    delay=timedelta(seconds=interval),
+                    interval=interval,
+                )
+
+        return removed
@@ -0,0 +1,178 @@
+import unittest
+
+import fakeredis
+from redis.exceptions import ConnectionError
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.bloom_filter import BloomFilter
+from app.helpers.blocklist import (
+    BloomFilterBlocklistStore,
+    RedisBlocklistStore,
+    SQLBlocklistStore,
+)
+from app.helpers.test_helpers import register_and_login_user
+from app.models import RevokedTokenModel
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+    JWT_BLOCKLIST_STORE = "redis"
+
+
+class BrokenRedis(object):
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        return fail
+
+
+class TestBlocklist(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_logout_revokes_token_in_redis(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            resp = c.delete("/api/auth/logout/token", headers=headers)
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            keys = self.app.redis.keys("revoked-jti:*")
+            self.assertEqual(1, len(keys))
+
+            # The key expires together with the access token
+            ttl = self.app.redis.ttl(keys[0])
+            self.assertTrue(0 < ttl <= 15 * 60)
+
+            # The revoked token table is still written as an audit trail
+            self.assertEqual(1, RevokedTokenModel.query.count())
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual(401, resp.status_code, msg=resp.get_json())
+
+    def test_redis_misses_do_not_query_the_database(self):
+        store = RedisBlocklistStore()
+        store.revoke({"jti": "revoked"})
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            self.assertFalse(store.is_revoked("not-revoked"))
+            self.assertTrue(store.is_revoked("revoked"))
+            self.assertFalse(store.is_revoked("not-revoked"))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        # Only the first check loads Redis from the table
+        self.assertEqual(1, len(statements))
+
+    def test_redis_is_loaded_again_after_a_flush(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            c.delete("/api/auth/logout/token", headers=headers)
+
+            # A flush does not bring the token back, the keys are restored
+            self.app.redis.flushall()
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual(401, resp.status_code, msg=resp.get_json())
+            self.assertEqual(1, len(self.app.redis.keys("revoked-jti:*")))
+
+    def test_tokens_revoked_during_an_outage_stay_revoked(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            redis = self.app.redis
+            self.app.redis = BrokenRedis()
+            c.delete("/api/auth/logout/token", headers=headers)
+            self.app.redis = redis
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual(401, resp.status_code, msg=resp.get_json())
+
+    def test_falls_back_to_database_when_redis_is_down(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            self.app.redis = BrokenRedis()
+
+            resp = c.delete("/api/auth/logout/token", headers=headers)
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual(401, resp.status_code, msg=resp.get_json())
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        items = ["jti-{}".format(i) for i in range(1000)]
+
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+        self.assertTrue(bloom.is_full())
+
+        false_positives = sum("other-{}".format(i) in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_filter_skips_store_for_unrevoked_tokens(self):
+        store = BloomFilterBlocklistStore(SQLBlocklistStore())
+        store.revoke({"jti": "revoked"})
+
+        self.assertTrue(store.is_revoked("revoked"))
+        self.assertFalse(store.is_revoked("not-revoked"))
+
+        stats = store.stats()
+        self.assertEqual(2, stats["checks"])
+        self.assertEqual(1, stats["filter_hits"])
+        self.assertEqual(0, stats["false_positives"])
+
+    def test_filter_picks_up_tokens_revoked_by_other_workers(self):
+        store = BloomFilterBlocklistStore(SQLBlocklistStore(), refresh_interval=60)
+        self.assertFalse(store.is_revoked("elsewhere"))
+
+        RevokedTokenModel(jti="elsewhere").add()
+
+        # Not visible until the next refresh
+        self.assertFalse(store.is_revoked("elsewhere"))
+
+        store.refresh(force=True)
+        self.assertTrue(store.is_revoked("elsewhere"))
+
+    def test_filter_grows_when_full(self):
+        store = BloomFilterBlocklistStore(SQLBlocklistStore(), capacity=2)
+
+        for i in range(3):
+            store.revoke({"jti": "jti-{}".format(i)})
+
+        store.refresh(force=True)
+        self.assertEqual(4, store.filter.capacity)
+        self.assertTrue(all(store.is_revoked("jti-{}".format(i)) for i in range(3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import (
+    Classes,
+    Reports,
+    Schools,
+    Users,
+    school_classes,
+    school_students,
+)
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+def create_school(owner_id: int, name: str, students: int) -> int:
+    """
+    Inserts a school with the given number of students, half of them with a report
+    """
+    school = Schools(
+        name=name,
+        address="1 road",
+        phone=name,
+        email="{}@school.com".format(name),
+        owner_id=owner_id,
+    )
+    db.session.add(school)
+    db.session.flush()
+
+    first_id = (db.session.scalar(db.select(db.func.max(Users.id))) or 0) + 1
+    db.session.execute(
+        db.insert(Users),
+        [
+            {
+                "first_name": "student",
+                "last_name": str(i),
+                "email": "{}-{}@test.com".format(name, i),
+                "phone": "{}-{}".format(name, i),
+                "password_hash": "x",
+                "role": "student",
+                "birthday": datetime(2010, 1, 1),
+            }
+            for i in range(students)
+        ],
+    )
+    student_ids = range(first_id, first_id + students)
+    db.session.execute(
+        db.insert(school_students),
+        [{"student_id": i, "school_id": school.id} for i in student_ids],
+    )
+
+    db.session.execute(
+        db.insert(Reports),
+        [
+            {"url": "report.pdf", "term": "first", "session": 2024, "student_id": i}
+            for i in student_ids[::2]
+        ],
+    )
+    db.session.commit()
+
+    return school.id
+
+
+class TestDashboard(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def dashboard_queries(self, c, token: str) -> tuple[dict, int]:
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            resp = c.get(
+                "/api/dashboard", headers={"Authorization": "Bearer {}".format(token)}
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(200, resp.status_code, msg=resp.get_json())
+        return resp.get_json(), len(statements)
+
+    def test_query_count_does_not_depend_on_school_size(self):
+        with self.app.test_client() as c:
+            small = register_and_login_user(c, email="small@test.com", phone="1")
+            large = register_and_login_user(c, email="large@test.com", phone="2")
+
+            create_school(1, "small", 10)
+            create_school(2, "large", 10000)
+
+            # Warm up the blocklist filter and the identity cache
+            for tokens in (small, large):
+                c.get(
+                    "/api/users/profile",
+                    headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+                )
+
+            small_json, small_queries = self.dashboard_queries(c, small["access_token"])
+            large_json, large_queries = self.dashboard_queries(c, large["access_token"])
+
+            self.assertEqual(10, small_json["school_summary"]["student_count"])
+            self.assertEqual(5, small_json["school_summary"]["reports_count"])
+            self.assertEqual(10000, large_json["school_summary"]["student_count"])
+            self.assertEqual(5000, large_json["school_summary"]["reports_count"])
+            self.assertEqual(small_queries, large_queries)
+            self.assertNotIn("students", large_json)
+
+    def test_included_lists_are_paginated(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            school_id = create_school(1, "school", 3)
+            db.session.add(Classes(name="JSS1"))
+            db.session.flush()
+            db.session.execute(
+                db.insert(school_classes), [{"school_id": school_id, "class_id": 1}]
+            )
+            db.session.commit()
+
+            resp = c.get(
+                "/api/dashboard",
+                headers=headers,
+                query_string={"include": "students,classes", "limit": 2},
+            )
+            json_data = resp.get_json()
+
+            self.assertEqual(200, resp.status_code, msg=json_data)
+            self.assertEqual(2, len(json_data["students"]["data"]))
+            self.assertEqual("JSS1", json_data["classes"]["data"][0]["name"])
+            self.assertEqual(1, json_data["school_summary"]["class_count"])
+
+            resp = c.get(
+                "/api/dashboard/students",
+                headers=headers,
+                query_string={"after": json_data["students"]["next_cursor"]},
+            )
+            self.assertEqual(1, len(resp.get_json()["data"]))
+
+    def test_unknown_include(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+
+            resp = c.get(
+                "/api/dashboard",
+                headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+                query_string={"include": "grades"},
+            )
+
+            self.assertEqual(400, resp.status_code, msg=resp.get_json())
+
+
+if __name__ == "__main__":
+    unittest.main()
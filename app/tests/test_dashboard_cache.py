@@ -0,0 +1,177 @@
+import threading
+import time
+import unittest
+
+import fakeredis
+from redis.exceptions import ConnectionError
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers import dashboard_cache
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Schools, Users, school_students
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class BrokenRedis(object):
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        return fail
+
+
+class TestDashboardCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def create_school(self) -> int:
+        school = Schools(
+            name="school",
+            address="1 road",
+            phone="1",
+            email="school@school.com",
+            owner_id=1,
+        )
+        db.session.add(school)
+        db.session.commit()
+
+        return school.id
+
+    def get_dashboard(self, c, headers) -> tuple[dict, int]:
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            resp = c.get("/api/dashboard", headers=headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(200, resp.status_code, msg=resp.get_json())
+        return resp.get_json(), len(statements)
+
+    def test_second_request_is_served_from_cache(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+            self.create_school()
+
+            first, first_queries = self.get_dashboard(c, headers)
+            second, second_queries = self.get_dashboard(c, headers)
+
+            self.assertEqual(first, second)
+            self.assertLess(second_queries, first_queries)
+
+            stats = c.get("/api/dashboard/cache-stats", headers=headers).get_json()
+            self.assertEqual(1, stats["hits"])
+            self.assertEqual(1, stats["misses"])
+            self.assertEqual(0.5, stats["hit_ratio"])
+
+    def test_cache_stats_are_for_staff(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c, role="student")
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            resp = c.get("/api/dashboard/cache-stats", headers=headers)
+            self.assertEqual(403, resp.status_code, msg=resp.get_json())
+
+    def test_cache_stats_without_redis(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            self.app.redis = BrokenRedis()
+
+            resp = c.get("/api/dashboard/cache-stats", headers=headers)
+            self.assertEqual(503, resp.status_code, msg=resp.get_json())
+
+    def test_orm_write_invalidates_dashboard(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+            school_id = self.create_school()
+            self.get_dashboard(c, headers)
+
+            db.session.get(Schools, school_id).name = "renamed"
+            db.session.commit()
+
+            json_data, _ = self.get_dashboard(c, headers)
+            self.assertEqual("renamed", json_data["name"])
+
+    def test_bulk_association_write_invalidates_dashboard(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+            school_id = self.create_school()
+
+            json_data, _ = self.get_dashboard(c, headers)
+            self.assertEqual(0, json_data["school_summary"]["student_count"])
+
+            db.session.execute(
+                db.insert(school_students), [{"school_id": school_id, "student_id": 1}]
+            )
+            db.session.commit()
+
+            json_data, _ = self.get_dashboard(c, headers)
+            self.assertEqual(1, json_data["school_summary"]["student_count"])
+
+    def test_rolled_back_write_keeps_cache(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+            self.create_school()
+            self.get_dashboard(c, headers)
+
+            db.session.get(Users, 1).first_name = "changed"
+            db.session.flush()
+            db.session.rollback()
+
+            self.get_dashboard(c, headers)
+            self.assertEqual(1, dashboard_cache.stats()["hits"])
+
+    def test_concurrent_misses_rebuild_once(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return {"school_summary": {}}
+
+        def request_dashboard():
+            with self.app.app_context():
+                results.append(dashboard_cache.get_or_build(1, "", build))
+
+        results = []
+        threads = [threading.Thread(target=request_dashboard) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(builds))
+        self.assertEqual(5, len(results))
+        self.assertEqual(1, len(set(results)))
+
+
+if __name__ == "__main__":
+    unittest.main()
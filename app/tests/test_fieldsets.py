@@ -0,0 +1,94 @@
+import unittest
+
+import fakeredis
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.fieldsets import fieldset_schema
+from app.helpers.test_helpers import register_and_login_user
+from app.schemas import SubjectsSchema
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestFieldsets(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_fields_narrow_response_and_query(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            statements = []
+
+            def record(conn, cursor, statement, *args):
+                statements.append(statement)
+
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                resp = c.get(
+                    "/api/users/", headers=headers, query_string={"fields": "first_name,id"}
+                )
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+            json_data = resp.get_json()
+            self.assertEqual(200, resp.status_code, msg=json_data)
+            self.assertEqual([{"first_name": "tim", "id": 1}], json_data["data"])
+
+            users_query = [s for s in statements if "FROM users" in s and "LIMIT" in s]
+            self.assertEqual(1, len(users_query))
+            self.assertNotIn("password_hash", users_query[0])
+            self.assertNotIn("last_name", users_query[0])
+
+    def test_profile_fields(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+
+            resp = c.get(
+                "/api/users/profile",
+                headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+                query_string={"fields": "role"},
+            )
+
+            self.assertEqual({"role": "admin"}, resp.get_json())
+
+    def test_unknown_or_excluded_fields(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            for fields in ("nope", "id,password_hash"):
+                resp = c.get("/api/users/1", headers=headers, query_string={"fields": fields})
+                self.assertEqual(400, resp.status_code, msg=resp.get_json())
+
+    def test_schemas_are_cached_per_field_set(self):
+        with self.app.test_request_context("/?fields=name,id"):
+            first, fields = fieldset_schema(SubjectsSchema, many=True)
+
+        with self.app.test_request_context("/?fields=id, name"):
+            second, _ = fieldset_schema(SubjectsSchema, many=True)
+
+        self.assertEqual(("id", "name"), fields)
+        self.assertIs(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Classes, Scores, Subjects, Users
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestGradebook(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add_all([Classes(name="JSS1"), Subjects(name="Maths")])
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in range(3)
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def gradebook(self, score: int = 10) -> dict:
+        return {
+            "class_id": 1,
+            "subject_id": 1,
+            "term": "first",
+            "session": "2024/2025",
+            "scores": [
+                {"student_id": student_id, "type": score_type, "score": score}
+                for student_id in (1, 2, 3)
+                for score_type in ("CA", "exam")
+            ],
+        }
+
+    def submit(self, c, payload: dict):
+        tokens = register_and_login_user(c, phone="teacher")
+
+        return c.post(
+            "/api/scores/bulk",
+            headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+            json=payload,
+        )
+
+    def test_bulk_submission_creates_scores_in_one_statement(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.startswith("INSERT INTO scores"):
+                statements.append(statement)
+
+        with self.app.test_client() as c:
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                resp = self.submit(c, self.gradebook())
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+            json_data = resp.get_json()
+
+            self.assertEqual(200, resp.status_code, msg=json_data)
+            self.assertEqual(6, json_data["created"])
+            self.assertEqual(
+                {
+                    "class_id": 1,
+                    "subject_id": 1,
+                    "student_id": 1,
+                    "term": "first",
+                    "session": "2024/2025",
+                    "type": "CA",
+                    "status": "created",
+                },
+                json_data["results"][0],
+            )
+            self.assertEqual(6, Scores.query.count())
+            self.assertEqual(1, len(statements))
+
+    def test_resubmission_updates_scores(self):
+        with self.app.test_client() as c:
+            self.submit(c, self.gradebook())
+
+            payload = self.gradebook(score=15)
+            payload["scores"].append({"student_id": 1, "type": "test", "score": 5})
+            json_data = self.submit(c, payload).get_json()
+
+            self.assertEqual(6, json_data["updated"])
+            self.assertEqual(1, json_data["created"])
+            self.assertEqual(7, Scores.query.count())
+            self.assertEqual(
+                {15}, {s.score for s in Scores.query.filter(Scores.type != "test")}
+            )
+
+    def test_invalid_entry_rejects_the_whole_gradebook(self):
+        with self.app.test_client() as c:
+            payload = self.gradebook()
+            payload["scores"][2]["type"] = "quiz"
+            payload["scores"][4]["student_id"] = 99
+            resp = self.submit(c, payload)
+
+            self.assertEqual(400, resp.status_code)
+            self.assertEqual(["2"], list(resp.get_json()["msg"]))
+
+            payload["scores"][2]["type"] = "test"
+            resp = self.submit(c, payload)
+
+            self.assertEqual(400, resp.status_code)
+            self.assertEqual(
+                {"4": {"student_id": ["Student not found"]}}, resp.get_json()["msg"]
+            )
+            self.assertEqual(0, Scores.query.count())
+
+    def test_duplicate_entries_are_rejected(self):
+        with self.app.test_client() as c:
+            payload = self.gradebook()
+            payload["scores"].append(dict(payload["scores"][0]))
+            resp = self.submit(c, payload)
+
+            self.assertEqual(400, resp.status_code)
+            self.assertIn("6", resp.get_json()["msg"])
+
+    def test_single_score_submission(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c, phone="teacher")
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+            score = {
+                "class_id": 1,
+                "subject_id": 1,
+                "student_id": 1,
+                "term": "first",
+                "session": "2024/2025",
+                "type": "CA",
+                "score": 12,
+            }
+
+            resp = c.post("/api/scores/", headers=headers, json=score)
+            self.assertEqual(201, resp.status_code, msg=resp.get_json())
+
+            resp = c.post("/api/scores/", headers=headers, json=score)
+            self.assertEqual(409, resp.status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
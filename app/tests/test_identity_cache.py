@@ -0,0 +1,146 @@
+import unittest
+
+import fakeredis
+from redis.exceptions import ConnectionError
+
+from app import create_app, db
+from app.helpers.identity_cache import IdentityCache
+from app.helpers.test_helpers import register_and_login_user
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+    IDENTITY_CACHE_REDIS = True
+
+
+class BrokenRedis(object):
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        return fail
+
+
+class TestIdentityCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_profile_is_served_from_cache(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            for _ in range(3):
+                resp = c.get("/api/users/profile", headers=headers)
+                json_data = resp.get_json()
+
+                self.assertEqual(200, resp.status_code, msg=json_data)
+                self.assertEqual("tim", json_data["first_name"])
+                self.assertNotIn("password_hash", json_data)
+
+            stats = self.app.identity_cache.stats()
+            self.assertEqual(1, stats["misses"])
+            self.assertEqual(2, stats["hits"])
+
+    def test_redis_tier_is_shared(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            c.get("/api/users/profile", headers=headers)
+
+            # Simulate another worker with an empty local cache
+            self.app.identity_cache.entries.clear()
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+            self.assertEqual("1990-01-01T00:00:00", resp.get_json()["birthday"])
+            self.assertEqual(1, self.app.identity_cache.stats()["redis_hits"])
+
+    def test_update_user_invalidates_cache(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            c.get("/api/users/profile", headers=headers)
+
+            resp = c.put("/api/users/1", headers=headers, json={"first_name": "tom"})
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual("tom", resp.get_json()["first_name"])
+
+    def test_delete_user_invalidates_cache(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            c.get("/api/users/profile", headers=headers)
+
+            resp = c.delete("/api/users/1", headers=headers)
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual(401, resp.status_code, msg=resp.get_json())
+
+    def test_invalidation_reaches_other_workers(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            # Local tier of another worker
+            other = IdentityCache(ttl=30, use_redis=True)
+            self.assertEqual(0, other.get(1).token_version)
+            self.assertEqual(0, other.get(1).token_version)
+            self.assertEqual(1, other.hits)
+
+            resp = c.delete("/api/auth/logout/all", headers=headers)
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            self.assertEqual(1, other.get(1).token_version)
+            self.assertEqual(2, other.misses)
+
+    def test_local_cache_does_not_use_redis(self):
+        with self.app.test_client() as c:
+            register_and_login_user(c)
+
+        cache = IdentityCache(ttl=30)
+        self.app.redis = BrokenRedis()
+
+        self.assertEqual(0, cache.get(1).token_version)
+        self.assertEqual(0, cache.get(1).token_version)
+        self.assertEqual((1, 1), (cache.misses, cache.hits))
+
+        cache.invalidate(1)
+        cache.get(1)
+        self.assertEqual(2, cache.misses)
+
+    def test_cached_user_does_not_load_other_columns(self):
+        with self.app.test_client() as c:
+            register_and_login_user(c)
+
+        user = self.app.identity_cache.get(1)
+
+        with self.assertRaises(AttributeError):
+            user.password_hash
+
+        self.assertIsNone(user._instance)
+        self.assertEqual([], user.get_tasks_in_progress())
+
+
+if __name__ == "__main__":
+    unittest.main()
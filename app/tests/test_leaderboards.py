@@ -0,0 +1,165 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.leaderboards import leaderboard_key, rebuild_leaderboards
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Classes, Scores, Subjects, Users
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+BOARD = {"class_id": 1, "subject_id": 1, "term": "first", "session": "2024/2025"}
+
+
+class TestLeaderboards(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add(Classes(name="JSS1"))
+        db.session.add(Subjects(name="Maths"))
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in range(4)
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, c) -> dict:
+        tokens = register_and_login_user(c, phone="teacher")
+        return {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+    def submit(self, c, headers, scores: dict) -> None:
+        """
+        Submits the CA and exam scores of each student on BOARD
+        """
+        resp = c.post(
+            "/api/scores/bulk",
+            headers=headers,
+            json={
+                **BOARD,
+                "scores": [
+                    {"student_id": student_id, "type": score_type, "score": score}
+                    for student_id, (ca, exam) in scores.items()
+                    for score_type, score in (("CA", ca), ("exam", exam))
+                ],
+            },
+        )
+        self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+    def position(self, c, headers, student_id: int):
+        return c.get(
+            "/api/scores/leaderboard/{}".format(student_id),
+            headers=headers,
+            query_string=BOARD,
+        )
+
+    def test_bulk_submission_updates_leaderboard(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+            self.submit(c, headers, {1: (10, 50), 2: (20, 40), 3: (30, 50), 4: (5, 5)})
+
+            resp = c.get(
+                "/api/scores/leaderboard",
+                headers=headers,
+                query_string={**BOARD, "limit": 3},
+            )
+
+            self.assertEqual(
+                [
+                    {"student_id": 3, "total": 80, "position": 1},
+                    {"student_id": 2, "total": 60, "position": 2},
+                    {"student_id": 1, "total": 60, "position": 2},
+                ],
+                resp.get_json()["data"],
+            )
+
+            json_data = self.position(c, headers, 1).get_json()
+            self.assertEqual(2, json_data["position"])
+            self.assertEqual(4, json_data["out_of"])
+            self.assertEqual(4, self.position(c, headers, 4).get_json()["position"])
+
+    def test_single_score_writes_update_leaderboard(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+            self.submit(c, headers, {1: (10, 50), 2: (20, 50)})
+
+            resp = c.post(
+                "/api/scores/",
+                headers=headers,
+                json={**BOARD, "student_id": 1, "type": "test", "score": 15},
+            )
+            self.assertEqual(201, resp.status_code, msg=resp.get_json())
+            self.assertEqual(1, self.position(c, headers, 1).get_json()["position"])
+
+            score = Scores.query.filter_by(student_id=2, type="exam").one()
+            c.put("/api/scores/{}".format(score.id), headers=headers, json={"score": 70})
+            self.assertEqual(90, self.position(c, headers, 2).get_json()["total"])
+            self.assertEqual(2, self.position(c, headers, 1).get_json()["position"])
+
+            # Moving a score to another term moves it to another leaderboard
+            score = Scores.query.filter_by(student_id=2, type="CA").one()
+            c.put("/api/scores/{}".format(score.id), headers=headers, json={"term": "second"})
+            self.assertEqual(70, self.position(c, headers, 2).get_json()["total"])
+
+            for score in Scores.query.filter_by(student_id=1).all():
+                c.delete("/api/scores/{}".format(score.id), headers=headers)
+
+            self.assertEqual(404, self.position(c, headers, 1).status_code)
+            self.assertEqual(1, self.position(c, headers, 2).get_json()["out_of"])
+
+    def test_rebuild_restores_leaderboards(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+            self.submit(c, headers, {1: (10, 50), 2: (20, 50)})
+
+            key = leaderboard_key(**BOARD)
+            expected = self.app.redis.zrange(key, 0, -1, withscores=True)
+            self.app.redis.delete(key)
+            self.app.redis.zadd(leaderboard_key(9, 9, "first", "2024/2025"), {1: 1})
+
+            self.assertEqual(1, rebuild_leaderboards(batch_size=1))
+            self.assertEqual(expected, self.app.redis.zrange(key, 0, -1, withscores=True))
+            self.assertEqual([key.encode()], self.app.redis.keys("leaderboard*"))
+
+    def test_missing_arguments(self):
+        with self.app.test_client() as c:
+            resp = c.get(
+                "/api/scores/leaderboard",
+                headers=self.login(c),
+                query_string={"class_id": 1},
+            )
+
+            self.assertEqual(400, resp.status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Subjects, Users
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def walk(self, c, url: str, headers: dict) -> list:
+        pages = []
+        after = None
+
+        while True:
+            query = {"limit": 2}
+            if after:
+                query["after"] = after
+
+            resp = c.get(url, headers=headers, query_string=query)
+            json_data = resp.get_json()
+            self.assertEqual(200, resp.status_code, msg=json_data)
+
+            pages.append([row["id"] for row in json_data["data"]])
+            after = json_data["next_cursor"]
+
+            if after is None:
+                return pages
+
+    def test_pages_are_stable_with_equal_created_at(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            # Rows created in the same instant are ordered by id
+            created_at = datetime(2024, 1, 1)
+            db.session.execute(
+                db.insert(Users),
+                [
+                    {
+                        "first_name": "student",
+                        "last_name": str(i),
+                        "email": "student{}@test.com".format(i),
+                        "phone": "0900{}".format(i),
+                        "password_hash": "x",
+                        "role": "student",
+                        "birthday": datetime(2010, 1, 1),
+                        "created_at": created_at,
+                    }
+                    for i in range(4)
+                ],
+            )
+            db.session.commit()
+
+            self.assertEqual([[2, 3], [4, 5], [1]], self.walk(c, "/api/users/", headers))
+            self.assertEqual(
+                [[2, 3], [4, 5]], self.walk(c, "/api/users/role/student", headers)
+            )
+
+    def test_subjects_are_paginated(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            db.session.add_all([Subjects(name="subject {}".format(i)) for i in range(3)])
+            db.session.commit()
+
+            self.assertEqual([[1, 2], [3]], self.walk(c, "/api/subjects/", headers))
+
+    def test_invalid_parameters(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            for query in ({"after": "not-a-cursor"}, {"limit": "x"}, {"limit": 0}):
+                resp = c.get("/api/users/", headers=headers, query_string=query)
+                self.assertEqual(400, resp.status_code, msg=resp.get_json())
+
+    def test_created_at_is_required(self):
+        # Cursors are built from created_at, rows can not go without one
+        with self.assertRaises(IntegrityError):
+            db.session.execute(db.insert(Subjects).values(name="subject", created_at=None))
+
+
+if __name__ == "__main__":
+    unittest.main()
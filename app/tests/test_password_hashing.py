@@ -0,0 +1,88 @@
+import unittest
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.password_hashing import HashingPoolSaturated, PasswordHasher
+from app.helpers.test_helpers import register_and_login_user
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+    PASSWORD_HASH_ITERATIONS = 1000
+    PASSWORD_HASH_POOL_SIZE = 1
+    PASSWORD_HASH_MAX_PENDING = 1
+
+
+class TestPasswordHashing(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        self.app.password_hasher.shutdown()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_hashing_runs_on_pool(self):
+        hasher = self.app.password_hasher
+        password_hash = hasher.generate("dog")
+
+        self.assertTrue(password_hash.startswith("pbkdf2:sha256:1000$"))
+        self.assertTrue(hasher.check(password_hash, "dog"))
+        self.assertFalse(hasher.check(password_hash, "cat"))
+        self.assertIsNotNone(hasher.executor)
+
+    def test_login_with_pool(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+
+            self.assertTrue(tokens["access_token"])
+
+    def test_saturated_pool_returns_503(self):
+        with self.app.test_client() as c:
+            register_and_login_user(c)
+
+            # Occupy the only slot of the pool
+            self.app.password_hasher.slots.acquire()
+
+            try:
+                resp = c.post(
+                    "/api/auth/login", json={"email": "tim@test.com", "password": "secret"}
+                )
+            finally:
+                self.app.password_hasher.slots.release()
+
+            self.assertEqual(503, resp.status_code, msg=resp.get_json())
+            self.assertEqual("1", resp.headers["Retry-After"])
+
+    def test_timed_out_hash_keeps_its_slot(self):
+        hasher = PasswordHasher(
+            method="pbkdf2:sha256:2000000", pool_size=1, max_pending=1, timeout=0.01
+        )
+
+        try:
+            with self.assertRaises(HashingPoolSaturated):
+                hasher.generate("dog")
+
+            # The first hash is still running on the pool
+            with self.assertRaises(HashingPoolSaturated):
+                hasher.generate("dog")
+        finally:
+            hasher.shutdown()
+
+        self.assertTrue(hasher.slots.acquire(blocking=False))
+        hasher.slots.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
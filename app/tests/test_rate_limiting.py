@@ -0,0 +1,61 @@
+import unittest
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_STORAGE_URI = "memory://"
+    RATELIMIT_APPLICATION = "30 per hour"
+    RATELIMIT_COSTS = {"dashboard.dashboard": 5, "users.get_all_users": 20}
+
+
+class TestRateLimiting(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_headers_on_every_response(self):
+        with self.app.test_client() as c:
+            resp = c.post("/api/auth/login", json={"email": "x@test.com", "password": "x"})
+
+            self.assertEqual(401, resp.status_code, msg=resp.get_json())
+            self.assertEqual("60", resp.headers["X-RateLimit-Limit"])
+            self.assertEqual("59", resp.headers["X-RateLimit-Remaining"])
+
+    def test_endpoint_cost_is_deducted_from_shared_budget(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            resp = c.get("/api/users/", headers=headers)
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            # Register, login and the call above used 22 of the 30 requests,
+            # cheap calls to other endpoints draw from the same budget
+            for _ in range(8):
+                resp = c.get("/api/users/profile", headers=headers)
+                self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            resp = c.get("/api/users/profile", headers=headers)
+            self.assertEqual(429, resp.status_code)
+            self.assertIn("Retry-After", resp.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,389 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import fakeredis
+from redis.exceptions import ConnectionError
+from rq import SimpleWorker
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.report_cards import cache_stats, collect_garbage, generate_class_reports
+from app.helpers.task_queues import init_task_queues
+from app.helpers.test_helpers import register_and_login_user
+from app.models import (
+    Classes,
+    Reports,
+    Schools,
+    Scores,
+    Subjects,
+    Users,
+    school_classes,
+    school_teachers,
+)
+from config import Config
+
+
+class BrokenRedis(object):
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("Redis is down")
+
+        return fail
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+# Exam scores of each student per subject, students 1 to 3 are in class 1
+# and student 4 in class 2
+SCORES = {
+    1: {1: 70, 2: 60},
+    2: {1: 80, 2: 40},
+    3: {1: 50, 2: 90},
+    4: {1: 30, 2: 30},
+}
+
+
+class TestReportCards(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        TestConfig.REPORTS_FOLDER = self.tmp.name
+
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app.task_queues = init_task_queues(self.app.redis)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add(
+            Schools(
+                name="Test school",
+                address="1 school road",
+                phone="0800",
+                email="school@test.com",
+                color="green",
+                motto="Learn",
+            )
+        )
+        db.session.add_all([Classes(name="JSS1"), Classes(name="JSS2")])
+        db.session.add_all([Subjects(name="Maths"), Subjects(name="English")])
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in SCORES
+            ],
+        )
+        db.session.execute(
+            db.insert(school_classes),
+            [{"school_id": 1, "class_id": 1}, {"school_id": 1, "class_id": 2}],
+        )
+        db.session.execute(
+            db.insert(Scores),
+            [
+                {
+                    "class_id": 1 if student_id < 4 else 2,
+                    "subject_id": subject_id,
+                    "student_id": student_id,
+                    "term": "first",
+                    "session": "2024/2025",
+                    "type": "exam",
+                    "score": score,
+                }
+                for student_id, subjects in SCORES.items()
+                for subject_id, score in subjects.items()
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def test_generate_class_reports(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if "FROM scores" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            summary = generate_class_reports(1, "first", "2024/2025", generator_id=1)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(
+            {"class_id": 1, "generated": 3, "rendered": 3, "created": 3, "updated": 0},
+            summary,
+        )
+        self.assertEqual(1, len(statements))
+
+        reports = Reports.query.order_by(Reports.student_id).all()
+        self.assertEqual([1, 2, 3], [r.student_id for r in reports])
+        self.assertEqual({2024}, {r.session for r in reports})
+        self.assertEqual({1}, {r.generator_id for r in reports})
+
+        # Student 1 has an average of 65, class positions and statistics are
+        # left off the cards
+        with open(os.path.join(self.tmp.name, reports[0].url)) as f:
+            html = f.read()
+
+        self.assertIn("Test school", html)
+        self.assertIn("Average 65.0", html)
+        self.assertNotIn("Position", html)
+        self.assertNotIn("66.67", html)
+
+    def test_regenerating_only_renders_changed_cards(self):
+        generate_class_reports(1, "first", "2024/2025", generator_id=1)
+        urls = {r.student_id: r.url for r in Reports.query}
+
+        summary = generate_class_reports(1, "first", "2024/2025", generator_id=2)
+
+        self.assertEqual((3, 0, 0), (summary["generated"], summary["rendered"], summary["updated"]))
+        self.assertEqual(urls, {r.student_id: r.url for r in Reports.query})
+        self.assertEqual(3, cache_stats()["hits"])
+        self.assertEqual(3, cache_stats()["misses"])
+
+        # A corrected mark only renders the card of its student, even when it
+        # moves the class statistics and positions
+        score = Scores.query.filter_by(student_id=2, subject_id=2).first()
+        score.score = 95
+        db.session.commit()
+
+        summary = generate_class_reports(1, "first", "2024/2025", generator_id=2)
+
+        self.assertEqual(1, summary["rendered"])
+        self.assertEqual(1, summary["updated"])
+        self.assertNotEqual(urls[2], Reports.query.filter_by(student_id=2).first().url)
+        self.assertEqual(urls[1], Reports.query.filter_by(student_id=1).first().url)
+        self.assertEqual(urls[3], Reports.query.filter_by(student_id=3).first().url)
+
+    def test_regenerating_updates_reports_and_keeps_comments(self):
+        generate_class_reports(1, "first", "2024/2025", generator_id=1)
+
+        report = Reports.query.filter_by(student_id=3).first()
+        report.comment = "Excellent in English"
+        db.session.commit()
+
+        summary = generate_class_reports(1, "first", "2024/2025", generator_id=2)
+
+        self.assertEqual(1, summary["updated"])
+        self.assertEqual(0, summary["created"])
+        self.assertEqual(3, Reports.query.count())
+        self.assertEqual(2, report.generator_id)
+
+        with open(os.path.join(self.tmp.name, report.url)) as f:
+            self.assertIn("Excellent in English", f.read())
+
+    def test_collect_garbage(self):
+        generate_class_reports(1, "first", "2024/2025", generator_id=1)
+
+        report = Reports.query.filter_by(student_id=3).first()
+        old_url = report.url
+        report.comment = "Excellent in English"
+        db.session.commit()
+        generate_class_reports(1, "first", "2024/2025", generator_id=1)
+
+        fresh = os.path.join(self.tmp.name, "00", "fresh.html")
+        os.makedirs(os.path.dirname(fresh), exist_ok=True)
+        open(fresh, "w").close()
+
+        past = os.path.getmtime(fresh) - 7200
+        for root, _, files in os.walk(self.tmp.name):
+            for name in files:
+                if name != "fresh.html":
+                    os.utime(os.path.join(root, name), (past, past))
+
+        self.assertEqual([old_url], collect_garbage(3600, dry_run=True))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, old_url)))
+
+        self.assertEqual([old_url], collect_garbage(3600))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, old_url)))
+        self.assertTrue(os.path.exists(fresh))
+
+        for report in Reports.query:
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, report.url)))
+
+    def login_teacher(self, c) -> dict:
+        tokens = register_and_login_user(c, role="teacher", phone="teacher")
+        teacher = Users.query.filter_by(phone="teacher").first()
+        db.session.execute(
+            db.insert(school_teachers), [{"school_id": 1, "teacher_id": teacher.id}]
+        )
+        db.session.commit()
+
+        return {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+    def test_generate_endpoint_launches_a_task_per_class(self):
+        with self.app.test_client() as c:
+            headers = self.login_teacher(c)
+
+            resp = c.post(
+                "/api/reports/generate",
+                headers=headers,
+                json={"school_id": 1, "term": "first", "session": "2024/2025"},
+            )
+            json_data = resp.get_json()
+            self.assertEqual(202, resp.status_code, msg=json_data)
+
+            jobs = self.app.task_queues["bulk"].get_jobs()
+            self.assertEqual(
+                [1, 2], sorted(job.kwargs["class_id"] for job in jobs)
+            )
+            self.assertEqual(
+                {"app.tasks.long_running_jobs.generate_reports"},
+                {job.func_name for job in jobs},
+            )
+            self.assertEqual({2}, {job.retries_left for job in jobs})
+
+            resp = c.get(
+                "/api/reports/generate/{}".format(json_data["batch_id"]), headers=headers
+            )
+            status = resp.get_json()
+            self.assertEqual(200, resp.status_code, msg=status)
+            self.assertEqual(0, status["progress"])
+            self.assertEqual([1, 2], [c["class_id"] for c in status["classes"]])
+
+            # Failed classes are told apart from finished ones
+            jobs[0].meta["error"] = "failed"
+            jobs[0].save_meta()
+
+            resp = c.get(
+                "/api/reports/generate/{}".format(json_data["batch_id"]), headers=headers
+            )
+            errors = {c["class_id"]: c["error"] for c in resp.get_json()["classes"]}
+            failed = jobs[0].kwargs["class_id"]
+            self.assertEqual({failed: "failed", 3 - failed: None}, errors)
+
+            resp = c.post(
+                "/api/reports/generate",
+                headers=headers,
+                json={"class_id": 1, "term": "first", "session": "2024/2025"},
+            )
+            self.assertEqual(400, resp.status_code, msg=resp.get_json())
+
+    def test_failed_task_completes_after_its_last_retry(self):
+        from app.tasks import long_running_jobs
+
+        jobs_app = long_running_jobs.app
+        # Run the task against the test app instead of the default one
+        long_running_jobs.app = self.app
+
+        try:
+            # Without a term the generation fails on every attempt
+            task = db.session.get(Users, 1).launch_task(
+                "generate_reports", "Generating report cards...", class_id=1
+            )
+            db.session.commit()
+
+            queue = self.app.task_queues["bulk"]
+            worker = SimpleWorker([queue], connection=self.app.redis)
+
+            worker.work(burst=True)
+            job = task.get_rq_job()
+            self.assertEqual(1, job.retries_left)
+            self.assertIn(job.id, queue.scheduled_job_registry)
+            db.session.refresh(task)
+            self.assertFalse(task.complete)
+
+            # The last attempt marks the task as done
+            job.retries_left = 0
+            job.save()
+            queue.scheduled_job_registry.remove(job)
+            queue.enqueue_job(job)
+
+            worker.work(burst=True)
+            self.assertEqual(100, task.get_rq_job().meta["progress"])
+            db.session.refresh(task)
+            self.assertTrue(task.complete)
+        finally:
+            long_running_jobs.app = jobs_app
+
+    def test_generate_endpoint_is_scoped_to_the_schools_of_the_user(self):
+        db.session.add(
+            Schools(
+                name="Other school",
+                address="2 school road",
+                phone="0900",
+                email="other@test.com",
+            )
+        )
+        db.session.add(Classes(name="SS1"))
+        db.session.execute(db.insert(school_classes), [{"school_id": 2, "class_id": 3}])
+        db.session.commit()
+
+        with self.app.test_client() as c:
+            headers = self.login_teacher(c)
+
+            for body in ({"school_id": 2}, {"class_id": 3}):
+                resp = c.post(
+                    "/api/reports/generate",
+                    headers=headers,
+                    json=dict(body, term="first", session="2024/2025"),
+                )
+                self.assertEqual(403, resp.status_code, msg=body)
+
+            self.assertEqual(0, self.app.task_queues["bulk"].count)
+
+    def test_generate_endpoint_validation(self):
+        with self.app.test_client() as c:
+            headers = self.login_teacher(c)
+
+            for body, status_code in (
+                ({"term": "first", "session": "2024/2025"}, 400),
+                ({"class_id": 1, "school_id": 1, "term": "first", "session": "2024/2025"}, 400),
+                ({"class_id": 1, "term": "first", "session": "this year"}, 400),
+                ({"class_id": 9, "term": "first", "session": "2024/2025"}, 404),
+                ({"school_id": 9, "term": "first", "session": "2024/2025"}, 404),
+            ):
+                resp = c.post("/api/reports/generate", headers=headers, json=body)
+                self.assertEqual(status_code, resp.status_code, msg=body)
+
+            resp = c.get("/api/reports/generate/unknown", headers=headers)
+            self.assertEqual(404, resp.status_code)
+
+    def test_cache_stats_endpoint(self):
+        generate_class_reports(1, "first", "2024/2025", generator_id=1)
+
+        with self.app.test_client() as c:
+            headers = self.login_teacher(c)
+
+            resp = c.get("/api/reports/cache-stats", headers=headers)
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual(3, resp.json["misses"])
+
+            tokens = register_and_login_user(
+                c, email="student@test.com", role="student", phone="student"
+            )
+            resp = c.get(
+                "/api/reports/cache-stats",
+                headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+            )
+            self.assertEqual(403, resp.status_code)
+
+            self.app.redis = BrokenRedis()
+            resp = c.get("/api/reports/cache-stats", headers=headers)
+            self.assertEqual(503, resp.status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.artifact_store import LocalArtifactStore
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Reports
+from config import Config
+
+DIGEST = "ab" + "0123456789abcdef" * 3 + "0123456789abcd"
+PATH = "ab/{}.pdf".format(DIGEST)
+CONTENT = bytes(range(256)) * 4096
+
+
+class TestConfig(Config):
+    TESTING = True
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestReportFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # Concurrent requests need a database shared between connections
+        TestConfig.SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(
+            self.tmp.name, "test.db"
+        )
+        TestConfig.REPORTS_FOLDER = os.path.join(self.tmp.name, "report_cards")
+
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.app.report_store.write(PATH, CONTENT)
+        db.session.add_all(
+            [
+                Reports(url=PATH, term="first", session=2024, student_id=1),
+                Reports(
+                    url="cd/missing.pdf",
+                    term="first",
+                    session=2024,
+                    student_id=1,
+                    generator_id=1,
+                ),
+            ]
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def login(self, c) -> dict:
+        tokens = register_and_login_user(c)
+        return {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+    def test_download(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+            resp = c.get("/api/reports/1/file", headers=headers)
+
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual(CONTENT, resp.data)
+            self.assertEqual("application/pdf", resp.mimetype)
+            self.assertEqual("bytes", resp.headers["Accept-Ranges"])
+            self.assertEqual((DIGEST, False), resp.get_etag())
+            self.assertIn("report-1.pdf", resp.headers["Content-Disposition"])
+
+            resp = c.get(
+                "/api/reports/1/file",
+                headers=dict(headers, **{"If-None-Match": '"{}"'.format(DIGEST)}),
+            )
+
+            self.assertEqual(304, resp.status_code)
+            self.assertEqual(b"", resp.data)
+
+    def test_range_request(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+            resp = c.get(
+                "/api/reports/1/file", headers=dict(headers, Range="bytes=1000-1999")
+            )
+
+            self.assertEqual(206, resp.status_code)
+            self.assertEqual(CONTENT[1000:2000], resp.data)
+            self.assertEqual(
+                "bytes 1000-1999/{}".format(len(CONTENT)), resp.headers["Content-Range"]
+            )
+
+            # A range past the end of the file cannot be satisfied
+            resp = c.get(
+                "/api/reports/1/file",
+                headers=dict(headers, Range="bytes={}-".format(len(CONTENT) + 10)),
+            )
+
+            self.assertEqual(416, resp.status_code)
+
+            # A stale If-Range gets the whole file
+            resp = c.get(
+                "/api/reports/1/file",
+                headers=dict(headers, Range="bytes=0-9", **{"If-Range": '"stale"'}),
+            )
+
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual(len(CONTENT), len(resp.data))
+
+    def test_concurrent_partial_reads(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+        chunk = len(CONTENT) // 16
+
+        def read(start: int) -> bytes:
+            with self.app.test_client() as c:
+                resp = c.get(
+                    "/api/reports/1/file",
+                    headers=dict(
+                        headers, Range="bytes={}-{}".format(start, start + chunk - 1)
+                    ),
+                )
+                self.assertEqual(206, resp.status_code)
+
+                return resp.data
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            parts = list(executor.map(read, range(0, len(CONTENT), chunk)))
+
+        self.assertEqual(CONTENT, b"".join(parts))
+
+    def test_missing_report_and_file(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+            self.assertEqual(404, c.get("/api/reports/2/file", headers=headers).status_code)
+            self.assertEqual(404, c.get("/api/reports/9/file", headers=headers).status_code)
+
+    def test_download_is_scoped_to_the_reports_of_the_user(self):
+        with self.app.test_client() as c:
+            # The reports belong to the first user, other users cannot reach them
+            self.login(c)
+
+            for role in ("student", "admin"):
+                tokens = register_and_login_user(
+                    c, email="{}@test.com".format(role), role=role, phone=role
+                )
+                headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+                resp = c.get("/api/reports/1/file", headers=headers)
+                self.assertEqual(404, resp.status_code, msg=role)
+
+    def test_report_paths_are_set_by_the_generator_only(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+            # Clients cannot point a report at another file of the store
+            resp = c.put("/api/reports/2", headers=headers, json={"url": PATH})
+            self.assertEqual(400, resp.status_code)
+
+            body = {"term": "first", "session": 2025, "student_id": 1}
+            resp = c.post("/api/reports/", headers=headers, json=dict(body, url=PATH))
+            self.assertEqual(400, resp.status_code)
+
+            resp = c.post("/api/reports/", headers=headers, json=body)
+            self.assertEqual(201, resp.status_code)
+            self.assertEqual(404, c.get("/api/reports/3/file", headers=headers).status_code)
+
+        self.assertEqual("cd/missing.pdf", db.session.get(Reports, 2).url)
+        self.assertIsNone(db.session.get(Reports, 3).url)
+
+    def test_local_store(self):
+        store = LocalArtifactStore(os.path.join(self.tmp.name, "store"))
+
+        store.write("a/b/card.html", "<p>card</p>")
+
+        self.assertTrue(store.touch("a/b/card.html"))
+        self.assertFalse(store.touch("a/b/other.html"))
+        self.assertEqual(["a/b/card.html"], [path for path, _ in store.iter_files()])
+
+        with self.assertRaises(ValueError):
+            store.write("../outside.html", "<p>card</p>")
+
+        self.assertTrue(store.delete("a/b/card.html"))
+        self.assertFalse(store.delete("a/b/card.html"))
+        self.assertEqual([], os.listdir(store.root))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import text
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import (
+    Classes,
+    Reports,
+    Schools,
+    Users,
+    school_classes,
+    school_students,
+    school_teachers,
+    students_classes,
+)
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestReportScope(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.headers = {}
+        with self.app.test_client() as c:
+            for name, role in (("owner", "admin"), ("teacher", "teacher"), ("student", "student")):
+                tokens = register_and_login_user(
+                    c, email="{}@test.com".format(name), role=role, phone=name
+                )
+                self.headers[name] = {
+                    "Authorization": "Bearer {}".format(tokens["access_token"])
+                }
+
+        # Users 1 to 3 are the owner, the teacher and the student of the
+        # school, user 4 is a student of no school
+        db.session.add(
+            Users(
+                first_name="other",
+                last_name="student",
+                email="other@test.com",
+                phone="other",
+                password_hash="x",
+                role="student",
+                birthday=datetime(2010, 1, 1),
+            )
+        )
+        db.session.add(
+            Schools(
+                name="Test school",
+                address="1 school road",
+                phone="0800",
+                email="school@test.com",
+                owner_id=1,
+            )
+        )
+        db.session.add(Classes(name="JSS1"))
+        db.session.flush()
+        db.session.execute(db.insert(school_teachers), [{"school_id": 1, "teacher_id": 2}])
+        db.session.execute(db.insert(school_students), [{"school_id": 1, "student_id": 3}])
+        db.session.execute(db.insert(school_classes), [{"school_id": 1, "class_id": 1}])
+        db.session.execute(db.insert(students_classes), [{"class_id": 1, "student_id": 3}])
+        db.session.execute(
+            db.insert(Reports),
+            [
+                {"url": "1.pdf", "term": "first", "session": 2024, "student_id": 3},
+                {"url": "2.pdf", "term": "second", "session": 2024, "student_id": 3},
+                {"url": "3.pdf", "term": "first", "session": 2024, "student_id": 4, "generator_id": 2},
+                {"url": "4.pdf", "term": "first", "session": 2023, "student_id": 4},
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def list_ids(self, c, user: str, query: str = "") -> list:
+        resp = c.get("/api/reports/" + query, headers=self.headers[user])
+        self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+        return [report["id"] for report in resp.get_json()["data"]]
+
+    def test_reports_are_scoped_to_the_user(self):
+        with self.app.test_client() as c:
+            self.assertEqual([1, 2], self.list_ids(c, "student"))
+            self.assertEqual([1, 2], self.list_ids(c, "owner"))
+            # Teachers also see the reports they generated
+            self.assertEqual([1, 2, 3], self.list_ids(c, "teacher"))
+
+            self.assertEqual(200, c.get("/api/reports/1", headers=self.headers["student"]).status_code)
+            self.assertEqual(404, c.get("/api/reports/3", headers=self.headers["student"]).status_code)
+            self.assertEqual(404, c.get("/api/reports/4", headers=self.headers["teacher"]).status_code)
+
+    def test_only_staff_can_change_reports(self):
+        with self.app.test_client() as c:
+            student, teacher = self.headers["student"], self.headers["teacher"]
+
+            # Students cannot change or delete their own reports
+            resp = c.put("/api/reports/1", headers=student, json={"comment": "mine"})
+            self.assertEqual(403, resp.status_code)
+            self.assertEqual(403, c.delete("/api/reports/1", headers=student).status_code)
+
+            # Report 4 is of a student of no school and generated by nobody
+            resp = c.put("/api/reports/4", headers=teacher, json={"comment": "Good term"})
+            self.assertEqual(404, resp.status_code)
+            self.assertEqual(404, c.delete("/api/reports/4", headers=self.headers["owner"]).status_code)
+
+            # Reports cannot be moved to another student or generator
+            for body in ({"student_id": 4}, {"generator_id": 1}):
+                resp = c.put("/api/reports/1", headers=teacher, json=body)
+                self.assertEqual(400, resp.status_code, msg=body)
+
+            resp = c.put("/api/reports/1", headers=teacher, json={"comment": "Good term"})
+            self.assertEqual(200, resp.status_code)
+            self.assertEqual(200, c.delete("/api/reports/2", headers=self.headers["owner"]).status_code)
+
+        self.assertEqual("Good term", db.session.get(Reports, 1).comment)
+        self.assertEqual(3, db.session.get(Reports, 1).student_id)
+        self.assertIsNone(db.session.get(Reports, 2))
+        self.assertIsNone(db.session.get(Reports, 4).comment)
+
+    def test_term_and_session_filters(self):
+        with self.app.test_client() as c:
+            self.assertEqual([1, 3], self.list_ids(c, "teacher", "?term=first"))
+            self.assertEqual([2], self.list_ids(c, "student", "?term=second&session=2024"))
+            self.assertEqual([], self.list_ids(c, "teacher", "?session=2023"))
+
+            resp = c.get("/api/reports/?term=fourth", headers=self.headers["teacher"])
+            self.assertEqual(400, resp.status_code)
+
+    def test_student_listing_uses_the_index(self):
+        query = (
+            Reports.query.filter(Reports.student_id == 3)
+            .filter_by(term="first", session=2024)
+            .order_by(Reports.created_at, Reports.id)
+        )
+        statement = query.statement.compile(
+            db.engine, compile_kwargs={"literal_binds": True}
+        )
+
+        plan = " ".join(
+            str(row[-1])
+            for row in db.session.execute(text("EXPLAIN QUERY PLAN {}".format(statement)))
+        )
+
+        self.assertIn("ix_reports_student_term_session", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
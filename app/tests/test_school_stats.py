@@ -0,0 +1,169 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.school_stats import get_school_stats, rebuild_school_stats
+from app.models import (
+    Classes,
+    Reports,
+    Schools,
+    SchoolStats,
+    Subjects,
+    Users,
+    school_students,
+)
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+def create_user(name: str, role: str = "student") -> Users:
+    user = Users(
+        first_name=name,
+        last_name="apple",
+        email="{}@test.com".format(name),
+        phone=name,
+        password_hash="x",
+        role=role,
+        birthday=datetime(2010, 1, 1),
+    )
+    db.session.add(user)
+    db.session.flush()
+
+    return user
+
+
+class TestSchoolStats(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        self.owner = create_user("owner", role="admin")
+        self.school = Schools(
+            name="school",
+            address="1 road",
+            phone="1",
+            email="school@school.com",
+            owner_id=self.owner.id,
+        )
+        db.session.add(self.school)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def assertStats(self, **expected):
+        stats = get_school_stats(self.school.id)
+
+        for column, value in expected.items():
+            self.assertEqual(value, stats[column], msg=column)
+
+        self.assertEqual([], rebuild_school_stats(verify_only=True))
+
+    def test_new_school_has_a_stats_row(self):
+        self.assertIsNotNone(db.session.get(SchoolStats, self.school.id))
+        self.assertStats(student_count=0, teacher_count=0, reports_count=0)
+
+    def test_relationship_changes_update_counts(self):
+        students = [create_user("student{}".format(i)) for i in range(3)]
+        self.school.students.extend(students)
+        self.school.teachers.append(create_user("teacher", role="teacher"))
+        self.school.classes.append(Classes(name="JSS1"))
+        self.school.subjects.append(Subjects(name="Maths"))
+        db.session.commit()
+
+        self.assertStats(
+            student_count=3, teacher_count=1, class_count=1, subject_count=1
+        )
+
+        self.school.students.remove(students[0])
+        db.session.commit()
+
+        self.assertStats(student_count=2)
+
+    def test_reports_count_students_with_reports(self):
+        students = [create_user("student{}".format(i)) for i in range(3)]
+        db.session.execute(
+            db.insert(school_students),
+            [{"school_id": self.school.id, "student_id": s.id} for s in students],
+        )
+        db.session.execute(
+            db.insert(Reports),
+            [
+                {"url": "first.pdf", "term": "first", "session": 2024, "student_id": students[0].id},
+                {"url": "second.pdf", "term": "second", "session": 2024, "student_id": students[0].id},
+                {"url": "first.pdf", "term": "first", "session": 2024, "student_id": students[1].id},
+            ],
+        )
+        db.session.commit()
+        self.assertStats(student_count=3, reports_count=2)
+
+        # The student keeps counting while one of their reports is left
+        db.session.execute(db.delete(Reports).where(Reports.term == "first"))
+        db.session.commit()
+        self.assertStats(reports_count=1)
+
+        # Moving a report to another student moves the count with it
+        db.session.execute(
+            db.update(Reports)
+            .where(Reports.student_id == students[0].id)
+            .values(student_id=students[2].id)
+        )
+        db.session.commit()
+        self.assertStats(reports_count=1)
+
+        db.session.execute(
+            db.update(Reports).values(student_id=students[0].id)
+        )
+        db.session.commit()
+        self.assertStats(reports_count=1)
+
+        # Students carry their reports when they leave a school
+        db.session.execute(
+            db.delete(school_students).where(
+                school_students.c.student_id == students[0].id
+            )
+        )
+        db.session.commit()
+        self.assertStats(student_count=2, reports_count=0)
+
+    def test_rollback_reverts_counts(self):
+        self.school.students.append(create_user("student"))
+        db.session.flush()
+        db.session.rollback()
+
+        self.assertStats(student_count=0)
+
+    def test_rebuild_fixes_drifted_rows(self):
+        self.school.students.append(create_user("student"))
+        db.session.commit()
+
+        db.session.execute(
+            db.update(SchoolStats).values(student_count=10, teacher_count=4)
+        )
+        db.session.commit()
+
+        mismatches = rebuild_school_stats(verify_only=True)
+        self.assertEqual(1, len(mismatches))
+        self.assertEqual(10, mismatches[0]["actual"]["student_count"])
+        self.assertEqual(1, mismatches[0]["expected"]["student_count"])
+
+        self.assertEqual(mismatches, rebuild_school_stats())
+        self.assertStats(student_count=1, teacher_count=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Classes, Scores, Subjects, Users, school_classes
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+    SCORES_EXPORT_BATCH_SIZE = 7
+
+
+class TestScoreExport(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add_all([Classes(name="JSS1"), Classes(name="JSS2")])
+        db.session.add(Subjects(name="Maths"))
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in range(10)
+            ],
+        )
+        db.session.execute(
+            db.insert(school_classes), [{"school_id": 1, "class_id": 1}]
+        )
+        db.session.execute(
+            db.insert(Scores),
+            [
+                {
+                    "class_id": 1 + student_id % 2,
+                    "subject_id": 1,
+                    "student_id": student_id,
+                    "term": term,
+                    "session": "2024/2025",
+                    "type": "exam",
+                    "score": student_id,
+                }
+                for student_id in range(1, 11)
+                for term in ("first", "second")
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def export(self, c, **query_string):
+        tokens = register_and_login_user(c, phone="registrar")
+
+        return c.get(
+            "/api/scores/export",
+            headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+            query_string=query_string,
+        )
+
+    def test_ndjson_export(self):
+        with self.app.test_client() as c:
+            resp = self.export(c, term="first")
+            self.assertTrue(resp.is_streamed)
+            self.assertEqual("application/x-ndjson", resp.mimetype)
+
+            rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+            self.assertEqual(10, len(rows))
+            self.assertEqual({"first"}, {row["term"] for row in rows})
+            self.assertEqual("Maths", rows[0]["subject_name"])
+            self.assertEqual("student", rows[0]["student_first_name"])
+
+    def test_csv_export_filtered_by_school(self):
+        with self.app.test_client() as c:
+            resp = self.export(c, format="csv", school_id=1, session="2024/2025")
+            self.assertEqual("text/csv", resp.mimetype)
+
+            rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+
+            self.assertEqual(10, len(rows))
+            self.assertEqual({"JSS1"}, {row["class_name"] for row in rows})
+            self.assertEqual(
+                sorted(str(i) for i in range(2, 11, 2)),
+                sorted({row["score"] for row in rows}),
+            )
+
+    def test_export_reads_from_a_server_side_cursor(self):
+        options = []
+
+        def record(conn, clauseelement, multiparams, params, execution_options):
+            if "yield_per" in execution_options:
+                options.append(execution_options["yield_per"])
+
+        event.listen(db.engine, "before_execute", record)
+        try:
+            with self.app.test_client() as c:
+                chunks = list(self.export(c).response)
+        finally:
+            event.remove(db.engine, "before_execute", record)
+
+        self.assertEqual([7], options)
+        # 20 rows in chunks of at most 7 rows
+        self.assertEqual(3, len([chunk for chunk in chunks if chunk]))
+
+    def test_invalid_format(self):
+        with self.app.test_client() as c:
+            self.assertEqual(400, self.export(c, format="xlsx").status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
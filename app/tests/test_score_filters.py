@@ -0,0 +1,150 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.pagination import encode_cursor
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Scores
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestScoreFilters(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        # 2 classes x 2 subjects x 5 students x 2 terms x 2 sessions x 2 types
+        db.session.execute(
+            db.insert(Scores),
+            [
+                {
+                    "class_id": class_id,
+                    "subject_id": subject_id,
+                    "student_id": student_id,
+                    "term": term,
+                    "session": session,
+                    "type": score_type,
+                    "score": 10,
+                    "created_at": datetime(2024, 1, 1),
+                }
+                for class_id in (1, 2)
+                for subject_id in (1, 2)
+                for student_id in range(1, 6)
+                for term in ("first", "second")
+                for session in ("2023/2024", "2024/2025")
+                for score_type in ("CA", "exam")
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def get_scores(self, c, **query_string):
+        tokens = register_and_login_user(c)
+
+        return c.get(
+            "/api/scores/",
+            headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+            query_string=query_string,
+        )
+
+    def query_plan(self, c, **query_string) -> str:
+        """
+        Returns the SQLite query plan of the scores query run by the endpoint
+        """
+        statements = []
+
+        def record(conn, cursor, statement, parameters, *args):
+            if statement.startswith("SELECT") and "FROM scores" in statement:
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            resp = self.get_scores(c, **query_string)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(200, resp.status_code, msg=resp.get_json())
+        statement, parameters = statements[-1]
+        plan = db.session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        )
+
+        return "\n".join(row[-1] for row in plan)
+
+    def test_filters(self):
+        with self.app.test_client() as c:
+            resp = self.get_scores(
+                c, class_id=1, subject_id=2, term="first", session="2024/2025"
+            )
+            data = resp.get_json()["data"]
+
+            self.assertEqual(10, len(data))
+            self.assertEqual({"first"}, {score["term"] for score in data})
+            self.assertEqual({"2024/2025"}, {score["session"] for score in data})
+
+            resp = self.get_scores(c, student_id=3, session="2023/2024", type="exam")
+            self.assertEqual(8, len(resp.get_json()["data"]))
+
+    def test_filtered_pages(self):
+        with self.app.test_client() as c:
+            filters = {"class_id": 2, "subject_id": 1, "term": "second", "session": "2023/2024"}
+            first = self.get_scores(c, limit=6, **filters).get_json()
+            second = self.get_scores(
+                c, limit=6, after=first["next_cursor"], **filters
+            ).get_json()
+
+            self.assertEqual(4, len(second["data"]))
+            self.assertIsNone(second["next_cursor"])
+            self.assertFalse(
+                {s["id"] for s in first["data"]} & {s["id"] for s in second["data"]}
+            )
+
+    def test_invalid_filter(self):
+        with self.app.test_client() as c:
+            resp = self.get_scores(c, term="fourth")
+
+            self.assertEqual(400, resp.status_code)
+            self.assertIn("term", resp.get_json()["msg"])
+
+    def test_class_subject_term_session_uses_index(self):
+        with self.app.test_client() as c:
+            plan = self.query_plan(
+                c, class_id=1, subject_id=2, term="first", session="2024/2025"
+            )
+
+            self.assertIn("ix_scores_class_subject_term_session", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_student_session_uses_index(self):
+        with self.app.test_client() as c:
+            plan = self.query_plan(
+                c,
+                student_id=3,
+                session="2023/2024",
+                after=encode_cursor(datetime(2024, 1, 1), 1),
+            )
+
+            self.assertIn("ix_scores_student_session", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
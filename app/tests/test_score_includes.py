@@ -0,0 +1,135 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Classes, Scores, Subjects, Users
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestScoreIncludes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add_all([Classes(name="JSS1"), Classes(name="JSS2")])
+        db.session.add_all([Subjects(name="Maths"), Subjects(name="English")])
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in range(20)
+            ],
+        )
+        db.session.execute(
+            db.insert(Scores),
+            [
+                {
+                    "class_id": 1 + student_id % 2,
+                    "subject_id": subject_id,
+                    "student_id": student_id,
+                    "term": "first",
+                    "session": "2024/2025",
+                    "type": score_type,
+                    "score": 10,
+                }
+                for student_id in range(1, 21)
+                for subject_id in (1, 2)
+                for score_type in ("CA", "exam")
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def get_scores(self, c, headers, **query_string) -> tuple[dict, int]:
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            resp = c.get("/api/scores/", headers=headers, query_string=query_string)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        return resp, len(statements)
+
+    def login(self, c) -> dict:
+        tokens = register_and_login_user(c, phone="teacher")
+        headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+        # Warm up the blocklist filter and the identity cache
+        c.get("/api/users/profile", headers=headers)
+
+        return headers
+
+    def test_related_rows_are_included_once(self):
+        with self.app.test_client() as c:
+            resp, _ = self.get_scores(c, self.login(c), limit=80)
+            json_data = resp.get_json()
+
+            self.assertEqual(200, resp.status_code, msg=json_data)
+            self.assertEqual(80, len(json_data["data"]))
+            self.assertEqual(2, json_data["data"][0]["class_id"])
+            self.assertEqual(2, len(json_data["included"]["classes"]))
+            self.assertEqual(2, len(json_data["included"]["subjects"]))
+            self.assertEqual(20, len(json_data["included"]["students"]))
+            self.assertEqual(
+                {"id", "first_name", "last_name"},
+                set(json_data["included"]["students"][0]),
+            )
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+            _, small = self.get_scores(c, headers, limit=2)
+            _, large = self.get_scores(c, headers, limit=80)
+            _, fieldset = self.get_scores(c, headers, limit=80, fields="score")
+
+            self.assertEqual(small, large)
+            self.assertEqual(small, fieldset)
+
+    def test_include_selects_relationships(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+            resp, _ = self.get_scores(c, headers, include="students")
+            self.assertEqual(["students"], list(resp.get_json()["included"]))
+
+            resp, _ = self.get_scores(c, headers, include="")
+            self.assertEqual({}, resp.get_json()["included"])
+
+            resp, _ = self.get_scores(c, headers, include="teachers")
+            self.assertEqual(400, resp.status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import random
+import statistics
+import unittest
+from datetime import datetime
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.score_stats import check_score_stats, welford_add, welford_remove
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Classes, Scores, ScoreStats, Subjects, Users
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+BOARD = {"class_id": 1, "subject_id": 1, "term": "first", "session": "2024/2025"}
+
+
+class TestScoreStats(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add(Classes(name="JSS1"))
+        db.session.add(Subjects(name="Maths"))
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in range(5)
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def login(self, c) -> dict:
+        tokens = register_and_login_user(c, phone="teacher")
+        return {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+    def exam_stats(self, c, headers) -> dict:
+        resp = c.get(
+            "/api/scores/stats", headers=headers, query_string={**BOARD, "type": "exam"}
+        )
+        self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+        data = resp.get_json()["data"]
+        return data[0] if data else None
+
+    def assertStats(self, stats: dict, values: list):
+        self.assertEqual(len(values), stats["count"])
+        self.assertAlmostEqual(statistics.fmean(values), stats["mean"])
+        self.assertAlmostEqual(statistics.pstdev(values), stats["std"])
+        self.assertEqual(min(values), stats["min"])
+        self.assertEqual(max(values), stats["max"])
+        self.assertEqual([], check_score_stats())
+
+    def test_welford_remove_reverses_add(self):
+        random.seed(1)
+        values = [random.randint(0, 100) for _ in range(50)]
+        count, mean, m2 = 0, 0.0, 0.0
+
+        for x in values:
+            count, mean, m2 = welford_add(count, mean, m2, x)
+
+        for x in values[:20]:
+            count, mean, m2 = welford_remove(count, mean, m2, x)
+
+        self.assertEqual(30, count)
+        self.assertAlmostEqual(statistics.fmean(values[20:]), mean)
+        self.assertAlmostEqual(statistics.pvariance(values[20:]), m2 / count)
+
+    def test_stats_follow_score_writes(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+
+            resp = c.post(
+                "/api/scores/bulk",
+                headers=headers,
+                json={
+                    **BOARD,
+                    "scores": [
+                        {"student_id": i, "type": score_type, "score": 10 * i}
+                        for i in range(1, 5)
+                        for score_type in ("CA", "exam")
+                    ],
+                },
+            )
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+            self.assertStats(self.exam_stats(c, headers), [10, 20, 30, 40])
+
+            c.post(
+                "/api/scores/",
+                headers=headers,
+                json={**BOARD, "student_id": 5, "type": "exam", "score": 35},
+            )
+            self.assertStats(self.exam_stats(c, headers), [10, 20, 30, 40, 35])
+
+            # Updating the highest score recomputes the max
+            score = Scores.query.filter_by(student_id=4, type="exam").one()
+            c.put("/api/scores/{}".format(score.id), headers=headers, json={"score": 25})
+            self.assertStats(self.exam_stats(c, headers), [10, 20, 30, 25, 35])
+
+            # Resubmitting the gradebook updates the scores in place
+            c.post(
+                "/api/scores/bulk",
+                headers=headers,
+                json={**BOARD, "scores": [{"student_id": 1, "type": "exam", "score": 50}]},
+            )
+            self.assertStats(self.exam_stats(c, headers), [50, 20, 30, 25, 35])
+
+            score = Scores.query.filter_by(student_id=1, type="exam").one()
+            c.delete("/api/scores/{}".format(score.id), headers=headers)
+            self.assertStats(self.exam_stats(c, headers), [20, 30, 25, 35])
+
+            for score in Scores.query.filter_by(type="exam").all():
+                c.delete("/api/scores/{}".format(score.id), headers=headers)
+            self.assertIsNone(self.exam_stats(c, headers))
+            self.assertEqual(1, ScoreStats.query.count())
+
+    def test_check_score_stats_fixes_drift(self):
+        with self.app.test_client() as c:
+            headers = self.login(c)
+            for i in range(1, 4):
+                c.post(
+                    "/api/scores/",
+                    headers=headers,
+                    json={**BOARD, "student_id": i, "type": "exam", "score": 10 * i},
+                )
+
+            db.session.execute(db.update(ScoreStats).values(mean=99))
+            db.session.commit()
+
+            mismatches = check_score_stats()
+            self.assertEqual(1, len(mismatches))
+            self.assertEqual(20, mismatches[0]["expected"]["mean"])
+
+            self.assertEqual(mismatches, check_score_stats(fix=True))
+            self.assertStats(self.exam_stats(c, headers), [10, 20, 30])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import random
+import unittest
+from datetime import timedelta
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.task_queues import (
+    TASKS,
+    WeightedWorker,
+    enqueue_task,
+    init_task_queues,
+    parse_queue_weights,
+)
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestTaskQueues(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app.task_queues = init_task_queues(self.app.redis)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_tasks_run_on_their_queue(self):
+        for name, task in TASKS.items():
+            job = enqueue_task(name)
+
+            self.assertEqual(task["queue"], job.origin, msg=name)
+            self.assertEqual(task["timeout"], job.timeout, msg=name)
+            self.assertEqual(
+                task["retry"]["max"] if task["retry"] else None,
+                job.retries_left,
+                msg=name,
+            )
+
+        self.assertEqual(
+            ["app.tasks.long_running_jobs.remove_old_jwts"],
+            [job.func_name for job in self.app.task_queues["high"].get_jobs()],
+        )
+        self.assertEqual(2, self.app.task_queues["default"].count)
+
+        with self.assertRaises(ValueError):
+            enqueue_task("unknown")
+
+    def test_overrides_and_delayed_tasks(self):
+        job = enqueue_task("generate_reports", job_timeout=60, class_id=1)
+
+        self.assertEqual(60, job.timeout)
+        self.assertEqual({"class_id": 1}, job.kwargs)
+
+        job = enqueue_task("remove_old_jwts", delay=timedelta(seconds=60), interval=60)
+
+        self.assertEqual(0, self.app.task_queues["high"].count)
+        self.assertIn(job.id, self.app.task_queues["high"].scheduled_job_registry)
+
+    def test_parse_queue_weights(self):
+        self.assertEqual(
+            {"high": 6, "default": 3, "bulk": 1},
+            parse_queue_weights(self.app.config["TASK_QUEUE_WEIGHTS"]),
+        )
+        self.assertEqual({"bulk": 1}, parse_queue_weights("bulk"))
+
+        for value in ("low=1", "high=0", "high=fast"):
+            with self.assertRaises(ValueError):
+                parse_queue_weights(value)
+
+    def work_one(self, worker: WeightedWorker) -> str:
+        # The worker reorders its queues after each job it ran
+        _, queue = worker.dequeue_job_and_maintain_ttl(None)
+        worker.reorder_queues(reference_queue=queue)
+
+        return queue.name
+
+    def test_weighted_worker_does_not_starve_bulk(self):
+        random.seed(0)
+
+        for _ in range(100):
+            self.app.task_queues["high"].enqueue("os.getcwd")
+            self.app.task_queues["bulk"].enqueue("os.getcwd")
+
+        worker = WeightedWorker(
+            [self.app.task_queues["high"], self.app.task_queues["bulk"]],
+            weights={"high": 3, "bulk": 1},
+            connection=self.app.redis,
+        )
+        origins = [self.work_one(worker) for _ in range(100)]
+
+        # A quarter of the jobs come from bulk while high is never empty
+        self.assertGreater(origins.count("high"), 60)
+        self.assertGreater(origins.count("bulk"), 10)
+
+        # Jobs are taken from the other queues once high is empty
+        origins = [self.work_one(worker) for _ in range(100)]
+
+        self.assertEqual(100 - origins.count("high"), origins.count("bulk"))
+        self.assertEqual(0, self.app.task_queues["high"].count + self.app.task_queues["bulk"].count)
+
+
+if __name__ == "__main__":
+    unittest.main()
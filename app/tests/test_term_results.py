@@ -0,0 +1,163 @@
+import unittest
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import event
+
+from app import create_app, db
+from app.helpers.term_results import rank
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Classes, Scores, Subjects, Users
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+    SCORE_TYPE_WEIGHTS = {"CA": 1, "test": 1, "exam": 2}
+
+
+# CA, exam and others scores of each student per subject
+SCORES = {
+    1: {1: (10, 30, 50), 2: (20, 20, 0)},
+    2: {1: (20, 25, 0), 2: (10, 20, 0)},
+    3: {1: (15, 30, 0), 2: (5, 20, 0)},
+    4: {1: (5, 10, 0), 2: (5, 10, 0)},
+}
+
+
+class TestTermResults(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add(Classes(name="JSS1"))
+        db.session.add_all([Subjects(name="Maths"), Subjects(name="English")])
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in SCORES
+            ],
+        )
+        db.session.execute(
+            db.insert(Scores),
+            [
+                {
+                    "class_id": 1,
+                    "subject_id": subject_id,
+                    "student_id": student_id,
+                    "term": "first",
+                    "session": "2024/2025",
+                    "type": score_type,
+                    "score": score,
+                }
+                for student_id, subjects in SCORES.items()
+                for subject_id, scores in subjects.items()
+                for score_type, score in zip(("CA", "exam", "others"), scores)
+            ],
+        )
+        # Scores of another term are left out
+        db.session.execute(
+            db.insert(Scores),
+            [
+                {
+                    "class_id": 1,
+                    "subject_id": 1,
+                    "student_id": 4,
+                    "term": "second",
+                    "session": "2024/2025",
+                    "type": "exam",
+                    "score": 100,
+                }
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def get_results(self, c, **query_string):
+        tokens = register_and_login_user(c, phone="teacher")
+
+        return c.get(
+            "/api/scores/results",
+            headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+            query_string=query_string,
+        )
+
+    def test_rank_shares_positions_on_ties(self):
+        self.assertEqual([1, 3, 1, 4], rank([90, 80, 90, 70]))
+        self.assertEqual([], rank([]))
+
+    def test_term_results(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if "FROM scores" in statement:
+                statements.append(statement)
+
+        with self.app.test_client() as c:
+            event.listen(db.engine, "before_cursor_execute", record)
+            try:
+                resp = self.get_results(c, class_id=1, term="first", session="2024/2025")
+            finally:
+                event.remove(db.engine, "before_cursor_execute", record)
+
+            json_data = resp.get_json()
+            self.assertEqual(200, resp.status_code, msg=json_data)
+            self.assertEqual(1, len(statements))
+
+            students = {s["student_id"]: s for s in json_data["students"]}
+
+            # Exams count twice and "others" has no weight
+            self.assertEqual(70, students[1]["subjects"]["1"]["total"])
+            self.assertEqual(130, students[1]["total"])
+            self.assertEqual(65, students[1]["average"])
+
+            # Students 2 and 3 are tied on the average, 4 comes fourth
+            self.assertEqual(1, students[1]["position"])
+            self.assertEqual(2, students[2]["position"])
+            self.assertEqual(2, students[3]["position"])
+            self.assertEqual(4, students[4]["position"])
+            self.assertEqual(25, students[4]["subjects"]["1"]["total"])
+            self.assertEqual(
+                [1, 2, 3, 4], [s["student_id"] for s in json_data["students"]]
+            )
+
+            # Maths totals are 70, 70, 75 and 25
+            maths = json_data["subjects"][0]
+            self.assertEqual("Maths", maths["name"])
+            self.assertEqual(4, maths["count"])
+            self.assertEqual(60, maths["mean"])
+            self.assertEqual(25, maths["min"])
+            self.assertEqual(75, maths["max"])
+            self.assertEqual(2, students[1]["subjects"]["1"]["position"])
+            self.assertEqual(1, students[3]["subjects"]["1"]["position"])
+
+    def test_missing_arguments(self):
+        with self.app.test_client() as c:
+            resp = self.get_results(c, class_id=1, term="first")
+
+            self.assertEqual(400, resp.status_code)
+            self.assertIn("session", resp.get_json()["msg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, timedelta
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.task_queues import init_task_queues
+from app.helpers.token_cleanup import remove_revoked_tokens
+from app.models import RevokedTokenModel
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+
+
+class TestTokenCleanup(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app.task_queues = init_task_queues(self.app.redis)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        now = datetime.utcnow()
+        db.session.execute(
+            db.insert(RevokedTokenModel),
+            [
+                {"jti": "old-{}".format(i), "date_revoked": now - timedelta(days=40)}
+                for i in range(25)
+            ]
+            + [
+                {"jti": "new-{}".format(i), "date_revoked": now - timedelta(days=1)}
+                for i in range(5)
+            ],
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_dry_run_only_counts(self):
+        self.assertEqual(25, remove_revoked_tokens(30, dry_run=True))
+        self.assertEqual(30, RevokedTokenModel.query.count())
+
+    def test_removes_old_tokens_in_batches(self):
+        self.assertEqual(25, remove_revoked_tokens(30, batch_size=10))
+
+        remaining = [t.jti for t in RevokedTokenModel.query.all()]
+        self.assertEqual(["new-{}".format(i) for i in range(5)], remaining)
+
+    def test_nothing_to_remove(self):
+        self.assertEqual(0, remove_revoked_tokens(60))
+
+    def test_tokens_are_kept_while_refresh_tokens_are_valid(self):
+        from flask_api_template import remove_old_jwts
+
+        with self.assertRaises(ValueError):
+            remove_revoked_tokens(5)
+
+        result = self.app.test_cli_runner().invoke(remove_old_jwts, ["--retention-days", "5"])
+        self.assertNotEqual(0, result.exit_code)
+        self.assertEqual(30, RevokedTokenModel.query.count())
+
+        class ShortRetentionConfig(TestConfig):
+            JWT_BLOCKLIST_RETENTION_DAYS = 5
+
+        with self.assertRaises(ValueError):
+            create_app(ShortRetentionConfig)
+
+    def test_recurring_task_runs_as_a_single_chain(self):
+        from app.tasks import long_running_jobs
+
+        registry = self.app.task_queues["high"].scheduled_job_registry
+        jobs_app = long_running_jobs.app
+        # Run the task against the test app instead of the default one
+        long_running_jobs.app = self.app
+
+        try:
+            self.assertEqual(25, long_running_jobs.remove_old_jwts(interval=60))
+            self.assertEqual(1, registry.count)
+
+            # A second run while the next one is scheduled does not add another
+            long_running_jobs.remove_old_jwts(interval=60)
+            self.assertEqual(1, registry.count)
+        finally:
+            long_running_jobs.app = jobs_app
+
+    def test_schedule_command_is_idempotent(self):
+        from flask_api_template import schedule_remove_old_jwts
+
+        runner = self.app.test_cli_runner()
+        registry = self.app.task_queues["high"].scheduled_job_registry
+
+        result = runner.invoke(schedule_remove_old_jwts, ["--interval", "60"])
+        self.assertIn("every 60 seconds", result.output)
+
+        result = runner.invoke(schedule_remove_old_jwts, ["--interval", "60"])
+        self.assertIn("already scheduled", result.output)
+        self.assertEqual(1, registry.count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import RevokedTokenModel
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+
+
+class TestTokenVersion(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_logout_all_revokes_every_session(self):
+        with self.app.test_client() as c:
+            first = register_and_login_user(c)
+            second = c.post(
+                "/api/auth/login", json={"email": "tim@test.com", "password": "secret"}
+            ).get_json()
+
+            resp = c.delete(
+                "/api/auth/logout/all",
+                headers={"Authorization": "Bearer {}".format(first["access_token"])},
+            )
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            for tokens in (first, second):
+                resp = c.get(
+                    "/api/users/profile",
+                    headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+                )
+                self.assertEqual(401, resp.status_code, msg=resp.get_json())
+
+                resp = c.post(
+                    "/api/auth/refresh",
+                    headers={"Authorization": "Bearer {}".format(tokens["refresh_token"])},
+                )
+                self.assertEqual(401, resp.status_code, msg=resp.get_json())
+
+            # No revocation rows are written
+            self.assertEqual(0, RevokedTokenModel.query.count())
+
+    def test_new_login_after_logout_all(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+
+            c.delete(
+                "/api/auth/logout/all",
+                headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+            )
+
+            tokens = c.post(
+                "/api/auth/login", json={"email": "tim@test.com", "password": "secret"}
+            ).get_json()
+
+            resp = c.post(
+                "/api/auth/refresh",
+                headers={"Authorization": "Bearer {}".format(tokens["refresh_token"])},
+            )
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+            resp = c.get(
+                "/api/users/profile",
+                headers={
+                    "Authorization": "Bearer {}".format(resp.get_json()["access_token"])
+                },
+            )
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+
+if __name__ == "__main__":
+    unittest.main()
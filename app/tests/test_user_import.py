@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+
+import fakeredis
+import rq
+
+from app import create_app, db
+from app.helpers.task_queues import init_task_queues
+from app.helpers.test_helpers import register_and_login_user
+from app.helpers.user_import import import_users_from_file
+from app.models import Users
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite:///"
+    SECRET_KEY = "SQL-SECRET"
+    JWT_SECRET_KEY = "JWT-SECRET"
+    RATELIMIT_ENABLED = False
+    PASSWORD_HASH_ITERATIONS = 1000
+    PASSWORD_HASH_POOL_SIZE = 0
+    USER_IMPORT_CHUNK_SIZE = 2
+
+
+CSV_UPLOAD = """first_name,last_name,email,phone,password,birthday,role
+ada,obi,ada@test.com,0801,secret,2010-01-01,student
+bola,ade,bola@test.com,0802,secret,2010-02-01,
+chi,eze,not-an-email,0803,secret,2010-03-01,student
+dayo,ola,ada@test.com,0804,secret,2010-04-01,student
+tim,apple,tim@test.com,0805,secret,2010-05-01,student
+"""
+
+NDJSON_UPLOAD = """{"first_name": "ada", "last_name": "obi", "email": "ada@test.com", "phone": "0801", "password": "secret", "birthday": "2010-01-01"}
+{"first_name": "bola"
+{"first_name": "bola", "last_name": "ade", "email": "bola@test.com", "phone": "0801", "password": "secret", "birthday": "2010-01-01"}
+"""
+
+
+class TestUserImport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        TestConfig.UPLOAD_FOLDER = self.tmp.name
+
+        self.app = create_app(TestConfig)
+        self.app.redis = fakeredis.FakeRedis()
+        self.app.task_queues = init_task_queues(self.app.redis)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def write_upload(self, name: str, content: str) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+
+        return path
+
+    def test_import_csv(self):
+        with self.app.test_client() as c:
+            register_and_login_user(c)
+
+            report = import_users_from_file(
+                self.write_upload("users.csv", CSV_UPLOAD), "csv", "admin"
+            )
+
+            self.assertEqual(5, report["total"])
+            self.assertEqual(2, report["imported"])
+            self.assertEqual(3, report["failed"])
+            self.assertEqual([3, 4, 5], [e["row"] for e in report["errors"]])
+            self.assertIn("email", report["errors"][0]["errors"])
+
+            bola = Users.query.filter_by(email="bola@test.com").first()
+            self.assertEqual("student", bola.role)
+
+            resp = c.post(
+                "/api/auth/login", json={"email": "bola@test.com", "password": "secret"}
+            )
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+    def test_import_ndjson(self):
+        report = import_users_from_file(
+            self.write_upload("users.ndjson", NDJSON_UPLOAD), "ndjson", "admin"
+        )
+
+        self.assertEqual(1, report["imported"])
+        self.assertEqual({"row": 2, "errors": ["Not valid JSON"]}, report["errors"][0])
+        self.assertEqual({"phone": ["Phone already in use"]}, report["errors"][1]["errors"])
+
+    def test_import_endpoint_launches_task(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            resp = c.post(
+                "/api/users/import",
+                headers=headers,
+                data=CSV_UPLOAD,
+                content_type="text/csv",
+            )
+            json_data = resp.get_json()
+            self.assertEqual(202, resp.status_code, msg=json_data)
+
+            job = rq.job.Job.fetch(json_data["task_id"], connection=self.app.redis)
+            self.assertEqual("app.tasks.long_running_jobs.import_users", job.func_name)
+            self.assertEqual(("default", 3600), (job.origin, job.timeout))
+            self.assertEqual(CSV_UPLOAD, open(job.kwargs["path"]).read())
+            self.assertEqual("admin", job.kwargs["importer_role"])
+
+            resp = c.get("/api/tasks/active-background-tasks", headers=headers)
+            self.assertEqual("import_users", resp.get_json()[0]["name"])
+
+            resp = c.get("/api/users/import/{}".format(job.id), headers=headers)
+            self.assertEqual(200, resp.status_code, msg=resp.get_json())
+
+    def test_roles_above_the_importer_are_rejected(self):
+        upload = (
+            "first_name,last_name,email,phone,password,birthday,role\n"
+            "ada,obi,ada@test.com,0801,secret,2010-01-01,admin\n"
+            "bola,ade,bola@test.com,0802,secret,2010-02-01,super_admin\n"
+        )
+
+        report = import_users_from_file(
+            self.write_upload("users.csv", upload), "csv", "admin"
+        )
+
+        self.assertEqual(1, report["imported"])
+        self.assertEqual([2], [e["row"] for e in report["errors"]])
+        self.assertIn("role", report["errors"][0]["errors"])
+
+    def test_import_endpoint_is_for_admins(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c, role="student")
+
+            resp = c.post(
+                "/api/users/import",
+                headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+                data=CSV_UPLOAD,
+                content_type="text/csv",
+            )
+
+            self.assertEqual(403, resp.status_code, msg=resp.get_json())
+            self.assertEqual([], os.listdir(self.tmp.name))
+
+    def test_import_endpoint_rejects_unknown_format(self):
+        with self.app.test_client() as c:
+            tokens = register_and_login_user(c)
+
+            resp = c.post(
+                "/api/users/import",
+                headers={"Authorization": "Bearer {}".format(tokens["access_token"])},
+                data="<users/>",
+                content_type="application/xml",
+            )
+
+            self.assertEqual(400, resp.status_code, msg=resp.get_json())
+
+
+if __name__ == "__main__":
+    unittest.main()
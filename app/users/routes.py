@@ -1,34 +1,47 @@
+import os
+import uuid
+
 from app import db
 
-from app.errors.handlers import bad_request
-from app.models import Users
+from app.errors.handlers import bad_request, error_response
+from app.helpers.fieldsets import FieldsetError, fieldset_schema, load_only_fields
+from app.helpers.pagination import PaginationError, page_response, paginate
+from app.helpers.user_import import IMPORT_FORMATS, IMPORTER_ROLES
+from app.models import Users, Tasks
 from app.schemas import UsersSchema
 from app.users import bp
-from flask import Response, request
+from flask import Response, current_app, jsonify, request
 from flask_jwt_extended import current_user, jwt_required
 from marshmallow import ValidationError
 
 # Declare database schemas so they can be returned as JSON objects
-user_schema = UsersSchema(exclude=("email", "password_hash"))
-users_schema = UsersSchema(many=True, exclude=("email", "password_hash"))
+USER_EXCLUDE = ("email", "password_hash")
+user_schema = UsersSchema(exclude=USER_EXCLUDE)
+users_schema = UsersSchema(many=True, exclude=USER_EXCLUDE)
 
 @bp.route("/")
 @jwt_required()
 def get_all_users() -> tuple[Response, int]:
     """
-    Returns all users in the database
+    Returns a page of the users in the database
 
     Returns
     -------
     JSON
-        A JSON object containing all user data
+        A JSON object containing the user data and the cursor of the next page
     """
-    users = Users.query.all()
+    try:
+        schema, fields = fieldset_schema(UsersSchema, many=True, exclude=USER_EXCLUDE)
+        users, next_cursor = paginate(
+            load_only_fields(Users.query, Users, fields), Users
+        )
+    except (FieldsetError, PaginationError) as e:
+        return bad_request(str(e))
     
     if not users:
         return bad_request("No users found"), 404
 
-    return users_schema.jsonify(users), 200
+    return page_response(schema, users, next_cursor), 200
 
 @bp.get("/profile")
 @jwt_required()
@@ -41,7 +54,12 @@ def user_page() -> tuple[Response, int] | str:
     str
         A JSON object containing the user profile information
     """
-    return user_schema.jsonify(current_user), 200
+    try:
+        schema, _ = fieldset_schema(UsersSchema, exclude=USER_EXCLUDE)
+    except FieldsetError as e:
+        return bad_request(str(e))
+
+    return schema.jsonify(current_user), 200
 
 
 @bp.get("/<int:id>")
@@ -59,19 +77,24 @@ def get_user(id: int) -> tuple[Response, int] | Response:
     str
         A JSON object containing the user profile information
     """
-    user = Users.query.filter_by(id=id).first()
+    try:
+        schema, fields = fieldset_schema(UsersSchema, exclude=USER_EXCLUDE)
+    except FieldsetError as e:
+        return bad_request(str(e))
+
+    user = load_only_fields(Users.query, Users, fields).filter_by(id=id).first()
 
     if user is None:
         return bad_request("User not found"), 404
 
-    return user_schema.jsonify(user), 200
+    return schema.jsonify(user), 200
 
 
 @bp.get("/role/<string:role>")
 @jwt_required()
 def get_users_by_role(role: str) -> tuple[Response, int]:
     """
-    Returns all users in the database with a specific role
+    Returns a page of the users in the database with a specific role
 
     Parameters
     ----------
@@ -83,12 +106,17 @@ def get_users_by_role(role: str) -> tuple[Response, int]:
     JSON
         A JSON object containing all user data
     """
-    users = Users.query.filter_by(role=role.lower()).all()
+    try:
+        schema, fields = fieldset_schema(UsersSchema, many=True, exclude=USER_EXCLUDE)
+        query = load_only_fields(Users.query, Users, fields)
+        users, next_cursor = paginate(query.filter_by(role=role.lower()), Users)
+    except (FieldsetError, PaginationError) as e:
+        return bad_request(str(e))
     
     if not users:
         return bad_request("No users found with that role"), 404
 
-    return users_schema.jsonify(users), 200
+    return page_response(schema, users, next_cursor), 200
 
 
 @bp.put("/<int:id>")
@@ -121,6 +149,7 @@ def update_user(id: int) -> tuple[Response, int] | Response:
         setattr(user, k, v)
 
     db.session.commit()
+    current_app.identity_cache.invalidate(user.id)
 
     return user_schema.dump(user), 200
 
@@ -151,5 +180,95 @@ def delete_user(id: int) -> tuple[Response, int]:
 
     db.session.delete(user)
     db.session.commit()
+    current_app.identity_cache.invalidate(user.id)
+
+    return user_schema.jsonify(user), 200
+
+
+@bp.post("/import")
+@jwt_required()
+def import_users() -> tuple[Response, int] | Response:
+    """
+    Lets admins register users in bulk from a CSV or NDJSON upload. The request
+    body is streamed to disk and imported by a background task. Rows with a
+    role above the role of the admin are rejected
+
+    Returns
+    -------
+    str
+        A JSON object containing the id of the import task
+    """
+    if current_user.role not in IMPORTER_ROLES:
+        return error_response(403, "Only admins can import users")
+
+    file_format = request.args.get("format")
+
+    if file_format is None:
+        file_format = {"text/csv": "csv", "application/x-ndjson": "ndjson"}.get(
+            request.mimetype
+        )
+
+    if file_format not in IMPORT_FORMATS:
+        return bad_request("Upload must be CSV or NDJSON")
+
+    if current_user.get_task_in_progress("import_users"):
+        return bad_request("Task already in progress")
+
+    os.makedirs(current_app.config["UPLOAD_FOLDER"], exist_ok=True)
+    path = os.path.join(
+        current_app.config["UPLOAD_FOLDER"], "{}.{}".format(uuid.uuid4(), file_format)
+    )
+
+    with open(path, "wb") as f:
+        while True:
+            chunk = request.stream.read(64 * 1024)
+            if not chunk:
+                break
+
+            f.write(chunk)
+
+    task = current_user.launch_task(
+        "import_users",
+        "Importing users...",
+        path=path,
+        file_format=file_format,
+        importer_role=current_user.role,
+    )
+    db.session.commit()
 
-    return user_schema.jsonify(user), 200
\ No newline at end of file
+    return jsonify({"msg": "Launched user import", "task_id": task.task_id}), 202
+
+
+@bp.get("/import/<string:task_id>")
+@jwt_required()
+def get_import_report(task_id: str) -> tuple[Response, int] | Response:
+    """
+    Returns the progress and the per row report of a bulk user import
+
+    Parameters
+    ----------
+    task_id : str
+        The id of the import task
+
+    Returns
+    -------
+    str
+        A JSON object containing the progress and the import report
+    """
+    task = Tasks.query.filter_by(
+        task_id=task_id, user_id=current_user.id, name="import_users"
+    ).first()
+
+    if task is None:
+        return bad_request("Import not found"), 404
+
+    job = task.get_rq_job()
+    meta = job.meta if job is not None else {}
+
+    return jsonify(
+        {
+            "progress": task.get_progress(),
+            "report": meta.get("report"),
+            "error": meta.get("error"),
+        }
+    ), 200
@@ -0,0 +1,99 @@
+"""
+Compares the latency of authenticated requests with and without the per worker
+Bloom filter in front of the revoked token lookup.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_auth_blocklist --revoked 50000 --requests 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import RevokedTokenModel
+from config import Config
+
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run(use_filter: bool, revoked: int, requests: int, database: str) -> list:
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + database
+        SECRET_KEY = "SQL-SECRET"
+        JWT_SECRET_KEY = "JWT-SECRET"
+        JWT_BLOCKLIST_STORE = "sql"
+        JWT_BLOCKLIST_FILTER = use_filter
+        JWT_BLOCKLIST_FILTER_CAPACITY = revoked * 2
+        RATELIMIT_ENABLED = False
+
+    app = create_app(BenchConfig)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(
+            db.insert(RevokedTokenModel),
+            [
+                {"jti": str(uuid.uuid4()), "date_revoked": datetime.utcnow()}
+                for _ in range(revoked)
+            ],
+        )
+        db.session.commit()
+
+        with app.test_client() as c:
+            token = register_and_login_user(c)["access_token"]
+            headers = {"Authorization": "Bearer {}".format(token)}
+
+            # Warm up, this also loads the filter
+            c.get("/api/users/profile", headers=headers)
+
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                resp = c.get("/api/users/profile", headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+
+                assert resp.status_code == 200, resp.get_json()
+
+        if use_filter:
+            print("filter stats:", app.blocklist.stats())
+
+        db.session.remove()
+        db.drop_all()
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--revoked", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "bench.db")
+
+        for use_filter in (False, True):
+            timings = run(use_filter, args.revoked, args.requests, database)
+            print(
+                "{:<16} p50 {:7.3f} ms  p99 {:7.3f} ms  mean {:7.3f} ms".format(
+                    "with filter" if use_filter else "without filter",
+                    percentile(timings, 50),
+                    percentile(timings, 99),
+                    statistics.mean(timings),
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Compares entering a class gradebook score by score on POST /api/scores/ with
+a single POST /api/scores/bulk request per subject.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_gradebook --students 40 --subjects 10
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import fakeredis
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from app.models import Classes, Scores, Subjects, Users
+from config import Config
+
+SCORE_TYPES = ("CA", "exam")
+
+
+def run(students: int, subjects: int, database: str) -> dict:
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + database
+        SECRET_KEY = "SQL-SECRET"
+        JWT_SECRET_KEY = "JWT-SECRET"
+        JWT_BLOCKLIST_STORE = "sql"
+        RATELIMIT_ENABLED = False
+        DASHBOARD_CACHE_ENABLED = False
+
+    app = create_app(BenchConfig)
+    # Leaderboards are kept in redis, an in-process stand-in avoids needing a server
+    app.redis = fakeredis.FakeRedis()
+    results = {}
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        db.session.add(Classes(name="JSS1"))
+        db.session.add_all(Subjects(name="subject {}".format(i)) for i in range(subjects))
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in range(students)
+            ],
+        )
+        db.session.commit()
+
+        def gradebook(subject_id: int, session: str) -> dict:
+            return {
+                "class_id": 1,
+                "subject_id": subject_id,
+                "term": "first",
+                "session": session,
+                "scores": [
+                    {"student_id": student_id, "type": score_type, "score": 50}
+                    for student_id in range(1, students + 1)
+                    for score_type in SCORE_TYPES
+                ],
+            }
+
+        with app.test_client() as c:
+            tokens = register_and_login_user(c, phone="teacher")
+            headers = {"Authorization": "Bearer {}".format(tokens["access_token"])}
+
+            start = time.perf_counter()
+            for subject_id in range(1, subjects + 1):
+                book = gradebook(subject_id, "single")
+                for entry in book.pop("scores"):
+                    c.post("/api/scores/", headers=headers, json={**book, **entry})
+            results["single"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for subject_id in range(1, subjects + 1):
+                c.post("/api/scores/bulk", headers=headers, json=gradebook(subject_id, "bulk"))
+            results["bulk"] = time.perf_counter() - start
+
+            # Resubmitting updates every score in place
+            start = time.perf_counter()
+            for subject_id in range(1, subjects + 1):
+                c.post("/api/scores/bulk", headers=headers, json=gradebook(subject_id, "bulk"))
+            results["bulk update"] = time.perf_counter() - start
+
+        expected = 2 * students * subjects * len(SCORE_TYPES)
+        assert Scores.query.count() == expected, "Some scores were not written"
+
+        db.session.remove()
+        db.drop_all()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--subjects", type=int, default=10)
+    args = parser.parse_args()
+
+    scores = args.students * args.subjects * len(SCORE_TYPES)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.students, args.subjects, os.path.join(tmp, "bench.db"))
+
+    for path, elapsed in results.items():
+        print(
+            "{:<12} {:8.3f} sec  {:10.1f} scores/sec".format(
+                path, elapsed, scores / elapsed
+            )
+        )
+
+    print("bulk speedup {:.1f}x".format(results["single"] / results["bulk"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measures logins per second on /api/auth/login and /api/auth/fresh-login for
+different password hashing pool sizes. Requests are sent from several client
+threads at once, like a threaded gunicorn worker would receive them.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_login_pool --pool-sizes 0 1 2 4 --threads 8
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app, db
+from app.helpers.test_helpers import register_and_login_user
+from config import Config
+
+
+def run(pool_size: int, threads: int, logins: int, database: str) -> dict:
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + database
+        SECRET_KEY = "SQL-SECRET"
+        JWT_SECRET_KEY = "JWT-SECRET"
+        JWT_BLOCKLIST_STORE = "sql"
+        RATELIMIT_ENABLED = False
+        PASSWORD_HASH_POOL_SIZE = pool_size
+        PASSWORD_HASH_MAX_PENDING = threads
+
+    app = create_app(BenchConfig)
+    results = {}
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        with app.test_client() as c:
+            register_and_login_user(c)
+
+        def login(endpoint):
+            with app.test_client() as c:
+                resp = c.post(
+                    endpoint, json={"email": "tim@test.com", "password": "secret"}
+                )
+                return resp.status_code
+
+        for endpoint in ("/api/auth/login", "/api/auth/fresh-login"):
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                start = time.perf_counter()
+                statuses = list(executor.map(login, [endpoint] * logins))
+                elapsed = time.perf_counter() - start
+
+            results[endpoint] = (
+                statuses.count(200) / elapsed,
+                statuses.count(503),
+            )
+
+        app.password_hasher.shutdown()
+        db.session.remove()
+        db.drop_all()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "bench.db")
+
+        for pool_size in args.pool_sizes:
+            results = run(pool_size, args.threads, args.logins, database)
+
+            for endpoint, (rate, rejected) in results.items():
+                print(
+                    "pool size {:>2}  {:<22} {:8.1f} logins/sec  {} rejected".format(
+                        pool_size, endpoint, rate, rejected
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
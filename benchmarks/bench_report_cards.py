@@ -0,0 +1,215 @@
+"""
+Measures the throughput of report card generation with an increasing number
+of RQ workers. Redis is stood in for by an in-process fakeredis TCP server,
+the workers are separate processes sharing a temporary SQLite database.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_report_cards --classes 16 --students 100 --workers 1 2 4
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import rq
+from fakeredis import TcpFakeServer
+from redis import Redis
+
+from app import create_app, db
+from app.helpers.report_cards import launch_report_batch
+from app.helpers.task_queues import init_task_queues
+from app.models import Classes, Reports, Scores, Subjects, Tasks, Users
+from config import Config
+
+
+class StandInRedis(Redis):
+    """
+    Answers the two commands RQ sends that the fakeredis server cannot: its
+    CLIENT LIST reply cannot be parsed by redis-py, and INFO is unknown to it
+    and drops the connection
+    """
+
+    def client_list(self, *args, **kwargs) -> list:
+        return []
+
+    def info(self, *args, **kwargs) -> dict:
+        return {"redis_version": "7.0.0"}
+
+
+def worker(redis_url: str, ready, start) -> None:
+    """
+    Runs an RQ worker until the queue is empty. The app of the jobs module is
+    created before the clock starts
+    """
+    import warnings
+
+    import app.tasks.long_running_jobs  # noqa: F401
+
+    warnings.simplefilter("ignore")
+    connection = StandInRedis.from_url(redis_url)
+    ready.put(os.getpid())
+    start.wait()
+
+    rq.SimpleWorker(
+        list(init_task_queues(connection).values()), connection=connection
+    ).work(burst=True, logging_level="WARNING")
+
+
+def seed(classes: int, students: int, subjects: int) -> Users:
+    db.session.add_all(Classes(name="class {}".format(i)) for i in range(classes))
+    db.session.add_all(Subjects(name="subject {}".format(i)) for i in range(subjects))
+    db.session.execute(
+        db.insert(Users),
+        [
+            {
+                "first_name": "student",
+                "last_name": str(i),
+                "email": "student{}@test.com".format(i),
+                "phone": "student{}".format(i),
+                "password_hash": "x",
+                "role": "student",
+                "birthday": datetime(2010, 1, 1),
+            }
+            for i in range(classes * students)
+        ],
+    )
+    db.session.execute(
+        db.insert(Scores),
+        [
+            {
+                "class_id": student_id % classes + 1,
+                "subject_id": subject_id,
+                "student_id": student_id,
+                "term": "first",
+                "session": "2024/2025",
+                "type": "exam",
+                "score": (student_id * 7 + subject_id * 13) % 100,
+            }
+            for student_id in range(1, classes * students + 1)
+            for subject_id in range(1, subjects + 1)
+        ],
+    )
+
+    teacher = Users(
+        first_name="tim",
+        last_name="teacher",
+        email="teacher@test.com",
+        phone="teacher",
+        password_hash="x",
+        role="teacher",
+        birthday=datetime(1990, 1, 1),
+    )
+    db.session.add(teacher)
+    db.session.commit()
+
+    return teacher
+
+
+def run(classes: int, students: int, subjects: int, workers: list, tmp: str) -> dict:
+    server = TcpFakeServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    redis_url = "redis://127.0.0.1:{}".format(server.server_address[1])
+
+    # The worker processes build their app from the environment
+    os.environ.update(
+        DATABASE_URL="sqlite:///" + os.path.join(tmp, "bench.db"),
+        REDIS_URL=redis_url,
+        REPORTS_FOLDER=os.path.join(tmp, "report_cards"),
+        SECRET_KEY="SQL-SECRET",
+        JWT_SECRET_KEY="JWT-SECRET",
+        JWT_BLOCKLIST_STORE="sql",
+        DASHBOARD_CACHE_ENABLED="0",
+    )
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = os.environ["DATABASE_URL"]
+        REDIS_URL = redis_url
+        REPORTS_FOLDER = os.environ["REPORTS_FOLDER"]
+        SECRET_KEY = "SQL-SECRET"
+        JWT_SECRET_KEY = "JWT-SECRET"
+        JWT_BLOCKLIST_STORE = "sql"
+        RATELIMIT_ENABLED = False
+        DASHBOARD_CACHE_ENABLED = False
+
+    app = create_app(BenchConfig)
+    app.redis = StandInRedis.from_url(redis_url)
+    app.task_queues = init_task_queues(app.redis)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        teacher = seed(classes, students, subjects)
+
+        for count in workers:
+            db.session.execute(db.delete(Reports))
+            db.session.execute(db.delete(Tasks))
+            db.session.commit()
+            # Every run renders all the cards instead of reusing the last run's
+            shutil.rmtree(app.config["REPORTS_FOLDER"], ignore_errors=True)
+
+            ready, start = context.Queue(), context.Event()
+            processes = [
+                context.Process(target=worker, args=(redis_url, ready, start))
+                for _ in range(count)
+            ]
+            for process in processes:
+                process.start()
+
+            for _ in processes:
+                ready.get()
+
+            clock = time.perf_counter()
+            launch_report_batch(
+                teacher, list(range(1, classes + 1)), "first", "2024/2025", pdf=False
+            )
+            db.session.commit()
+            start.set()
+
+            for process in processes:
+                process.join()
+
+            elapsed = time.perf_counter() - clock
+            generated = Reports.query.count()
+            assert generated == classes * students, "Some report cards are missing"
+
+            results[count] = (elapsed, generated / elapsed)
+
+        db.session.remove()
+        db.drop_all()
+
+    server.shutdown()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--classes", type=int, default=16)
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--subjects", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.classes, args.students, args.subjects, args.workers, tmp)
+
+    base = results[min(results)][1]
+
+    print("{} cpus".format(os.cpu_count()))
+    for count, (elapsed, throughput) in results.items():
+        print(
+            "{:>2} workers {:8.3f} sec {:10.1f} reports/sec {:5.1f}x".format(
+                count, elapsed, throughput, throughput / base
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
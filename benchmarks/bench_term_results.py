@@ -0,0 +1,133 @@
+"""
+Compares the term result engine with computing the same results by loading
+the scores of every student through the ORM, one student at a time.
+
+Run from the repository root with:
+
+    python -m benchmarks.bench_term_results --students 2000 --subjects 15
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from app import create_app, db
+from app.helpers.term_results import compute_term_results, rank
+from app.models import Classes, Scores, Subjects, Users
+from config import Config
+
+SCORE_TYPES = ("CA", "test", "exam")
+
+
+def per_student_results(student_ids: list, weights: dict) -> dict:
+    """
+    The baseline: one ORM query per student, totals summed in Python
+    """
+    averages = {}
+
+    for student_id in student_ids:
+        totals = defaultdict(float)
+
+        for score in Scores.query.filter_by(
+            student_id=student_id, class_id=1, term="first", session="2024/2025"
+        ):
+            totals[score.subject_id] += score.score * weights.get(score.type, 0)
+
+        averages[student_id] = sum(totals.values()) / len(totals)
+
+    return dict(zip(averages, rank(list(averages.values()))))
+
+
+def run(students: int, subjects: int, database: str) -> dict:
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + database
+        SECRET_KEY = "SQL-SECRET"
+        JWT_SECRET_KEY = "JWT-SECRET"
+        JWT_BLOCKLIST_STORE = "sql"
+        RATELIMIT_ENABLED = False
+        DASHBOARD_CACHE_ENABLED = False
+
+    app = create_app(BenchConfig)
+    results = {}
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        db.session.add(Classes(name="JSS1"))
+        db.session.add_all(Subjects(name="subject {}".format(i)) for i in range(subjects))
+        db.session.execute(
+            db.insert(Users),
+            [
+                {
+                    "first_name": "student",
+                    "last_name": str(i),
+                    "email": "student{}@test.com".format(i),
+                    "phone": "student{}".format(i),
+                    "password_hash": "x",
+                    "role": "student",
+                    "birthday": datetime(2010, 1, 1),
+                }
+                for i in range(students)
+            ],
+        )
+        db.session.execute(
+            db.insert(Scores),
+            [
+                {
+                    "class_id": 1,
+                    "subject_id": subject_id,
+                    "student_id": student_id,
+                    "term": "first",
+                    "session": "2024/2025",
+                    "type": score_type,
+                    "score": (student_id * 7 + subject_id * 13) % 40,
+                }
+                for student_id in range(1, students + 1)
+                for subject_id in range(1, subjects + 1)
+                for score_type in SCORE_TYPES
+            ],
+        )
+        db.session.commit()
+
+        start = time.perf_counter()
+        engine = compute_term_results(1, "first", "2024/2025")
+        results["result engine"] = time.perf_counter() - start
+
+        db.session.expire_all()
+        start = time.perf_counter()
+        baseline = per_student_results(
+            list(range(1, students + 1)), app.config["SCORE_TYPE_WEIGHTS"]
+        )
+        results["per-student ORM"] = time.perf_counter() - start
+
+        positions = {s["student_id"]: s["position"] for s in engine["students"]}
+        assert positions == baseline, "The two computations disagree"
+
+        db.session.remove()
+        db.drop_all()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--subjects", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.students, args.subjects, os.path.join(tmp, "bench.db"))
+
+    for method, elapsed in results.items():
+        print("{:<16} {:8.3f} sec".format(method, elapsed))
+
+    print(
+        "speedup {:.1f}x".format(results["per-student ORM"] / results["result engine"])
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -24,5 +24,97 @@ class Config(object):
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
+    # Where revoked JWTs are looked up, either "redis" or "sql"
+    JWT_BLOCKLIST_STORE = os.environ.get("JWT_BLOCKLIST_STORE") or "redis"
+    # Per worker Bloom filter which skips the store lookup for tokens never
+    # revoked, without it every request makes a round-trip to the store
+    JWT_BLOCKLIST_FILTER = os.environ.get("JWT_BLOCKLIST_FILTER") != "0"
+    JWT_BLOCKLIST_FILTER_CAPACITY = int(
+        os.environ.get("JWT_BLOCKLIST_FILTER_CAPACITY") or 100000
+    )
+    JWT_BLOCKLIST_FILTER_ERROR_RATE = 0.001
+    JWT_BLOCKLIST_FILTER_REFRESH_SECONDS = 5
+    # Cleanup of the revoked token table, see the remove_old_jwts command. The
+    # table is the source of truth of the blocklist, rows have to be kept as
+    # long as JWT_REFRESH_TOKEN_EXPIRES, 30 days by default
+    JWT_BLOCKLIST_RETENTION_DAYS = int(os.environ.get("JWT_BLOCKLIST_RETENTION_DAYS") or 30)
+    JWT_BLOCKLIST_CLEANUP_BATCH_SIZE = 1000
 
     REDIS_URL = os.environ.get("REDIS_URL") or "redis://"
+
+    # Rate limit counters are shared by all workers through RATELIMIT_STORAGE_URI,
+    # use "memory://" for a single process stand-in. Requests are let through
+    # when the storage cannot be reached
+    RATELIMIT_ENABLED = True
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI") or REDIS_URL
+    RATELIMIT_STRATEGY = "moving-window"
+    RATELIMIT_HEADERS_ENABLED = True
+    RATELIMIT_SWALLOW_ERRORS = True
+    # Budget shared by all endpoints on top of the per endpoint limits, every
+    # request uses the RATELIMIT_COSTS weight of its endpoint, 1 if not listed
+    RATELIMIT_APPLICATION = os.environ.get("RATELIMIT_APPLICATION") or "1000 per hour"
+    RATELIMIT_COSTS = {
+        "dashboard.dashboard": 5,
+        "users.import_users": 10,
+    }
+
+    # Page sizes of the collection endpoints, see app.helpers.pagination
+    PAGE_SIZE_DEFAULT = 50
+    PAGE_SIZE_MAX = 500
+
+    # Largest gradebook accepted by the bulk score endpoint
+    SCORES_BULK_MAX_ROWS = 5000
+
+    # Rows fetched from the database cursor per batch by the score export
+    SCORES_EXPORT_BATCH_SIZE = 1000
+
+    # Weight of each score type in a term total, and the number of decimals
+    # term results are rounded to before ranking
+    SCORE_TYPE_WEIGHTS = {
+        "CA": 1, "test": 1, "exam": 1, "assignment": 1, "project": 1, "others": 1
+    }
+    TERM_RESULTS_PRECISION = 2
+
+    # Password hashing runs on a pool of PASSWORD_HASH_POOL_SIZE processes, requests
+    # get a 503 once PASSWORD_HASH_MAX_PENDING hashes are queued or running
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS") or 600000)
+    PASSWORD_HASH_POOL_SIZE = int(os.environ.get("PASSWORD_HASH_POOL_SIZE") or 2)
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING") or 16)
+    PASSWORD_HASH_TIMEOUT = 10
+
+    # Bulk user imports are stored in UPLOAD_FOLDER until the background job ran
+    UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER") or os.path.join(basedir, "uploads")
+    USER_IMPORT_CHUNK_SIZE = 500
+    USER_IMPORT_MAX_ERRORS = 1000
+
+    # Report cards are kept in the REPORTS_STORE artifact store, "local" keeps
+    # them in REPORTS_FOLDER. Set USE_X_SENDFILE when a front server like nginx
+    # can send the files itself
+    REPORTS_STORE = os.environ.get("REPORTS_STORE") or "local"
+    REPORTS_FOLDER = os.environ.get("REPORTS_FOLDER") or os.path.join(basedir, "report_cards")
+    USE_X_SENDFILE = os.environ.get("USE_X_SENDFILE") == "1"
+
+    # Report cards are generated by one background task per class. Batch progress
+    # is kept for REPORT_CARDS_BATCH_TTL seconds and unreferenced cards are only
+    # garbage collected after REPORT_CARDS_GC_GRACE seconds, longer than a
+    # generation task may run
+    REPORT_CARDS_JOB_TIMEOUT = 1800
+    REPORT_CARDS_BATCH_TTL = 86400
+    REPORT_CARDS_GC_GRACE = 3600
+
+    # Queues a worker listens to when run without --queues, a queue with twice
+    # the weight of another is looked at first twice as often
+    TASK_QUEUE_WEIGHTS = os.environ.get("TASK_QUEUE_WEIGHTS") or "high=6,default=3,bulk=1"
+
+    # Cache of the user loaded for current_user on protected routes. With
+    # IDENTITY_CACHE_REDIS off the cache stays in each worker, changes made
+    # through another worker, revoked tokens included, show after the TTL
+    IDENTITY_CACHE_TTL = int(os.environ.get("IDENTITY_CACHE_TTL") or 30)
+    IDENTITY_CACHE_SIZE = 10000
+    IDENTITY_CACHE_REDIS = os.environ.get("IDENTITY_CACHE_REDIS") == "1"
+
+    # Dashboard response cache, entries are invalidated on writes and expire
+    # after DASHBOARD_CACHE_TTL seconds
+    DASHBOARD_CACHE_ENABLED = os.environ.get("DASHBOARD_CACHE_ENABLED") != "0"
+    DASHBOARD_CACHE_TTL = int(os.environ.get("DASHBOARD_CACHE_TTL") or 300)
+    DASHBOARD_CACHE_LOCK_TIMEOUT = 5
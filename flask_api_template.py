@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import timedelta
 
-from dateutil.relativedelta import relativedelta
+import click
 
 from app import create_app, db
 
@@ -8,35 +8,201 @@ app = create_app()
 
 
 @app.cli.command()
-def remove_old_jwts():
+@click.option(
+    "--retention-days",
+    type=int,
+    default=None,
+    help="Days revoked tokens are kept, defaults to JWT_BLOCKLIST_RETENTION_DAYS.",
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    default=None,
+    help="Rows deleted per statement, defaults to JWT_BLOCKLIST_CLEANUP_BATCH_SIZE.",
+)
+@click.option("--dry-run", is_flag=True, help="Only report how many rows would go.")
+def remove_old_jwts(retention_days, batch_size, dry_run):
     """
-    Scan the database for JWT tokens in the Revoked Token table older than 5 days
-    and remove them.
+    Scan the database for JWT tokens in the Revoked Token table older than the
+    retention period and remove them in batches.
     """
 
     # Import within the function to prevent working outside of application context
     # when calling flask --help
-    from app.models import RevokedTokenModel
+    from app.helpers.token_cleanup import remove_revoked_tokens
 
-    delete_date = datetime.utcnow() - relativedelta(days=5)
+    if retention_days is None:
+        retention_days = app.config["JWT_BLOCKLIST_RETENTION_DAYS"]
 
-    old_tokens = (
-        db.session.query(RevokedTokenModel)
-        .filter(RevokedTokenModel.date_revoked < delete_date)
-        .all()
-    )
+    if batch_size is None:
+        batch_size = app.config["JWT_BLOCKLIST_CLEANUP_BATCH_SIZE"]
+
+    try:
+        removed = remove_revoked_tokens(retention_days, batch_size, dry_run=dry_run)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--retention-days")
+
+    if dry_run:
+        print(
+            "{} tokens older than {} days would be removed".format(
+                removed, retention_days
+            )
+        )
+
+    elif removed:
+        print("{} old tokens have been removed from the database".format(removed))
+
+    else:
+        print("No JWT's older than {} days have been found".format(retention_days))
+
+    return removed
+
+
+@app.cli.command()
+@click.option(
+    "--interval", type=int, default=3600, help="Seconds between two cleanup runs."
+)
+def schedule_remove_old_jwts(interval):
+    """
+    Schedule remove_old_jwts as a recurring background task, unless it is
+    already scheduled. A worker of the high queue has to run with
+    --with-scheduler.
+    """
+    from app.helpers.task_queues import enqueue_task, is_task_scheduled
+
+    if is_task_scheduled("remove_old_jwts"):
+        print("Removal of old JWTs is already scheduled")
+        return
+
+    enqueue_task("remove_old_jwts", delay=timedelta(seconds=interval), interval=interval)
+
+    print("Scheduled removal of old JWTs every {} seconds".format(interval))
+
+
+@app.cli.command()
+@click.option(
+    "--verify", is_flag=True, help="Only report the schools whose stats are wrong."
+)
+def rebuild_school_stats(verify):
+    """
+    Recompute the School Stats table from the school association tables and
+    fix the rows which differ.
+    """
+    from app.helpers.school_stats import rebuild_school_stats
+
+    mismatches = rebuild_school_stats(verify_only=verify)
+
+    for mismatch in mismatches:
+        print(
+            "School {}: expected {}, found {}".format(
+                mismatch["school_id"], mismatch["expected"], mismatch["actual"]
+            )
+        )
+
+    if not mismatches:
+        print("School stats are up to date")
+
+    elif verify:
+        raise SystemExit(1)
+
+    else:
+        print("Rebuilt the stats of {} schools".format(len(mismatches)))
 
-    if old_tokens:
-        for token in old_tokens:
-            db.session.delete(token)
 
-        db.session.commit()
+@app.cli.command()
+def rebuild_leaderboards():
+    """
+    Rebuild the class leaderboards in redis from the Scores table.
+    """
+    from app.helpers.leaderboards import rebuild_leaderboards
+
+    print("Rebuilt {} leaderboards".format(rebuild_leaderboards()))
 
+
+@app.cli.command()
+@click.option("--fix", is_flag=True, help="Replace the rows which are wrong.")
+def check_score_stats(fix):
+    """
+    Verify the running score statistics against a full recompute from the
+    Scores table.
+    """
+    from app.helpers.score_stats import check_score_stats
+
+    mismatches = check_score_stats(fix=fix)
+
+    for mismatch in mismatches:
         print(
-            "{} old tokens have been removed from the database".format(len(old_tokens))
+            "{}: expected {}, found {}".format(
+                mismatch["key"], mismatch["expected"], mismatch["actual"]
+            )
         )
 
+    if not mismatches:
+        print("Score stats are consistent")
+
+    elif fix:
+        print("Fixed the stats of {} keys".format(len(mismatches)))
+
     else:
-        print("No JWT's older than 5 days have been found")
+        raise SystemExit(1)
+
+
+@app.cli.command()
+@click.option(
+    "--grace-seconds",
+    type=int,
+    default=None,
+    help="Age a file needs before it can go, defaults to REPORT_CARDS_GC_GRACE.",
+)
+@click.option("--dry-run", is_flag=True, help="Only list the files which would go.")
+def gc_report_cards(grace_seconds, dry_run):
+    """
+    Remove the report card files which no report points to anymore.
+    """
+    from app.helpers.report_cards import collect_garbage
+
+    if grace_seconds is None:
+        grace_seconds = app.config["REPORT_CARDS_GC_GRACE"]
+
+    removed = collect_garbage(grace_seconds, dry_run=dry_run)
+
+    for path in removed:
+        print(path)
+
+    print(
+        "{} report card files {}".format(
+            len(removed), "would be removed" if dry_run else "have been removed"
+        )
+    )
 
-    return old_tokens
+
+@app.cli.command()
+@click.option(
+    "--queues",
+    default=None,
+    help="Queues and their weights, defaults to TASK_QUEUE_WEIGHTS. "
+    "For instance high=6,default=3,bulk=1.",
+)
+@click.option("--burst", is_flag=True, help="Stop once the queues are empty.")
+@click.option(
+    "--with-scheduler", is_flag=True, help="Also enqueue the delayed tasks when due."
+)
+def run_worker(queues, burst, with_scheduler):
+    """
+    Run a background worker on the task queues. Each worker runs one task at
+    a time, run several workers to run tasks concurrently, the queues a worker
+    listens to cap the share of workers a kind of task can take.
+    """
+    from app.helpers.task_queues import WeightedWorker, parse_queue_weights
+
+    try:
+        weights = parse_queue_weights(queues or app.config["TASK_QUEUE_WEIGHTS"])
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--queues")
+
+    worker = WeightedWorker(
+        [app.task_queues[name] for name in weights],
+        weights=weights,
+        connection=app.redis,
+    )
+    worker.work(burst=burst, with_scheduler=with_scheduler)
@@ -0,0 +1,30 @@
+"""generated report urls
+
+Revision ID: b8e4d2f6a9c1
+Revises: f1c9e2b7d4a6
+Create Date: 2026-10-17 23:14:52.407913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4d2f6a9c1'
+down_revision = 'f1c9e2b7d4a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only the report card generator sets the url of a report, reports
+    # submitted by hand have none until their card is generated
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.alter_column('url', existing_type=sa.String(length=150), nullable=True)
+
+
+def downgrade():
+    op.execute("UPDATE reports SET url = '' WHERE url IS NULL")
+
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.alter_column('url', existing_type=sa.String(length=150), nullable=False)